@@ -9,7 +9,9 @@ from .models import (
     Payment,
     LoanExpense,
     LoanPledge,
-    LoanPledgeAdjustment
+    LoanPledgeAdjustment,
+    MediaTask,
+    ApprovalRequest
 )
 
 # =========================
@@ -146,6 +148,10 @@ class LoanAdmin(admin.ModelAdmin):
         LoanPledgeInline,
     ]
 
+    def get_queryset(self, request):
+        # Include wizard drafts, which the default manager hides
+        return Loan.all_objects.all()
+
 
 # =========================
 # GOLD ITEM ADMIN
@@ -222,3 +228,46 @@ class LoanExpenseAdmin(admin.ModelAdmin):
 class LoanPledgeAdmin(admin.ModelAdmin):
     list_display = ("loan", "bank_name", "pledge_receipt_no", "interest_rate")
     inlines = [LoanPledgeAdjustmentInline]
+
+
+# =========================
+# MEDIA TASK ADMIN
+# =========================
+
+@admin.register(MediaTask)
+class MediaTaskAdmin(admin.ModelAdmin):
+    list_display = (
+        "task_type",
+        "model_label",
+        "object_id",
+        "field_name",
+        "status",
+        "attempts",
+        "created_at",
+        "finished_at",
+    )
+
+    list_filter = ("status", "task_type")
+    ordering = ("-created_at",)
+
+
+# =========================
+# APPROVAL QUEUE ADMIN
+# =========================
+
+@admin.register(ApprovalRequest)
+class ApprovalRequestAdmin(admin.ModelAdmin):
+    list_display = (
+        "loan",
+        "purpose",
+        "status",
+        "amount",
+        "requested_at",
+        "approved_at",
+        "used_at",
+    )
+
+    list_filter = ("status", "purpose")
+    search_fields = ("loan__loan_number", "mobile_number")
+    raw_id_fields = ("loan", "batch_otp", "otp_record")
+    ordering = ("-requested_at",)
@@ -1,5 +1,43 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.models.signals import post_migrate, post_save, post_delete
+
+
+def install_customer_search_index(sender, using, **kwargs):
+    # SQLite drops the search and change log triggers whenever a migration
+    # rebuilds the customer table; put back whatever is missing (a no-op otherwise)
+    from django.db import connections
+    from django.db.migrations.recorder import MigrationRecorder
+    from .customer_search import CustomerSearchIndex, CustomerPrefixIndex
+
+    connection = connections[using]
+    applied = MigrationRecorder(connection).applied_migrations()
+    if ("gold_loan", "0029_customer_search_index") in applied:
+        CustomerSearchIndex.install(connection)
+    if ("gold_loan", "0032_customerchange") in applied:
+        CustomerPrefixIndex.install(connection)
 
 
 class GoldLoanConfig(AppConfig):
     name = 'gold_loan'
+
+    def ready(self):
+        from . import checks  # noqa: F401 (registers the system checks)
+        from .customer_search import CustomerPrefixIndex
+        from .media_worker import MediaWorker
+
+        post_migrate.connect(install_customer_search_index, sender=self)
+
+        # Web processes re-submit pending / retried / left-over media tasks
+        request_started.connect(MediaWorker.start_sweeper, dispatch_uid="gold_loan_media_sweeper")
+
+        # Build this worker's in-process typeahead index in the background, and keep it current
+        request_started.connect(CustomerPrefixIndex.warm, dispatch_uid="gold_loan_customer_prefix_index")
+        Customer = self.get_model("Customer")
+        post_save.connect(CustomerPrefixIndex.customer_saved, sender=Customer)
+        post_delete.connect(CustomerPrefixIndex.customer_deleted, sender=Customer)
+
+        # Tombstones for incremental exports
+        DeletedRecord = self.get_model("DeletedRecord")
+        post_delete.connect(DeletedRecord.customer_deleted, sender=Customer)
+        post_delete.connect(DeletedRecord.loan_deleted, sender=self.get_model("Loan"))
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose add()/incr() are atomic across processes
+SHARED_CACHE_BACKENDS = (
+    "django.core.cache.backends.memcached.PyMemcacheCache",
+    "django.core.cache.backends.memcached.PyLibMCCache",
+    "django.core.cache.backends.redis.RedisCache",
+)
+
+
+@register(Tags.caches)
+def check_otp_cache(app_configs, **kwargs):
+    """
+    The OTP circuit breaker and rate limits keep their state in the default
+    cache and rely on atomic add()/incr(). Warn when that cache cannot give
+    every worker the same, consistent view.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    workers = getattr(settings, "WEB_WORKERS", 1)
+
+    if backend.endswith(("FileBasedCache", "DatabaseCache", "DummyCache")):
+        return [Warning(
+            f"The default cache ({backend}) has no atomic add()/incr().",
+            hint=(
+                "The OTP circuit breaker may let several half-open probes through "
+                "and the OTP rate limits can be overrun. Use one of: "
+                + ", ".join(SHARED_CACHE_BACKENDS) + "."
+            ),
+            id="gold_loan.W001",
+        )]
+    if backend.endswith("LocMemCache") and workers > 1:
+        return [Warning(
+            f"The default cache is per process but WEB_WORKERS is {workers}.",
+            hint=(
+                "Each worker keeps its own OTP circuit breaker and rate limits, so a "
+                "failing provider is retried once per worker and the limits are "
+                "multiplied by the worker count. Use one of: "
+                + ", ".join(SHARED_CACHE_BACKENDS) + "."
+            ),
+            id="gold_loan.W002",
+        )]
+    return []
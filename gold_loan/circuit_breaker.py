@@ -0,0 +1,104 @@
+import time
+import logging
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker kept in Django's cache, so every worker sharing the cache
+    sees the same state:
+
+    - closed:    calls go through; `failure_threshold` failures within `window`
+                 seconds open the circuit.
+    - open:      calls are refused at once (no network) for `recovery_timeout` seconds.
+    - half_open: one caller at a time is let through as a probe; its success
+                 closes the circuit, its failure opens it again.
+
+    The half-open probe relies on an atomic cache.add() and the failure count
+    on an atomic cache.incr(), so the cache must be Memcached or Redis for the
+    state to be shared correctly. With the local-memory backend the state is
+    per process; the file-based backend may let several probes through.
+    `manage.py check` warns about either (gold_loan.W001 / W002).
+    """
+
+    STATE_CLOSED = "closed"
+    STATE_OPEN = "open"
+    STATE_HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, window=60, recovery_timeout=30):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.window = max(1, int(window))
+        self.recovery_timeout = max(1, int(recovery_timeout))
+
+    def _key(self, part):
+        return f"circuit:{self.name}:{part}"
+
+    def _opened_at(self):
+        return cache.get(self._key("opened_at"))
+
+    @property
+    def state(self):
+        opened_at = self._opened_at()
+        if opened_at is None:
+            return self.STATE_CLOSED
+        if time.time() - opened_at < self.recovery_timeout:
+            return self.STATE_OPEN
+        return self.STATE_HALF_OPEN
+
+    def allow(self):
+        """Whether a call may go out now (in half_open, only the single probe)"""
+        state = self.state
+        if state == self.STATE_CLOSED:
+            return True
+        if state == self.STATE_OPEN:
+            return False
+        # The probe slot expires by itself if its caller never reports back
+        return cache.add(self._key("probe"), 1, timeout=self.recovery_timeout)
+
+    def record_success(self):
+        if self._opened_at() is not None:
+            logger.info(f"Circuit {self.name} closed")
+        cache.delete_many([self._key("failures"), self._key("opened_at"), self._key("probe")])
+
+    def record_failure(self):
+        if self.state == self.STATE_HALF_OPEN:
+            self._open()  # The probe failed
+            return
+
+        key = self._key("failures")
+        cache.add(key, 0, timeout=self.window)
+        try:
+            failures = cache.incr(key)
+        except ValueError:
+            # Window expired between add() and incr()
+            cache.set(key, 1, timeout=self.window)
+            failures = 1
+
+        if failures >= self.failure_threshold and self._opened_at() is None:
+            self._open()
+
+    def _open(self):
+        logger.warning(f"Circuit {self.name} open for {self.recovery_timeout}s")
+        cache.set(self._key("opened_at"), time.time(), timeout=None)
+        cache.delete_many([self._key("failures"), self._key("probe")])
+
+    def reset(self):
+        cache.delete_many([self._key("failures"), self._key("opened_at"), self._key("probe")])
+
+    def status(self):
+        """State for the status endpoint"""
+        opened_at = self._opened_at()
+        retry_in = 0
+        if opened_at is not None:
+            retry_in = max(0, round(opened_at + self.recovery_timeout - time.time(), 1))
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failures": cache.get(self._key("failures"), 0),
+            "failure_threshold": self.failure_threshold,
+            "opened_at": opened_at,
+            "retry_in": retry_in,
+        }
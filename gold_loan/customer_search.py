@@ -0,0 +1,698 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from array import array
+from django.conf import settings
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.db.models import Max, Q
+from django.db.models.functions import Lower
+
+from .phonetic import edit_distance, name_words, phonetic_key
+
+logger = logging.getLogger(__name__)
+
+
+class CustomerSearchIndex:
+    """
+    Ranked substring search over customer name, mobile, Aadhaar and customer ID
+    for the step 1 typeahead (search_customers), without scanning the table.
+
+    - SQLite: FTS5 table gold_loan_customer_fts with the trigram tokenizer. It
+      is an external-content index over gold_loan_customer kept in sync by
+      triggers, so every write path (save, bulk_create, update, raw SQL)
+      updates it. Exact and prefix matches are looked up first through the
+      column indexes (the unique columns and lower(name)), so they are found
+      however old they are; the rest are filled from the newest CANDIDATES
+      FTS matches, ranked: a name word starting with the query, then newest.
+      (bm25 would have to score every match, which is slow for common names.)
+    - PostgreSQL: pg_trgm GIN indexes on the searched columns, which serve the
+      ILIKE '%q%' lookups. Ranked by name similarity.
+    - Other backends, or queries shorter than a trigram: plain ORM filters.
+
+    install() is run by migration 0029 and again after every migrate (see
+    apps.py), because SQLite drops the triggers whenever Django rebuilds the
+    customer table.
+    """
+
+    FTS_TABLE = "gold_loan_customer_fts"
+    COLUMNS = ("name", "mobile_primary", "aadhaar_number", "customer_id")
+    MIN_QUERY_LENGTH = 3  # Trigram indexes cannot serve shorter queries
+    CANDIDATES = 200  # Matches ranked per query (SQLite)
+
+    SQLITE_SEARCH = f"""
+        SELECT c.id FROM gold_loan_customer c
+        JOIN (
+            SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rowid DESC LIMIT %s
+        ) m ON m.rowid = c.id
+        ORDER BY c.name LIKE %s ESCAPE '\\' DESC, c.id DESC
+        LIMIT %s
+    """
+
+    TRIGGERS = {
+        "gold_loan_customer_fts_ai": """
+            CREATE TRIGGER IF NOT EXISTS gold_loan_customer_fts_ai AFTER INSERT ON gold_loan_customer BEGIN
+                INSERT INTO gold_loan_customer_fts(rowid, name, mobile_primary, aadhaar_number, customer_id)
+                VALUES (new.id, new.name, new.mobile_primary, new.aadhaar_number, new.customer_id);
+            END
+        """,
+        "gold_loan_customer_fts_ad": """
+            CREATE TRIGGER IF NOT EXISTS gold_loan_customer_fts_ad AFTER DELETE ON gold_loan_customer BEGIN
+                INSERT INTO gold_loan_customer_fts(gold_loan_customer_fts, rowid, name, mobile_primary, aadhaar_number, customer_id)
+                VALUES ('delete', old.id, old.name, old.mobile_primary, old.aadhaar_number, old.customer_id);
+            END
+        """,
+        "gold_loan_customer_fts_au": """
+            CREATE TRIGGER IF NOT EXISTS gold_loan_customer_fts_au
+            AFTER UPDATE OF name, mobile_primary, aadhaar_number, customer_id ON gold_loan_customer BEGIN
+                INSERT INTO gold_loan_customer_fts(gold_loan_customer_fts, rowid, name, mobile_primary, aadhaar_number, customer_id)
+                VALUES ('delete', old.id, old.name, old.mobile_primary, old.aadhaar_number, old.customer_id);
+                INSERT INTO gold_loan_customer_fts(rowid, name, mobile_primary, aadhaar_number, customer_id)
+                VALUES (new.id, new.name, new.mobile_primary, new.aadhaar_number, new.customer_id);
+            END
+        """,
+    }
+
+    TRIGRAM_INDEXES = {
+        "gold_loan_customer_name_trgm": "name",
+        "gold_loan_customer_mobile_trgm": "mobile_primary",
+        "gold_loan_customer_aadhaar_trgm": "aadhaar_number",
+        "gold_loan_customer_cid_trgm": "customer_id",
+    }
+
+    # Per database alias: whether the index is usable (checked once per process)
+    _available = {}
+
+    # =========================
+    # INSTALL
+    # =========================
+
+    @classmethod
+    def install(cls, connection):
+        """Create whatever part of the index is missing (idempotent); returns True if anything was created"""
+        if connection.vendor == "sqlite":
+            created = cls._install_sqlite(connection)
+        elif connection.vendor == "postgresql":
+            created = cls._install_postgresql(connection)
+        else:
+            return False
+        cls._available.pop(connection.alias, None)
+        return created
+
+    @classmethod
+    def _install_sqlite(cls, connection):
+        with connection.cursor() as cursor:
+            names = [cls.FTS_TABLE, *cls.TRIGGERS]
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE name IN (%s)" % ", ".join(["%s"] * len(names)), names
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [name for name in names if name not in existing]
+            if not missing:
+                return False
+
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {cls.FTS_TABLE} USING fts5("
+                    f"{', '.join(cls.COLUMNS)}, "
+                    f"content='gold_loan_customer', content_rowid='id', tokenize='trigram')"
+                )
+            except Exception as e:
+                # SQLite built without FTS5, or older than 3.34 (no trigram tokenizer)
+                logger.warning(f"Customer search index unavailable, falling back to LIKE: {e}")
+                return False
+
+            for sql in cls.TRIGGERS.values():
+                cursor.execute(sql)
+            # Writes made while the triggers were missing are picked up here
+            cursor.execute(f"INSERT INTO {cls.FTS_TABLE}({cls.FTS_TABLE}) VALUES ('rebuild')")
+        logger.info(f"Customer search index installed ({', '.join(missing)})")
+        return True
+
+    @classmethod
+    def _install_postgresql(cls, connection):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)", [list(cls.TRIGRAM_INDEXES)])
+            existing = {row[0] for row in cursor.fetchall()}
+            if len(existing) == len(cls.TRIGRAM_INDEXES):
+                return False
+
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for index_name, column in cls.TRIGRAM_INDEXES.items():
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index_name} ON gold_loan_customer USING gin ({column} gin_trgm_ops)"
+                )
+        return True
+
+    @classmethod
+    def uninstall(cls, connection):
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                for name in cls.TRIGGERS:
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+                cursor.execute(f"DROP TABLE IF EXISTS {cls.FTS_TABLE}")
+            elif connection.vendor == "postgresql":
+                for index_name in cls.TRIGRAM_INDEXES:
+                    cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+        cls._available.pop(connection.alias, None)
+
+    @classmethod
+    def is_available(cls, using=DEFAULT_DB_ALIAS):
+        if using not in cls._available:
+            connection = connections[using]
+            if connection.vendor == "sqlite":
+                cls._available[using] = cls.FTS_TABLE in connection.introspection.table_names()
+            else:
+                cls._available[using] = connection.vendor == "postgresql"
+        return cls._available[using]
+
+    # =========================
+    # SEARCH
+    # =========================
+
+    @staticmethod
+    def _fallback_filter(query):
+        """Short queries: prefix matches (index-friendly for the unique columns)"""
+        return (
+            Q(name__istartswith=query) |
+            Q(mobile_primary__startswith=query) |
+            Q(aadhaar_number__startswith=query) |
+            Q(customer_id__istartswith=query)
+        )
+
+    @staticmethod
+    def _starts_with(field, value):
+        # Index range instead of LIKE, which SQLite cannot serve from a BINARY index
+        return Q(**{f"{field}__gte": value, f"{field}__lt": value + "\U0010ffff"})
+
+    @classmethod
+    def _leading_ids(cls, query, limit, using):
+        """
+        Ids of exact, then prefix, matches (newest first within each), each
+        looked up through a column index rather than the FTS candidates.
+        """
+        from .models import Customer
+
+        customers = Customer.objects.using(using).annotate(name_lower=Lower("name"))
+        lowered, upper = query.lower(), query.upper()
+        tiers = [
+            Q(mobile_primary=query) | Q(aadhaar_number=query) | Q(customer_id=upper) | Q(name_lower=lowered),
+            cls._starts_with("mobile_primary", query) | cls._starts_with("aadhaar_number", query) |
+            cls._starts_with("customer_id", upper) | cls._starts_with("name_lower", lowered),
+        ]
+        ids = []
+        for tier in tiers:
+            for customer_id in customers.filter(tier).order_by("-id").values_list("id", flat=True)[:limit]:
+                if customer_id not in ids:
+                    ids.append(customer_id)
+        return ids[:limit]
+
+    @classmethod
+    def search_ids(cls, query, limit=10, using=DEFAULT_DB_ALIAS):
+        """Ids of the best `limit` customers matching `query` anywhere in the indexed columns, best first"""
+        from .models import Customer
+
+        query = query.strip()
+        if not query:
+            return []
+
+        if len(query) < cls.MIN_QUERY_LENGTH or not cls.is_available(using):
+            if len(query) < cls.MIN_QUERY_LENGTH:
+                filters = cls._fallback_filter(query)
+            else:
+                filters = (
+                    Q(name__icontains=query) |
+                    Q(mobile_primary__icontains=query) |
+                    Q(aadhaar_number__icontains=query) |
+                    Q(customer_id__icontains=query)
+                )
+            return list(Customer.objects.using(using).filter(filters).values_list("id", flat=True)[:limit])
+
+        connection = connections[using]
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                ids = cls._leading_ids(query, limit, using)
+                if len(ids) >= limit:
+                    return ids
+
+                # A quoted phrase matches the query as a substring (case-insensitive)
+                phrase = '"%s"' % query.replace('"', '""')
+                cursor.execute(cls.SQLITE_SEARCH, [
+                    phrase, cls.CANDIDATES, "% " + escaped + "%", limit + len(ids)
+                ])
+                ids += [row[0] for row in cursor.fetchall() if row[0] not in ids]
+                return ids[:limit]
+            else:
+                pattern = "%%%s%%" % escaped
+                cursor.execute(
+                    "SELECT id FROM gold_loan_customer"
+                    " WHERE name ILIKE %s OR mobile_primary LIKE %s OR aadhaar_number LIKE %s OR customer_id ILIKE %s"
+                    " ORDER BY similarity(name, %s) DESC, id DESC LIMIT %s",
+                    [pattern, pattern, pattern, pattern, query, limit]
+                )
+            return [row[0] for row in cursor.fetchall()]
+
+    @classmethod
+    def search(cls, query, limit=10, using=DEFAULT_DB_ALIAS):
+        """Matching Customer objects, best first"""
+        from .models import Customer
+
+        ids = cls.search_ids(query, limit=limit, using=using)
+        customers = Customer.objects.using(using).in_bulk(ids)
+        return [customers[customer_id] for customer_id in ids if customer_id in customers]
+
+
+# =========================
+# IN-PROCESS PREFIX INDEX (typeahead on mobile / Aadhaar / customer ID)
+# =========================
+
+class _PrefixArray:
+    """
+    Sorted fixed-width numeric keys (e.g. 10-digit mobiles as int64) with the
+    customer id of each key alongside, so a digit prefix maps to one
+    contiguous slice found with two binary searches. `key_of` (indexed by
+    customer id, -1 = none) lets a changed or deleted row be found for removal.
+    """
+
+    def __init__(self, width, pairs):
+        self.width = width
+        pairs.sort()
+        self.keys = array("q", (key for key, _ in pairs))
+        self.ids = array("q", (customer_id for _, customer_id in pairs))
+        self.key_of = array("q", [-1]) * (max((customer_id for _, customer_id in pairs), default=0) + 1)
+        for key, customer_id in pairs:
+            self.key_of[customer_id] = key
+
+    def set(self, customer_id, key):
+        if customer_id >= len(self.key_of):
+            self.key_of.extend(array("q", [-1]) * (customer_id + 1 - len(self.key_of)))
+
+        old = self.key_of[customer_id]
+        if old == (key if key is not None else -1):
+            return
+        if old != -1:
+            position = bisect.bisect_left(self.keys, old)
+            while self.ids[position] != customer_id:
+                position += 1
+            del self.keys[position]
+            del self.ids[position]
+        if key is not None:
+            position = bisect.bisect_right(self.keys, key)
+            self.keys.insert(position, key)
+            self.ids.insert(position, customer_id)
+        self.key_of[customer_id] = key if key is not None else -1
+
+    def prefix(self, digits, limit):
+        """Customer ids whose key starts with `digits`, in key order"""
+        if len(digits) > self.width:
+            return []
+        span = 10 ** (self.width - len(digits))
+        low = int(digits) * span if digits else 0
+        start = bisect.bisect_left(self.keys, low)
+        end = bisect.bisect_left(self.keys, low + span)
+        return list(self.ids[start:min(end, start + limit)])
+
+
+class CustomerPrefixIndex:
+    """
+    Per-process index answering the typeahead's digit-prefix queries (mobile,
+    Aadhaar, PGxxxxxx customer ID) in microseconds, without SQL.
+
+    Built in a background thread when a web process serves its first request
+    (warm(), connected in apps.py); until then search() returns None and
+    search_customers uses SQL. It is kept current by Customer post_save /
+    post_delete signals for this process's writes, and by the CustomerChange
+    log for everything else (other workers, bulk_create, update(), raw SQL):
+    at most every CUSTOMER_PREFIX_INDEX_REFRESH seconds the changes past the
+    index's generation (the last change id applied) are read back. Values
+    that do not have the canonical width are not indexed; search_customers
+    falls back to SQL when the index has no answer.
+
+    The log is appended by triggers on SQLite and PostgreSQL (install(), run
+    by migration 0032 and after every migrate); on other backends only by
+    the signal receivers, so bulk writes there are not seen by other workers.
+
+    About 24 bytes per customer per field (three int64 arrays).
+    """
+
+    FIELDS = {
+        # field: (text prefix, digits)
+        "mobile_primary": ("", 10),
+        "aadhaar_number": ("", 12),
+        "customer_id": ("PG", 6),
+    }
+
+    CHANGE_LOG_KEEP = 10000  # Newest log rows kept; a worker further behind rebuilds
+    GAP_TIMEOUT = 60  # Seconds a skipped change id is re-checked (commit order != id order)
+
+    SQLITE_TRIGGERS = {
+        "gold_loan_customer_change_ai": """
+            CREATE TRIGGER IF NOT EXISTS gold_loan_customer_change_ai AFTER INSERT ON gold_loan_customer BEGIN
+                INSERT INTO gold_loan_customerchange(customer_pk) VALUES (new.id);
+            END
+        """,
+        "gold_loan_customer_change_ad": """
+            CREATE TRIGGER IF NOT EXISTS gold_loan_customer_change_ad AFTER DELETE ON gold_loan_customer BEGIN
+                INSERT INTO gold_loan_customerchange(customer_pk) VALUES (old.id);
+            END
+        """,
+        "gold_loan_customer_change_au": """
+            CREATE TRIGGER IF NOT EXISTS gold_loan_customer_change_au
+            AFTER UPDATE OF id, mobile_primary, aadhaar_number, customer_id ON gold_loan_customer
+            WHEN old.id IS NOT new.id OR old.mobile_primary IS NOT new.mobile_primary
+                OR old.aadhaar_number IS NOT new.aadhaar_number OR old.customer_id IS NOT new.customer_id
+            BEGIN
+                INSERT INTO gold_loan_customerchange(customer_pk) VALUES (old.id);
+                INSERT INTO gold_loan_customerchange(customer_pk) SELECT new.id WHERE new.id IS NOT old.id;
+            END
+        """,
+    }
+
+    POSTGRESQL_TRIGGERS = {
+        "gold_loan_customer_change": """
+            CREATE OR REPLACE FUNCTION gold_loan_customer_change() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' THEN
+                    INSERT INTO gold_loan_customerchange(customer_pk) VALUES (OLD.id);
+                END IF;
+                IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR NEW.id <> OLD.id) THEN
+                    INSERT INTO gold_loan_customerchange(customer_pk) VALUES (NEW.id);
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """,
+        "gold_loan_customer_change_aid": """
+            CREATE OR REPLACE TRIGGER gold_loan_customer_change_aid AFTER INSERT OR DELETE ON gold_loan_customer
+            FOR EACH ROW EXECUTE FUNCTION gold_loan_customer_change()
+        """,
+        "gold_loan_customer_change_au": """
+            CREATE OR REPLACE TRIGGER gold_loan_customer_change_au
+            AFTER UPDATE OF id, mobile_primary, aadhaar_number, customer_id ON gold_loan_customer
+            FOR EACH ROW WHEN (
+                (OLD.id, OLD.mobile_primary, OLD.aadhaar_number, OLD.customer_id)
+                IS DISTINCT FROM (NEW.id, NEW.mobile_primary, NEW.aadhaar_number, NEW.customer_id)
+            )
+            EXECUTE FUNCTION gold_loan_customer_change()
+        """,
+    }
+
+    _arrays = None
+    _generation = 0
+    _gaps = {}  # Change id -> when it was first skipped (monotonic)
+    _purged_through = 0
+    _checked_at = 0.0
+    _warm_pid = None
+    _lock = threading.RLock()
+
+    # =========================
+    # INSTALL (change log triggers)
+    # =========================
+
+    @classmethod
+    def install(cls, connection):
+        """Create the change log triggers if missing (idempotent)"""
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                for sql in cls.SQLITE_TRIGGERS.values():
+                    cursor.execute(sql)
+            elif connection.vendor == "postgresql":
+                for sql in cls.POSTGRESQL_TRIGGERS.values():
+                    cursor.execute(sql)
+
+    @classmethod
+    def uninstall(cls, connection):
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                for name in cls.SQLITE_TRIGGERS:
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            elif connection.vendor == "postgresql":
+                cursor.execute("DROP TRIGGER IF EXISTS gold_loan_customer_change_aid ON gold_loan_customer")
+                cursor.execute("DROP TRIGGER IF EXISTS gold_loan_customer_change_au ON gold_loan_customer")
+                cursor.execute("DROP FUNCTION IF EXISTS gold_loan_customer_change()")
+
+    # =========================
+    # BUILD / REFRESH
+    # =========================
+
+    @classmethod
+    def _key(cls, field, value):
+        text_prefix, width = cls.FIELDS[field]
+        if not value or not value.upper().startswith(text_prefix):
+            return None
+        digits = value[len(text_prefix):]
+        if len(digits) != width or not digits.isdigit():
+            return None
+        return int(digits)
+
+    @classmethod
+    def build(cls):
+        """Scan the customer table into a new index (without holding the lock), then swap it in"""
+        from .models import Customer, CustomerChange
+
+        started = time.monotonic()
+        # Read first: changes made during the scan are replayed by _refresh() below
+        generation = CustomerChange.objects.aggregate(generation=Max("id"))["generation"] or 0
+        pairs = {field: [] for field in cls.FIELDS}
+        for row in Customer.objects.values_list("id", *cls.FIELDS).iterator(chunk_size=5000):
+            for field, value in zip(cls.FIELDS, row[1:]):
+                key = cls._key(field, value)
+                if key is not None:
+                    pairs[field].append((key, row[0]))
+        arrays = {field: _PrefixArray(cls.FIELDS[field][1], pairs[field]) for field in cls.FIELDS}
+
+        with cls._lock:
+            cls._arrays = arrays
+            cls._generation = generation
+            cls._gaps = {}
+            cls._refresh()
+        logger.info(f"Customer prefix index built ({len(arrays['mobile_primary'].keys)} customers) "
+                    f"in {time.monotonic() - started:.2f}s")
+
+    @classmethod
+    def warm(cls, **kwargs):
+        """
+        Build this process's index in a background thread if it has not been
+        started yet (connected to request_started). Safe to call often.
+        """
+        if cls._warm_pid == os.getpid():
+            return
+        with cls._lock:
+            if cls._warm_pid == os.getpid():
+                return
+            cls._warm_pid = os.getpid()
+            cls._arrays = None  # A forked copy of the parent's index is not kept current
+        threading.Thread(target=cls._build_in_thread, name="customer-prefix-index", daemon=True).start()
+
+    @classmethod
+    def _build_in_thread(cls):
+        try:
+            cls.build()
+        except Exception:
+            logger.exception("Customer prefix index build failed")
+            with cls._lock:
+                cls._warm_pid = None  # Try again on a later request
+        finally:
+            connections.close_all()
+
+    @classmethod
+    def _refresh(cls):
+        """Apply the customers changed since the index's generation (call with the lock held)"""
+        from .models import Customer, CustomerChange
+
+        cls._checked_at = time.monotonic()
+        now = time.monotonic()
+        cls._gaps = {change_id: since for change_id, since in cls._gaps.items() if now - since < cls.GAP_TIMEOUT}
+
+        changes = CustomerChange.objects.filter(Q(id__gt=cls._generation) | Q(id__in=list(cls._gaps)))
+        rows = list(changes.order_by("id").values_list("id", "customer_pk")[:cls.CHANGE_LOG_KEEP])
+        if len(rows) >= cls.CHANGE_LOG_KEEP or (rows and rows[-1][0] - cls._generation > cls.CHANGE_LOG_KEEP):
+            # Too far behind: the log may already be purged past this generation
+            cls._arrays = None
+            cls._warm_pid = None
+            cls.warm()
+            return
+        if not rows:
+            return
+
+        # Ids skipped over belong to transactions not committed yet (or rolled back)
+        seen = {change_id for change_id, _ in rows}
+        generation = max(cls._generation, rows[-1][0])
+        for change_id in range(cls._generation + 1, generation):
+            if change_id not in seen:
+                cls._gaps.setdefault(change_id, now)
+        for change_id in seen:
+            cls._gaps.pop(change_id, None)
+
+        customer_pks = list({customer_pk for _, customer_pk in rows})
+        for start in range(0, len(customer_pks), 500):
+            chunk = customer_pks[start:start + 500]
+            current = {row[0]: row[1:] for row in Customer.objects.filter(id__in=chunk).values_list("id", *cls.FIELDS)}
+            for customer_pk in chunk:
+                # Gone from the table: deleted
+                cls._apply(customer_pk, dict(zip(cls.FIELDS, current.get(customer_pk, ()))))
+        cls._generation = generation
+
+        if generation - cls.CHANGE_LOG_KEEP > cls._purged_through:
+            cls._purged_through = generation - cls.CHANGE_LOG_KEEP
+            CustomerChange.objects.filter(id__lte=cls._purged_through).delete()
+
+    @classmethod
+    def _apply(cls, customer_id, values):
+        for field, prefix_array in cls._arrays.items():
+            prefix_array.set(customer_id, cls._key(field, values.get(field)))
+
+    # Signal receivers (connected in apps.py). Applied on commit, so a rolled
+    # back write never reaches the index; nothing to do until it is built.
+
+    @classmethod
+    def _apply_on_commit(cls, using, customer_id, values):
+        from .models import CustomerChange
+
+        if connections[using].vendor not in ("sqlite", "postgresql"):
+            # No triggers here; log it for the other workers
+            CustomerChange.objects.using(using).create(customer_pk=customer_id)
+
+        def apply():
+            with cls._lock:
+                if cls._arrays is not None:
+                    cls._apply(customer_id, values)
+        transaction.on_commit(apply, using=using)
+
+    @classmethod
+    def customer_saved(cls, sender, instance, using, **kwargs):
+        cls._apply_on_commit(using, instance.pk, {field: getattr(instance, field) for field in cls.FIELDS})
+
+    @classmethod
+    def customer_deleted(cls, sender, instance, using, **kwargs):
+        cls._apply_on_commit(using, instance.pk, {})
+
+    @classmethod
+    def search_ids(cls, query, limit=10):
+        """
+        Ids of customers whose mobile or Aadhaar starts with `query` (digits),
+        or whose customer ID does (PG...). None if `query` is not such a prefix,
+        or while the index is still being built.
+        """
+        query = query.strip().upper()
+        if query.isdigit():
+            fields = ("mobile_primary", "aadhaar_number")
+            digits = query
+        elif query.startswith("PG") and (len(query) == 2 or query[2:].isdigit()):
+            fields = ("customer_id",)
+            digits = query[2:]
+        else:
+            return None
+
+        if cls._arrays is None:
+            cls.warm()
+            return None
+
+        with cls._lock:
+            if cls._arrays is None:
+                return None
+            if time.monotonic() - cls._checked_at >= getattr(settings, "CUSTOMER_PREFIX_INDEX_REFRESH", 2):
+                cls._refresh()
+                if cls._arrays is None:
+                    return None
+            ids = []
+            for field in fields:
+                for customer_id in cls._arrays[field].prefix(digits, limit):
+                    if customer_id not in ids:
+                        ids.append(customer_id)
+            return ids[:limit]
+
+    @classmethod
+    def search(cls, query, limit=10):
+        """Matching Customer objects (one primary-key query), or None if `query` is not a prefix query"""
+        from .models import Customer
+
+        ids = cls.search_ids(query, limit=limit)
+        if ids is None:
+            return None
+        customers = Customer.objects.in_bulk(ids)
+        return [customers[customer_id] for customer_id in ids if customer_id in customers]
+
+
+# =========================
+# PHONETIC NAME SEARCH (fuzzy mode)
+# =========================
+
+class CustomerPhoneticSearch:
+    """
+    Sounds-like name search for the fuzzy mode of search_customers and
+    customer_list, so Karthik / Karthick / Kaarthik find each other.
+
+    Candidates are looked up by the stored phonetic keys (Customer.name_phonetic,
+    see phonetic.py), reading only its index, in three passes until CANDIDATES
+    are found: names starting with the query's keys in order (an index range),
+    names containing them in order further in, and names whose first word
+    starts with any query key (other word orders). Candidates must match
+    every query word phonetically and are ranked by edit distance to the typed
+    spelling, then newest first.
+    """
+
+    CANDIDATES = 300
+
+    @staticmethod
+    def _starts_with(key):
+        # Index range instead of LIKE, which SQLite cannot serve from a BINARY index;
+        # "~" sorts after the key alphabet (A-Z and space)
+        return Q(name_phonetic__gte=key, name_phonetic__lt=key + "~")
+
+    @classmethod
+    def search_ids(cls, query, limit=10, using=DEFAULT_DB_ALIAS):
+        """Ids of customers whose name sounds like `query`, best first; None if `query` has no name words"""
+        from .models import Customer
+
+        words = [word for word in name_words(query) if phonetic_key(word)]
+        if not words:
+            return None
+        keys = [phonetic_key(word) for word in words]
+        phrase = " ".join(keys)
+
+        # (id, name_phonetic) only, so each pass is served by the name_phonetic index
+        customers = Customer.objects.using(using).values_list("id", "name_phonetic")
+        passes = [
+            customers.filter(cls._starts_with(phrase)).order_by("name_phonetic"),
+            customers.filter(name_phonetic__contains=" " + phrase),
+        ]
+        if len(keys) > 1:
+            passes += [customers.filter(cls._starts_with(key)).order_by("name_phonetic") for key in keys]
+
+        candidates = {}
+        for candidate_pass in passes:
+            for customer_id, name_phonetic in candidate_pass[:cls.CANDIDATES - len(candidates)]:
+                name_keys = name_phonetic.split()
+                if all(any(name_key.startswith(key) for name_key in name_keys) for key in keys):
+                    candidates[customer_id] = None
+            if len(candidates) >= cls.CANDIDATES:
+                break
+
+        distances = {}  # Names repeat a lot; each word pair is scored once
+
+        def distance(word, candidate):
+            if (word, candidate) not in distances:
+                distances[word, candidate] = edit_distance(word, candidate)
+            return distances[word, candidate]
+
+        ranked = []
+        for customer_id, name in Customer.objects.using(using).filter(id__in=candidates).values_list("id", "name"):
+            candidate_words = name_words(name)
+            score = sum(min(distance(word, candidate) for candidate in candidate_words) for word in words)
+            ranked.append((score, -customer_id))
+        ranked.sort()
+        return [-negative_id for _, negative_id in ranked[:limit]]
+
+    @classmethod
+    def search(cls, query, limit=10, using=DEFAULT_DB_ALIAS):
+        """Matching Customer objects, best first; None if `query` has no name words"""
+        from .models import Customer
+
+        ids = cls.search_ids(query, limit=limit, using=using)
+        if ids is None:
+            return None
+        customers = Customer.objects.using(using).in_bulk(ids)
+        return [customers[customer_id] for customer_id in ids if customer_id in customers]
@@ -0,0 +1,436 @@
+import csv
+import gzip
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Customer, Loan, GoldItem, GoldItemBundle, Payment
+from .phonetic import phonetic_keys
+
+logger = logging.getLogger(__name__)
+
+
+class LoanImporter:
+    """
+    Bulk import of legacy ledgers: customers, loans, gold items and payments.
+
+    Input is a stream of rows (CSV or JSON Lines), each with a `record` column
+    naming its type. Loans reference their customer by `mobile_primary` or
+    `aadhaar_number`; items and payments reference their loan by `loan_number`.
+    A loan's `pending_interest` is taken as accrued up to its
+    `last_interest_calculated_at` (default: the time of the import).
+    A row may only reference records from earlier rows or its own batch, and
+    items and payments only attach to loans created by the same import.
+
+    Rows are processed in batches: each batch is validated in memory against
+    dicts preloaded from the database (no per-row queries), then written with one
+    bulk_create per model inside its own transaction. Invalid rows are reported
+    and skipped; the rest of the batch is still imported.
+    """
+
+    RECORD_CUSTOMER = "customer"
+    RECORD_LOAN = "loan"
+    RECORD_ITEM = "item"
+    RECORD_PAYMENT = "payment"
+    RECORD_TYPES = (RECORD_CUSTOMER, RECORD_LOAN, RECORD_ITEM, RECORD_PAYMENT)
+
+    CUSTOMER_FIELDS = (
+        "name", "mobile_primary", "mobile_secondary", "email", "address", "aadhaar_number",
+        "profession", "nominee_name", "nominee_mobile", "customer_id",
+    )
+    LOAN_FIELDS = (
+        "loan_number", "lot_number", "interest_rate", "price_per_gram", "approved_grams",
+        "total_amount", "pending_interest", "status",
+    )
+    ITEM_FIELDS = ("item_name", "carat", "gross_weight", "approved_net_weight", "description")
+    PAYMENT_FIELDS = (
+        "total_amount", "interest_component", "principal_component", "payment_mode",
+        "reference_no", "remarks",
+    )
+
+    # Same lock-in period the loan entry wizard applies
+    INTEREST_LOCK_DAYS = 10
+
+    def __init__(self, batch_size=500, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.imported_at = timezone.now()
+        self.errors = []  # (line, message)
+        self.stats = {
+            "rows": 0,
+            "customers": 0,
+            "matched_customers": 0,
+            "loans": 0,
+            "items": 0,
+            "payments": 0,
+            "batches": 0,
+            "seconds": 0.0,
+        }
+        self._preload()
+
+    # =========================
+    # INPUT
+    # =========================
+
+    @staticmethod
+    def read_rows(path, file_format=None):
+        """
+        Stream (line number, row dict) from a CSV or JSON Lines file; '.gz' files
+        are decompressed on the fly. The format defaults to the file extension.
+        """
+        name = path[:-3] if path.endswith(".gz") else path
+        if file_format is None:
+            file_format = "csv" if name.endswith(".csv") else "jsonl"
+
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8-sig", newline="") as handle:
+            if file_format == "csv":
+                reader = csv.DictReader(handle)
+                for row in reader:
+                    yield reader.line_num, row
+            else:
+                for line_number, line in enumerate(handle, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except ValueError as e:
+                        row = {"record": "", "_error": f"invalid JSON ({e})"}
+                    yield line_number, row if isinstance(row, dict) else {"record": ""}
+
+    # =========================
+    # LOOKUPS
+    # =========================
+
+    def _preload(self):
+        """One pass over existing customers and loan numbers; later lookups are dict hits"""
+        self.customers_by_mobile = {}
+        self.customers_by_aadhaar = {}
+        self.customer_ids = set()
+
+        rows = Customer.objects.values_list("id", "mobile_primary", "aadhaar_number", "customer_id")
+        for pk, mobile, aadhaar, customer_id in rows.iterator(chunk_size=2000):
+            self.customers_by_mobile[mobile] = pk
+            self.customers_by_aadhaar[aadhaar] = pk
+            self.customer_ids.add(customer_id)
+
+        self.existing_loan_numbers = set(Loan.all_objects.values_list("loan_number", flat=True).iterator(chunk_size=2000))
+        self.loans = getattr(self, "loans", {})  # Created by this run: loan_number -> pk
+        self._next_customer_seq = int(Customer.generate_customer_id()[2:])
+
+    @staticmethod
+    def _pk(ref):
+        """Lookup values are primary keys, or unsaved instances during a dry run"""
+        return getattr(ref, "pk", ref)
+
+    def _resolve_customer(self, mobile, aadhaar):
+        """Known customer for the mobile / Aadhaar pair, or None"""
+        by_mobile = self.customers_by_mobile.get(mobile)
+        by_aadhaar = self.customers_by_aadhaar.get(aadhaar)
+        if by_mobile is not None and by_aadhaar is not None and by_mobile != by_aadhaar:
+            raise ValidationError(
+                f"mobile {mobile} and Aadhaar {aadhaar} belong to different customers"
+            )
+        return by_mobile if by_mobile is not None else by_aadhaar
+
+    def _allocate_customer_id(self):
+        """Next free PGXXXXXX id (see Customer.generate_customer_id), without a query per row"""
+        while True:
+            customer_id = f"PG{self._next_customer_seq:06d}"
+            self._next_customer_seq += 1
+            if customer_id not in self.customer_ids:
+                return customer_id
+
+    # =========================
+    # RUN
+    # =========================
+
+    def run(self, rows):
+        """Import an iterable of (line number, row dict). Returns the stats dict."""
+        started = time.monotonic()
+        rows = iter(rows)
+
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+
+            batch_started = time.monotonic()
+            self._import_batch(batch)
+            self.stats["rows"] += len(batch)
+            self.stats["batches"] += 1
+            logger.debug(
+                f"Import batch {self.stats['batches']}: {len(batch)} rows "
+                f"in {time.monotonic() - batch_started:.2f}s"
+            )
+
+        self.stats["seconds"] = time.monotonic() - started
+        return self.stats
+
+    def _import_batch(self, batch):
+        grouped = {record_type: [] for record_type in self.RECORD_TYPES}
+        for line, row in batch:
+            record_type = str(row.get("record") or "").strip().lower()
+            if row.get("_error"):
+                self._error(line, row["_error"])
+            elif record_type not in grouped:
+                self._error(line, f"unknown record type '{record_type}'")
+            else:
+                grouped[record_type].append((line, row))
+
+        counts = {key: self.stats[key] for key in ("customers", "matched_customers", "loans", "items", "payments")}
+        loans = dict(self.loans)
+        try:
+            with transaction.atomic():
+                self._import_customers(grouped[self.RECORD_CUSTOMER])
+                self._import_loans(grouped[self.RECORD_LOAN])
+                self._import_items(grouped[self.RECORD_ITEM])
+                self._import_payments(grouped[self.RECORD_PAYMENT])
+        except DatabaseError as e:
+            # The whole batch was rolled back; reload lookups so they match the database again
+            self.stats.update(counts)
+            self.loans = loans
+            first, last = batch[0][0], batch[-1][0]
+            self._error(first, f"batch (lines {first}-{last}) rolled back: {e}")
+            self._preload()
+
+    def _error(self, line, error):
+        if isinstance(error, ValidationError):
+            if hasattr(error, "error_dict"):
+                error = "; ".join(f"{field}: {' '.join(messages)}" for field, messages in error.message_dict.items())
+            else:
+                error = " ".join(error.messages)
+        self.errors.append((line, str(error)))
+
+    # =========================
+    # RECORDS
+    # =========================
+
+    @staticmethod
+    def _values(row, fields):
+        """Non-empty, stripped values of `fields`; empty cells fall back to model defaults"""
+        values = {}
+        for field in fields:
+            value = row.get(field)
+            if value is None:
+                continue
+            value = str(value).strip()
+            if value:
+                values[field] = value
+        return values
+
+    @staticmethod
+    def _last_anniversary(start, moment):
+        """
+        Latest yearly capitalization date (start + 365 * N days, N >= 1) not after
+        `moment`, or None. Interest up to an accrual point past an anniversary is
+        taken as already capitalized into total_amount.
+        """
+        years = (moment - start).days // 365
+        return start + timedelta(days=365 * years) if years else None
+
+    @staticmethod
+    def _parse_datetime(value):
+        """ISO date or datetime string -> aware datetime"""
+        if not value:
+            return None
+        value = str(value).strip()
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValidationError(f"invalid date '{value}'")
+            parsed = datetime.combine(day, datetime.min.time())
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def _import_customers(self, rows):
+        new_customers = []
+
+        for line, row in rows:
+            data = self._values(row, self.CUSTOMER_FIELDS)
+            try:
+                existing = self._resolve_customer(data.get("mobile_primary"), data.get("aadhaar_number"))
+                if existing is not None:
+                    # Repeat customer: link both keys to the existing record
+                    if data.get("mobile_primary"):
+                        self.customers_by_mobile.setdefault(data["mobile_primary"], existing)
+                    if data.get("aadhaar_number"):
+                        self.customers_by_aadhaar.setdefault(data["aadhaar_number"], existing)
+                    self.stats["matched_customers"] += 1
+                    continue
+
+                customer_id = data.pop("customer_id", None)
+                if customer_id in self.customer_ids:
+                    raise ValidationError(f"customer_id {customer_id} already exists")
+
+                customer = Customer(**data)
+                customer.full_clean(exclude=["customer_id", "photo"], validate_unique=False)
+                customer.customer_id = customer_id or self._allocate_customer_id()
+                customer.name_phonetic = phonetic_keys(customer.name)  # bulk_create skips save()
+            except ValidationError as e:
+                self._error(line, e)
+                continue
+
+            self.customers_by_mobile[customer.mobile_primary] = customer
+            self.customers_by_aadhaar[customer.aadhaar_number] = customer
+            self.customer_ids.add(customer.customer_id)
+            new_customers.append(customer)
+
+        if not self.dry_run and new_customers:
+            Customer.objects.bulk_create(new_customers)
+            for customer in new_customers:
+                self.customers_by_mobile[customer.mobile_primary] = customer.pk
+                self.customers_by_aadhaar[customer.aadhaar_number] = customer.pk
+        self.stats["customers"] += len(new_customers)
+
+    def _import_loans(self, rows):
+        new_loans = []
+
+        for line, row in rows:
+            data = self._values(row, self.LOAN_FIELDS)
+            try:
+                loan_number = data.get("loan_number")
+                if not loan_number:
+                    raise ValidationError("loan_number is required")
+                if loan_number in self.existing_loan_numbers or loan_number in self.loans:
+                    raise ValidationError(f"loan {loan_number} already exists")
+
+                customer = self._resolve_customer(
+                    str(row.get("mobile_primary") or "").strip(),
+                    str(row.get("aadhaar_number") or "").strip(),
+                )
+                if customer is None:
+                    raise ValidationError("unknown customer (import the customer row first)")
+
+                start = self._parse_datetime(row.get("loan_start_date"))
+                if start is None:
+                    raise ValidationError("loan_start_date is required")
+                closed_at = self._parse_datetime(row.get("closed_at"))
+                data.setdefault("status", Loan.STATUS_CLOSED if closed_at else Loan.STATUS_ACTIVE)
+                if data["status"] not in (Loan.STATUS_ACTIVE, Loan.STATUS_CLOSED):
+                    raise ValidationError(f"status must be '{Loan.STATUS_ACTIVE}' or '{Loan.STATUS_CLOSED}'")
+
+                # An imported pending_interest is the ledger's balance at the accrual
+                # point; interest accrues from there (from the import, unless given)
+                last_calculated_at = self._parse_datetime(row.get("last_interest_calculated_at"))
+                if last_calculated_at is None:
+                    last_calculated_at = self.imported_at if "pending_interest" in data else start
+                if last_calculated_at < start:
+                    raise ValidationError("last_interest_calculated_at is before loan_start_date")
+                last_capitalization_date = self._parse_datetime(row.get("last_capitalization_date"))
+                if last_capitalization_date is None:
+                    last_capitalization_date = self._last_anniversary(start, last_calculated_at)
+
+                loan = Loan(
+                    customer_id=self._pk(customer),
+                    loan_start_date=start,
+                    interest_lock_until=start + timedelta(days=self.INTEREST_LOCK_DAYS),
+                    last_interest_calculated_at=last_calculated_at,
+                    last_capitalization_date=last_capitalization_date,
+                    closed_at=closed_at,
+                    **data
+                )
+                loan.full_clean(exclude=["customer", "parent_loan"], validate_unique=False)
+                if "total_amount" not in data:
+                    loan.total_amount = loan.approved_grams * loan.price_per_gram
+            except ValidationError as e:
+                self._error(line, e)
+                continue
+
+            self.loans[loan_number] = loan
+            new_loans.append(loan)
+
+        if not self.dry_run and new_loans:
+            Loan.objects.bulk_create(new_loans)
+            # created_at is auto_now_add; keep the ledger's own start date instead
+            for loan in new_loans:
+                loan.created_at = loan.loan_start_date
+                self.loans[loan.loan_number] = loan.pk
+            Loan.objects.bulk_update(new_loans, ["created_at"])
+        self.stats["loans"] += len(new_loans)
+
+    def _loan_for(self, row):
+        loan_number = str(row.get("loan_number") or "").strip()
+        loan = self.loans.get(loan_number)
+        if loan is None:
+            if loan_number in self.existing_loan_numbers:
+                # Keeps a re-run from attaching the same items and payments twice
+                raise ValidationError(f"loan {loan_number} was not created by this import")
+            raise ValidationError(f"unknown loan '{loan_number}' (import the loan row first)")
+        return loan
+
+    def _import_items(self, rows):
+        new_items = []
+        item_counts = []
+
+        for line, row in rows:
+            data = self._values(row, self.ITEM_FIELDS)
+            try:
+                loan = self._loan_for(row)
+                item = GoldItem(loan_id=self._pk(loan), **data)
+                item.full_clean(exclude=["loan"], validate_unique=False)
+                if item.approved_net_weight > item.gross_weight:
+                    raise ValidationError("approved_net_weight cannot exceed gross_weight")
+
+                item_count = int(str(row.get("item_count") or 1).strip())
+                if item_count < 1:
+                    raise ValidationError("item_count must be at least 1")
+            except (ValidationError, ValueError) as e:
+                self._error(line, e)
+                continue
+
+            new_items.append(item)
+            item_counts.append(item_count)
+
+        if not self.dry_run and new_items:
+            GoldItem.objects.bulk_create(new_items)
+            GoldItemBundle.objects.bulk_create([
+                GoldItemBundle(gold_item=item, item_count=count)
+                for item, count in zip(new_items, item_counts)
+            ])
+        self.stats["items"] += len(new_items)
+
+    def _import_payments(self, rows):
+        new_payments = []
+        payment_dates = []
+
+        for line, row in rows:
+            data = self._values(row, self.PAYMENT_FIELDS)
+            try:
+                loan = self._loan_for(row)
+                paid_at = self._parse_datetime(row.get("payment_date"))
+                if paid_at is None:
+                    raise ValidationError("payment_date is required")
+
+                data.setdefault("payment_mode", Payment.PAYMENT_MODE_CASH)
+                data.setdefault("interest_component", "0")
+                payment = Payment(loan_id=self._pk(loan), **data)
+                if "principal_component" not in data:
+                    payment.principal_component = 0  # Filled in once the amounts are parsed
+                payment.full_clean(exclude=["loan"], validate_unique=False)
+                if "principal_component" not in data:
+                    payment.principal_component = payment.total_amount - payment.interest_component
+            except ValidationError as e:
+                self._error(line, e)
+                continue
+
+            new_payments.append(payment)
+            payment_dates.append(paid_at)
+
+        if not self.dry_run and new_payments:
+            Payment.objects.bulk_create(new_payments)
+            # payment_date / created_at are auto_now_add; restore the ledger dates
+            for payment, paid_at in zip(new_payments, payment_dates):
+                payment.payment_date = timezone.localdate(paid_at)
+                payment.created_at = paid_at
+            Payment.objects.bulk_update(new_payments, ["payment_date", "created_at"])
+        self.stats["payments"] += len(new_payments)
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gold_loan.media_service import MediaService
+
+
+class Command(BaseCommand):
+    help = "Remove media files no longer referenced by any loan, customer or upload (abandoned wizard uploads, deleted documents)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ttl-hours", type=float, default=getattr(settings, "MEDIA_GC_TTL_HOURS", 24),
+            help="Only touch files not modified for this many hours (default: MEDIA_GC_TTL_HOURS).",
+        )
+        parser.add_argument("--quarantine", action="store_true", help="Move orphans to media/quarantine/ instead of deleting.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be removed without touching files.")
+
+    def handle(self, *args, **options):
+        stats = MediaService.collect_orphans(
+            ttl_seconds=options["ttl_hours"] * 3600,
+            quarantine=options["quarantine"],
+            dry_run=options["dry_run"],
+        )
+
+        action = "Would remove" if options["dry_run"] else ("Quarantined" if options["quarantine"] else "Removed")
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {stats['scanned']} files. {action} {stats['orphaned']} orphaned files, "
+            f"{stats['reclaimed_bytes'] / (1024 * 1024):.2f} MB ({stats['reclaimed_bytes']} bytes)."
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gold_loan.loan_import import LoanImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Import legacy ledgers (customers, loans, gold items and payments) from a CSV or "
+        "JSON Lines file. Every row has a 'record' column: customer, loan, item or payment."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON Lines file (optionally .gz).")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format (default: from the file extension).")
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows validated and written per transaction (default: 500).")
+        parser.add_argument("--dry-run", action="store_true", help="Validate every row without writing anything.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        importer = LoanImporter(batch_size=options["batch_size"], dry_run=options["dry_run"])
+        try:
+            stats = importer.run(LoanImporter.read_rows(options["path"], options["format"]))
+        except OSError as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        for line, message in importer.errors:
+            self.stderr.write(f"Line {line}: {message}")
+
+        seconds = stats["seconds"] or 1e-9
+        action = "Validated (dry run)" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {stats['rows']} rows in {stats['batches']} batches, {stats['seconds']:.2f}s "
+            f"({stats['rows'] / seconds:.0f} rows/s): {stats['customers']} customers "
+            f"({stats['matched_customers']} matched existing), {stats['loans']} loans, "
+            f"{stats['items']} items, {stats['payments']} payments. {len(importer.errors)} rows rejected."
+        ))
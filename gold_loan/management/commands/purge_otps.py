@@ -0,0 +1,51 @@
+import gzip
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from gold_loan.otp_models import OTPRecord
+
+
+class Command(BaseCommand):
+    help = "Expire stale OTPs and delete (optionally archive) spent OTP records past the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=getattr(settings, "OTP_RETENTION_DAYS", 90),
+            help="Keep spent records for this many days (default: OTP_RETENTION_DAYS).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Records deleted per transaction (default: 1000).")
+        parser.add_argument("--archive", help="Append purged records to this gzipped NDJSON file before deleting them.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many records would be purged.")
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["days"])
+
+        if options["dry_run"]:
+            count = OTPRecord.purgeable(before).count()
+            self.stdout.write(self.style.SUCCESS(f"Would purge {count} OTP records created before {before:%Y-%m-%d %H:%M}."))
+            return
+
+        expired = OTPRecord.expire_stale()
+
+        archive_file = gzip.open(options["archive"], "at", encoding="utf-8") if options["archive"] else None
+        try:
+            def archive(rows):
+                for row in rows:
+                    archive_file.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+
+            deleted = OTPRecord.purge(
+                before, batch_size=options["batch_size"], archive=archive if archive_file else None
+            )
+        finally:
+            if archive_file:
+                archive_file.close()
+
+        archived = f", archived to {options['archive']}" if archive_file else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"Expired {expired} stale OTPs. Purged {deleted} OTP records created before {before:%Y-%m-%d %H:%M}{archived}."
+        ))
@@ -0,0 +1,58 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from gold_loan.media_service import MediaService
+from gold_loan.media_worker import MediaWorker
+
+
+class Command(BaseCommand):
+    help = "Process queued media tasks (thumbnails, deferred image normalization) in a separate process."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit instead of polling.")
+        parser.add_argument("--threads", type=int, default=2, help="Worker threads (default: 2).")
+        parser.add_argument("--batch", type=int, default=50, help="Tasks fetched per poll (default: 50).")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls when idle (default: 5).")
+        parser.add_argument(
+            "--gc-interval", type=float, default=0,
+            help="Also remove orphaned media every N hours (see cleanup_media). 0 disables (default).",
+        )
+
+    def handle(self, *args, **options):
+        threads = max(1, options["threads"])
+        done = failed = 0
+        gc_every = options["gc_interval"] * 3600
+        next_gc = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="media-worker") as executor:
+            while True:
+                close_old_connections()
+
+                if gc_every and time.monotonic() >= next_gc:
+                    MediaService.collect_orphans(ttl_seconds=getattr(settings, "MEDIA_GC_TTL_HOURS", 24) * 3600)
+                    next_gc = time.monotonic() + gc_every
+                task_ids = MediaWorker.pending_task_ids(options["batch"])
+
+                if task_ids:
+                    for ok in executor.map(self._run, task_ids):
+                        if ok:
+                            done += 1
+                        else:
+                            failed += 1
+                    continue
+
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Media worker finished: {done} done, {failed} not completed"))
+
+    @staticmethod
+    def _run(task_id):
+        try:
+            return MediaWorker.run_task(task_id)
+        finally:
+            close_old_connections()
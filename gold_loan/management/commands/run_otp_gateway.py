@@ -0,0 +1,101 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the SMS/Verify gateway (used with "
+        "OTP_BACKEND = 'gold_loan.otp_backends.HTTPGatewayBackend') for offline load tests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--addr", default="127.0.0.1", help="Address to bind (default: 127.0.0.1).")
+        parser.add_argument("--port", type=int, default=8025, help="Port to listen on (default: 8025).")
+        parser.add_argument("--latency-ms", type=float, default=200, help="Mean delay added to every call (default: 200).")
+        parser.add_argument("--jitter-ms", type=float, default=50, help="Random +/- spread around the latency (default: 50).")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of calls answered with 503 (0-1).")
+        parser.add_argument("--code", default=getattr(settings, "OTP_LOCAL_CODE", "123456"), help="Code every OTP is approved with.")
+        parser.add_argument("--seed", type=int, help="Seed the random generator for repeatable runs.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        rng_lock = threading.Lock()
+        pending = set()
+        stats = {"send": 0, "check": 0, "approved": 0, "failed": 0}
+        stats_lock = threading.Lock()
+
+        def simulate():
+            """Sleep for the configured latency; True if this call should fail"""
+            with rng_lock:
+                delay = max(0.0, options["latency_ms"] + rng.uniform(-options["jitter_ms"], options["jitter_ms"]))
+                fail = rng.random() < options["failure_rate"]
+            time.sleep(delay / 1000)
+            return fail
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real gateway
+            disable_nagle_algorithm = True  # Headers and body are written separately
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    data = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return self._reply(400, {"error": "Invalid JSON"})
+
+                action = self.path.rstrip("/").rsplit("/", 1)[-1]
+                if action not in ("send", "check") or not data.get("to"):
+                    return self._reply(404, {"error": "Unknown endpoint"})
+
+                with stats_lock:
+                    stats[action] += 1
+                if simulate():
+                    with stats_lock:
+                        stats["failed"] += 1
+                    return self._reply(503, {"error": "Simulated gateway failure"})
+
+                if action == "send":
+                    pending.add(data["to"])
+                    return self._reply(200, {"status": "pending"})
+
+                if data["to"] in pending and str(data.get("code")) == options["code"]:
+                    pending.discard(data["to"])
+                    with stats_lock:
+                        stats["approved"] += 1
+                    return self._reply(200, {"status": "approved"})
+                return self._reply(200, {"status": "pending"})
+
+            def log_message(self, format, *args):
+                pass  # Quiet under load; totals are printed on exit
+
+        server = ThreadingHTTPServer((options["addr"], options["port"]), Handler)
+        server.daemon_threads = True
+        self.stdout.write(
+            f"Fake OTP gateway on http://{options['addr']}:{options['port']} "
+            f"(latency {options['latency_ms']:.0f}±{options['jitter_ms']:.0f} ms, "
+            f"failure rate {options['failure_rate']:.0%}, code {options['code']}). Ctrl-C to stop."
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(self.style.SUCCESS(
+                f"Handled {stats['send']} sends and {stats['check']} checks: "
+                f"{stats['approved']} approved, {stats['failed']} failed."
+            ))
@@ -0,0 +1,489 @@
+import io
+import os
+import re
+import uuid
+import hashlib
+import logging
+import posixpath
+import shutil
+import time
+from datetime import datetime
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+# Staged files are named <sha256 hex><ext>
+CONTENT_NAME_RE = re.compile(r'^[0-9a-f]{64}(\.[a-z0-9]+)?$')
+
+
+class MediaService:
+    """
+    Staging area for uploads made during loan entry.
+
+    Uploads are written to disk exactly once, under a content-hash name, in
+    one of the temp_* staging directories. When the loan is approved each
+    staged file is promoted into its model field's `upload_to` directory with
+    a hard link, so approval never re-reads or re-copies image bytes (on
+    filesystems without hard links it falls back to a copy).
+    """
+
+    STAGING_CUSTOMERS = "temp_customers"
+    STAGING_ITEMS = "temp_items"
+    STAGING_DOCUMENTS = "temp_documents"
+
+    STAGING_DIRS = (STAGING_CUSTOMERS, STAGING_ITEMS, STAGING_DOCUMENTS)
+
+    # Partial files of resumable uploads (not promotable until completed)
+    CHUNK_DIR = "temp_uploads"
+
+    HASH_BLOCK_SIZE = 1024 * 1024
+
+    # Derived renditions (longest side in px), cached under derivatives/<rendition>/
+    RENDITION_THUMB = "thumb"
+    RENDITION_PREVIEW = "preview"
+    RENDITIONS = {
+        RENDITION_THUMB: 160,
+        RENDITION_PREVIEW: 640,
+    }
+    DERIVATIVE_DIR = "derivatives"
+    DERIVATIVE_QUALITY = 80
+    RASTER_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff")
+
+    # What Pillow raises for files it cannot (or will not) decode
+    DECODE_ERRORS = (OSError, ValueError, SyntaxError, Image.DecompressionBombError)
+
+    # Orphaned files are moved here by collect_orphans(quarantine=True)
+    QUARANTINE_DIR = "quarantine"
+
+    @staticmethod
+    def absolute_path(name):
+        """Filesystem path of a media-relative name"""
+        return os.path.join(settings.MEDIA_ROOT, *name.split("/"))
+
+    @staticmethod
+    def is_staged(name):
+        return bool(name) and name.split("/", 1)[0] in MediaService.STAGING_DIRS
+
+    @staticmethod
+    def _extension(filename):
+        extension = os.path.splitext(filename or "")[1].lower()
+        return extension if re.match(r'^\.[a-z0-9]{1,8}$', extension) else ""
+
+    @staticmethod
+    def _publish(partial_path, digest, extension, staging_dir):
+        """Rename a fully written temp file to its content-hash name in `staging_dir`"""
+        directory = os.path.join(settings.MEDIA_ROOT, staging_dir)
+        os.makedirs(directory, exist_ok=True)
+
+        name = f"{staging_dir}/{digest.hexdigest()}{extension}"
+        # Same name means same bytes, so replacing an existing copy is harmless
+        os.replace(partial_path, MediaService.absolute_path(name))
+        return name
+
+    # -------------------------
+    # Ingest normalization
+    # -------------------------
+
+    @staticmethod
+    def ingest_upload(uploaded_file):
+        """
+        Normalize an uploaded image before it is stored: apply EXIF orientation,
+        cap the longest side, re-encode (JPEG, or PNG when there is transparency)
+        and drop EXIF/GPS metadata. Non-images, undecodable files and files the
+        re-encode would not make smaller pass through unchanged.
+
+        Returns:
+            tuple: (file to store, bytes saved)
+        """
+        if not MediaService.has_derivatives(uploaded_file.name):
+            return uploaded_file, 0
+
+        max_dimension = getattr(settings, "MEDIA_INGEST_MAX_DIMENSION", 2048)
+        quality = getattr(settings, "MEDIA_INGEST_JPEG_QUALITY", 82)
+        original_size = uploaded_file.size
+
+        try:
+            uploaded_file.seek(0)
+            with Image.open(uploaded_file) as image:
+                # JPEG: let the decoder downscale by a power of two while reading
+                image.draft("RGB", (max_dimension, max_dimension))
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((max_dimension, max_dimension))
+
+                icc_profile = image.info.get("icc_profile")
+                has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+                image = image.convert("RGBA" if has_alpha else "RGB")
+                image.info.clear()  # Nothing from the source (EXIF, XMP, comments) is written back
+
+                buffer = io.BytesIO()
+                if has_alpha:
+                    image.save(buffer, format="PNG", optimize=True, icc_profile=icc_profile)
+                    extension = ".png"
+                else:
+                    image.save(buffer, format="JPEG", quality=quality, optimize=True,
+                               progressive=True, icc_profile=icc_profile)
+                    extension = ".jpg"
+        except MediaService.DECODE_ERRORS as e:
+            logger.warning(f"Ingest skipped for {uploaded_file.name}: {e}")
+            uploaded_file.seek(0)
+            return uploaded_file, 0
+
+        if buffer.tell() >= original_size:
+            # Already compact (e.g. a small, well-compressed PNG); re-encoding would grow it
+            logger.info(f"Ingest kept {uploaded_file.name}: {original_size} bytes, re-encoded {buffer.tell()}")
+            uploaded_file.seek(0)
+            return uploaded_file, 0
+
+        base_name = os.path.splitext(os.path.basename(uploaded_file.name))[0]
+        normalized = ContentFile(buffer.getvalue(), name=f"{base_name}{extension}")
+        saved = original_size - normalized.size
+
+        logger.info(
+            f"Ingested {uploaded_file.name}: {original_size} -> {normalized.size} bytes "
+            f"({saved} saved, {image.width}x{image.height})"
+        )
+        return normalized, saved
+
+    @staticmethod
+    def stage_upload(uploaded_file, staging_dir):
+        """
+        Normalize an uploaded file and write it into `staging_dir`, hashing it
+        while it is written.
+
+        Returns:
+            str: media-relative name, e.g. 'temp_items/<sha256>.jpg'
+        """
+        uploaded_file, _ = MediaService.ingest_upload(uploaded_file)
+        return MediaService._write_staged(uploaded_file, staging_dir)
+
+    @staticmethod
+    def _write_staged(uploaded_file, staging_dir):
+        directory = os.path.join(settings.MEDIA_ROOT, staging_dir)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write under a private name first so readers never see a partial file
+        partial_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        try:
+            with open(partial_path, "wb") as destination:
+                for chunk in uploaded_file.chunks():
+                    digest.update(chunk)
+                    destination.write(chunk)
+
+            return MediaService._publish(
+                partial_path, digest, MediaService._extension(uploaded_file.name), staging_dir
+            )
+        except OSError:
+            MediaService._remove_quietly(partial_path)
+            raise
+
+    # -------------------------
+    # Resumable (chunked) uploads
+    # -------------------------
+
+    @staticmethod
+    def chunk_path(upload_id):
+        """Partial file for a chunked upload"""
+        return os.path.join(settings.MEDIA_ROOT, MediaService.CHUNK_DIR, f"{upload_id}.part")
+
+    @staticmethod
+    def write_chunk(upload_id, offset, data):
+        """
+        Write `data` at `offset` of the upload's partial file and drop anything after it,
+        so a chunk retried after a lost response never leaves stray bytes behind.
+        """
+        path = MediaService.chunk_path(upload_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, "r+b" if os.path.exists(path) else "wb") as destination:
+            destination.seek(offset)
+            destination.write(data)
+            destination.truncate()
+
+    @staticmethod
+    def complete_chunked_upload(upload_id, filename, staging_dir):
+        """
+        Normalize the assembled partial file and move it into `staging_dir`.
+
+        Returns:
+            tuple: (staged name, same format as stage_upload(); bytes saved by ingest)
+        """
+        path = MediaService.chunk_path(upload_id)
+
+        with open(path, "rb") as source:
+            normalized, saved = MediaService.ingest_upload(File(source, name=filename))
+
+        if isinstance(normalized, ContentFile):
+            name = MediaService._write_staged(normalized, staging_dir)
+            MediaService._remove_quietly(path)
+            return name, saved
+
+        # Not an image (e.g. PDF), or smaller than its re-encode: publish the received bytes as they are
+        digest = hashlib.sha256()
+        with open(path, "rb") as source:
+            for block in iter(lambda: source.read(MediaService.HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+
+        return MediaService._publish(path, digest, MediaService._extension(filename), staging_dir), 0
+
+    @staticmethod
+    def discard_chunked_upload(upload_id):
+        MediaService._remove_quietly(MediaService.chunk_path(upload_id))
+
+    @staticmethod
+    def _remove_quietly(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def promote(staged_name, field):
+        """
+        Move a staged file into `field`'s upload_to directory without copying bytes.
+        The staged copy is removed once the surrounding transaction commits, so it
+        is still there for a retry if the transaction rolls back.
+
+        Args:
+            staged_name (str): name returned by stage_upload()
+            field (FileField): model field the file will belong to
+
+        Returns:
+            str: final media-relative name to assign to the field
+        """
+        if not MediaService.is_staged(staged_name):
+            return staged_name  # Already in its final location
+
+        basename = posixpath.basename(staged_name)
+        final_name = field.generate_filename(None, basename)
+        staged_path = MediaService.absolute_path(staged_name)
+        final_path = MediaService.absolute_path(final_name)
+
+        if os.path.exists(final_path) and not CONTENT_NAME_RE.match(basename):
+            # Legacy (non content-addressed) name that clashes with another file
+            final_name = default_storage.get_available_name(final_name)
+            final_path = MediaService.absolute_path(final_name)
+
+        if not os.path.exists(final_path):
+            if not os.path.exists(staged_path):
+                logger.warning(f"Staged file missing, cannot promote: {staged_name}")
+                return staged_name
+
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            try:
+                os.link(staged_path, final_path)
+            except FileExistsError:
+                pass  # Promoted concurrently; content hash names match
+            except OSError:
+                # Filesystem without hard links: copy (a rename would take the
+                # staged file away from a rolled-back approval), published atomically
+                partial_path = f"{final_path}.{uuid.uuid4().hex}.part"
+                try:
+                    shutil.copyfile(staged_path, partial_path)
+                    os.replace(partial_path, final_path)
+                except OSError:
+                    MediaService._remove_quietly(partial_path)
+                    raise
+
+        transaction.on_commit(lambda: MediaService.discard_staged(staged_name))
+        return final_name
+
+    @staticmethod
+    def discard_staged(staged_name):
+        """Delete a staged file; missing files are ignored"""
+        if not MediaService.is_staged(staged_name):
+            return
+        try:
+            os.remove(MediaService.absolute_path(staged_name))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove staged file {staged_name}: {e}")
+
+    # -------------------------
+    # Derivatives (thumbnails / previews)
+    # -------------------------
+
+    @staticmethod
+    def derivative_format():
+        """WebP when Pillow was built with it, JPEG otherwise"""
+        return ("WEBP", ".webp") if features.check("webp") else ("JPEG", ".jpg")
+
+    @staticmethod
+    def has_derivatives(name):
+        return bool(name) and name.lower().endswith(MediaService.RASTER_EXTENSIONS)
+
+    @staticmethod
+    def derivative_name(name, rendition):
+        """e.g. derivatives/thumb/gold_items/images/<sha256>.jpg.webp"""
+        return f"{MediaService.DERIVATIVE_DIR}/{rendition}/{name}{MediaService.derivative_format()[1]}"
+
+    @staticmethod
+    def get_or_create_derivative(name, rendition):
+        """
+        Path of the `rendition` of media file `name`, generated on first use and
+        regenerated only when the source is newer than the cached copy.
+
+        Raises:
+            FileNotFoundError: source file is missing
+            DECODE_ERRORS: source is not a readable image, or is too large to decode
+        """
+        source_path = MediaService.absolute_path(name)
+        target_path = MediaService.absolute_path(MediaService.derivative_name(name, rendition))
+
+        source_mtime = os.stat(source_path).st_mtime
+        try:
+            if os.stat(target_path).st_mtime >= source_mtime:
+                return target_path
+        except FileNotFoundError:
+            pass
+
+        size = MediaService.RENDITIONS[rendition]
+        image_format, _ = MediaService.derivative_format()
+
+        with Image.open(source_path) as image:
+            # thumbnail() lets the JPEG decoder downscale while reading
+            image.thumbnail((size, size))
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA") or (image_format == "JPEG" and image.mode == "RGBA"):
+                image = image.convert("RGB")
+
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            partial_path = f"{target_path}.{uuid.uuid4().hex}.part"
+            try:
+                image.save(partial_path, format=image_format, quality=MediaService.DERIVATIVE_QUALITY)
+                # Concurrent first requests each write their own file; last rename wins
+                os.replace(partial_path, target_path)
+            except OSError:
+                MediaService._remove_quietly(partial_path)
+                raise
+
+        return target_path
+
+    # -------------------------
+    # Orphan collection
+    # -------------------------
+
+    @staticmethod
+    def referenced_names():
+        """
+        Every media name still referenced by the database, fetched with one
+        UNION query: file fields, completed background uploads and the
+        new-customer photo held in draft loans.
+        """
+        from django.db.models.fields.json import KT
+        from .models import Customer, Loan, GoldItemImage, LoanDocument, ChunkedUpload
+
+        names = Customer.objects.exclude(photo="").order_by().values_list("photo", flat=True).union(
+            GoldItemImage.objects.order_by().values_list("image", flat=True),
+            LoanDocument.objects.exclude(image="").order_by().values_list("image", flat=True),
+            ChunkedUpload.objects.exclude(staged_name="").order_by().values_list("staged_name", flat=True),
+            Loan.drafts.annotate(draft_photo=KT("draft_customer_data__photo"))
+                .filter(draft_photo__isnull=False).order_by().values_list("draft_photo", flat=True),
+            all=True,
+        )
+        return set(names)
+
+    @staticmethod
+    def reference_count(name):
+        """Number of rows whose photo / image field points at media file `name` (one query)"""
+        from .models import Customer, GoldItemImage, LoanDocument
+
+        rows = Customer.objects.filter(photo=name).order_by().values_list("id", flat=True).union(
+            GoldItemImage.objects.filter(image=name).order_by().values_list("id", flat=True),
+            LoanDocument.objects.filter(image=name).order_by().values_list("id", flat=True),
+            all=True,
+        )
+        return len(rows)
+
+    @staticmethod
+    def _scan_files(directory):
+        """Yield DirEntry objects for every file below `directory`, one directory at a time"""
+        pending = [directory]
+        while pending:
+            try:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry
+            except FileNotFoundError:
+                continue
+
+    @staticmethod
+    def orphan_scan_dirs():
+        """Media directories the collector looks at (media-relative)"""
+        from .models import Customer, GoldItemImage, LoanDocument
+
+        upload_dirs = [
+            model._meta.get_field(field).upload_to.rstrip("/")
+            for model, field in ((Customer, "photo"), (GoldItemImage, "image"), (LoanDocument, "image"))
+        ]
+        return list(MediaService.STAGING_DIRS) + [MediaService.CHUNK_DIR, MediaService.DERIVATIVE_DIR] + upload_dirs
+
+    @staticmethod
+    def collect_orphans(ttl_seconds, quarantine=False, dry_run=False):
+        """
+        Delete (or move to QUARANTINE_DIR) media files that nothing references
+        and that have not been modified for `ttl_seconds`.
+
+        - Staged and uploaded files: orphaned unless referenced by the DB.
+        - Chunk partials: orphaned once idle for the TTL (appends touch them).
+        - Derivatives: orphaned when their source file is no longer referenced.
+
+        Returns:
+            dict: scanned, orphaned, reclaimed_bytes (hard-linked copies free no space)
+        """
+        referenced = MediaService.referenced_names()
+        cutoff = time.time() - ttl_seconds
+        media_root = str(settings.MEDIA_ROOT)
+        quarantine_root = os.path.join(
+            media_root, MediaService.QUARANTINE_DIR, datetime.now().strftime("%Y%m%d-%H%M%S")
+        )
+        derivative_prefix = f"{MediaService.DERIVATIVE_DIR}/"
+
+        stats = {"scanned": 0, "orphaned": 0, "reclaimed_bytes": 0}
+
+        for directory in MediaService.orphan_scan_dirs():
+            for entry in MediaService._scan_files(os.path.join(media_root, directory)):
+                stats["scanned"] += 1
+                info = entry.stat(follow_symlinks=False)
+                if info.st_mtime > cutoff:
+                    continue
+
+                name = os.path.relpath(entry.path, media_root).replace(os.sep, "/")
+                if name.startswith(derivative_prefix):
+                    # derivatives/<rendition>/<source name><ext>
+                    source = os.path.splitext(name.split("/", 2)[-1])[0]
+                    if source in referenced:
+                        continue
+                elif directory != MediaService.CHUNK_DIR and name in referenced:
+                    continue
+
+                stats["orphaned"] += 1
+                if info.st_nlink == 1:
+                    stats["reclaimed_bytes"] += info.st_size
+
+                if dry_run:
+                    continue
+                try:
+                    if quarantine:
+                        target = os.path.join(quarantine_root, *name.split("/"))
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        os.replace(entry.path, target)
+                    else:
+                        os.remove(entry.path)
+                except OSError as e:
+                    logger.warning(f"Could not remove orphaned file {name}: {e}")
+
+        logger.info(
+            f"Media GC: scanned {stats['scanned']}, orphaned {stats['orphaned']}, "
+            f"reclaimed {stats['reclaimed_bytes']} bytes{' (dry run)' if dry_run else ''}"
+        )
+        return stats
@@ -0,0 +1,239 @@
+import os
+import logging
+import posixpath
+import time
+import threading
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .media_service import MediaService
+from .models import MediaTask
+
+logger = logging.getLogger(__name__)
+
+
+class MediaWorker:
+    """
+    Runs MediaTask rows after the request's transaction commits.
+
+    Tasks are persisted first, then handed to a small bounded thread pool in
+    the web process. Tasks that do not get a slot (pool saturated), failed
+    attempts re-queued as pending, stale running tasks and leftovers from a
+    restart are picked up by a sweeper thread in each web process every
+    MEDIA_WORKER_SWEEP_INTERVAL seconds (started on the first request, see
+    apps.py). With MEDIA_WORKER_IN_PROCESS = False web processes only queue
+    tasks and `manage.py run_media_worker` must run them.
+    """
+
+    # A task still 'running' after this long is assumed lost (process died)
+    STALE_AFTER = timedelta(minutes=10)
+
+    _executor = None
+    _executor_pid = None
+    _slots = None
+    _queued = set()  # Ids handed to this process's pool and not finished yet
+    _sweeper_pid = None
+    _lock = threading.Lock()
+
+    # -------------------------
+    # Queueing
+    # -------------------------
+
+    @staticmethod
+    def enqueue(task_type, instances, field_name):
+        """
+        Queue `task_type` for `field_name` of each saved model instance.
+        Call inside the request's transaction; work starts only after commit.
+        """
+        tasks = MediaTask.objects.bulk_create([
+            MediaTask(
+                task_type=task_type,
+                model_label=instance._meta.label,
+                object_id=instance.pk,
+                field_name=field_name,
+            )
+            for instance in instances
+            if getattr(instance, field_name)
+        ])
+        if tasks:
+            task_ids = [task.id for task in tasks]
+            transaction.on_commit(lambda: MediaWorker.submit(task_ids))
+        return tasks
+
+    @classmethod
+    def _get_executor(cls):
+        with cls._lock:
+            # A forked child (e.g. preloading app servers) must not reuse the parent's threads
+            if cls._executor is None or cls._executor_pid != os.getpid():
+                threads = getattr(settings, "MEDIA_WORKER_THREADS", 2)
+                cls._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="media-worker")
+                cls._executor_pid = os.getpid()
+                # Bound the in-memory queue; overflow waits in the table
+                cls._slots = threading.BoundedSemaphore(threads * 4)
+            return cls._executor
+
+    @classmethod
+    def submit(cls, task_ids):
+        """Hand committed tasks to the in-process pool (best effort)"""
+        if not getattr(settings, "MEDIA_WORKER_IN_PROCESS", True):
+            return
+
+        executor = cls._get_executor()
+        for task_id in task_ids:
+            if task_id in cls._queued:
+                continue
+            if not cls._slots.acquire(blocking=False):
+                logger.info("Media worker pool is full; remaining tasks left for the next sweep")
+                return
+            cls._queued.add(task_id)
+            executor.submit(cls._run_in_thread, task_id)
+
+    @classmethod
+    def _run_in_thread(cls, task_id):
+        try:
+            close_old_connections()
+            cls.run_task(task_id)
+        except Exception:
+            logger.exception(f"Media task {task_id} crashed")
+        finally:
+            cls._queued.discard(task_id)
+            cls._slots.release()
+            close_old_connections()
+
+    @classmethod
+    def start_sweeper(cls, **kwargs):
+        """
+        Start this process's sweeper thread if it is not running yet (connected
+        to request_started, so only web processes sweep). Safe to call often.
+        """
+        if not getattr(settings, "MEDIA_WORKER_IN_PROCESS", True) or cls._sweeper_pid == os.getpid():
+            return
+        with cls._lock:
+            if cls._sweeper_pid == os.getpid():
+                return
+            cls._sweeper_pid = os.getpid()
+        threading.Thread(target=cls._sweep_forever, name="media-sweeper", daemon=True).start()
+
+    @classmethod
+    def _sweep_forever(cls):
+        interval = getattr(settings, "MEDIA_WORKER_SWEEP_INTERVAL", 60)
+        while True:
+            cls.sweep()
+            time.sleep(interval)
+
+    @classmethod
+    def sweep(cls):
+        """Submit runnable tasks from the table to the in-process pool, as far as it has room"""
+        try:
+            close_old_connections()
+            threads = getattr(settings, "MEDIA_WORKER_THREADS", 2)
+            cls.submit(cls.pending_task_ids(threads * 4 + len(cls._queued)))
+        except Exception:
+            logger.exception("Media task sweep failed")
+        finally:
+            close_old_connections()
+
+    # -------------------------
+    # Execution
+    # -------------------------
+
+    @staticmethod
+    def claim(task_id):
+        """Atomically mark a pending (or stale running) task as running; False if taken"""
+        stale_before = timezone.now() - MediaWorker.STALE_AFTER
+        return MediaTask.objects.filter(
+            Q(status=MediaTask.STATUS_PENDING) | Q(status=MediaTask.STATUS_RUNNING, started_at__lt=stale_before),
+            id=task_id,
+        ).update(
+            status=MediaTask.STATUS_RUNNING,
+            started_at=timezone.now(),
+            attempts=F("attempts") + 1,
+        ) == 1
+
+    @staticmethod
+    def run_task(task_id):
+        """Claim and execute one task. Returns True if it ran successfully."""
+        if not MediaWorker.claim(task_id):
+            return False
+
+        task = MediaTask.objects.get(id=task_id)
+        try:
+            MediaWorker._process(task)
+        except Exception as e:
+            max_attempts = getattr(settings, "MEDIA_WORKER_MAX_ATTEMPTS", 3)
+            task.status = MediaTask.STATUS_FAILED if task.attempts >= max_attempts else MediaTask.STATUS_PENDING
+            task.last_error = str(e)
+            task.finished_at = timezone.now()
+            task.save(update_fields=["status", "last_error", "finished_at"])
+            logger.warning(f"Media task {task.id} ({task.task_type}) failed: {e}")
+            return False
+
+        task.status = MediaTask.STATUS_DONE
+        task.last_error = ""
+        task.finished_at = timezone.now()
+        task.save(update_fields=["status", "last_error", "finished_at"])
+        return True
+
+    @staticmethod
+    def pending_task_ids(limit):
+        """Oldest runnable tasks: pending ones plus running ones whose worker died"""
+        stale_before = timezone.now() - MediaWorker.STALE_AFTER
+        return list(
+            MediaTask.objects.filter(
+                Q(status=MediaTask.STATUS_PENDING) | Q(status=MediaTask.STATUS_RUNNING, started_at__lt=stale_before)
+            ).order_by("created_at").values_list("id", flat=True)[:limit]
+        )
+
+    @staticmethod
+    def _process(task):
+        model = apps.get_model(task.model_label)
+        # Base manager so rows hidden by default managers (draft loans) are found too
+        instance = model._base_manager.filter(pk=task.object_id).first()
+        if instance is None:
+            return  # Row deleted since the task was queued
+
+        name = getattr(instance, task.field_name).name
+        if not name:
+            return
+
+        if task.task_type == MediaTask.TASK_INGEST:
+            name = MediaWorker._ingest_stored_file(model, instance, task.field_name)
+            if name is None:
+                return
+
+        if MediaService.has_derivatives(name):
+            for rendition in MediaService.RENDITIONS:
+                MediaService.get_or_create_derivative(name, rendition)
+
+    @staticmethod
+    def _ingest_stored_file(model, instance, field_name):
+        """
+        Normalize an already stored file (see MediaService.ingest_upload) and
+        point the row at the result. Returns the file name now on the row.
+        """
+        field_file = getattr(instance, field_name)
+        storage = field_file.storage
+        old_name = field_file.name
+
+        with storage.open(old_name, "rb") as source:
+            normalized, _ = MediaService.ingest_upload(File(source, name=old_name))
+            if not isinstance(normalized, ContentFile):
+                return old_name  # Not an image, or already smaller than a re-encode; keep as stored
+
+        new_name = storage.save(posixpath.join(posixpath.dirname(old_name), normalized.name), normalized)
+
+        # Only swap if the row still points at the file we read
+        updated = model._base_manager.filter(pk=instance.pk, **{field_name: old_name}).update(**{field_name: new_name})
+        if not updated:
+            storage.delete(new_name)
+            return None
+
+        storage.delete(old_name)
+        return new_name
@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-19 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gold_loan', '0021_customer_created_at_customer_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='draft_customer_data',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='loan',
+            name='customer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='loans', to='gold_loan.customer'),
+        ),
+        migrations.AlterField(
+            model_name='loan',
+            name='interest_rate',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5),
+        ),
+        migrations.AlterField(
+            model_name='loan',
+            name='price_per_gram',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.AlterField(
+            model_name='loan',
+            name='approved_grams',
+            field=models.DecimalField(decimal_places=3, default=0, max_digits=6),
+        ),
+        migrations.AlterField(
+            model_name='loan',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+    ]
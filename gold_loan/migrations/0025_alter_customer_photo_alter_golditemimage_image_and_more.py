@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-19 11:40
+
+import gold_loan.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gold_loan', '0024_mediatask'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customer',
+            name='photo',
+            field=models.ImageField(blank=True, storage=gold_loan.storage.ContentAddressedStorage(), upload_to='customers/photos/'),
+        ),
+        migrations.AlterField(
+            model_name='golditemimage',
+            name='image',
+            field=models.ImageField(storage=gold_loan.storage.ContentAddressedStorage(), upload_to='gold_items/images/'),
+        ),
+        migrations.AlterField(
+            model_name='loandocument',
+            name='image',
+            field=models.FileField(blank=True, storage=gold_loan.storage.ContentAddressedStorage(), upload_to='loan_documents/'),
+        ),
+    ]
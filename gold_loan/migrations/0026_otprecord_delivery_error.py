@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gold_loan', '0025_alter_customer_photo_alter_golditemimage_image_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='otprecord',
+            name='delivery_error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
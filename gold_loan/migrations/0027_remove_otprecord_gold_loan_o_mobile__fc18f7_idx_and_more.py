@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-19 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gold_loan', '0026_otprecord_delivery_error'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='otprecord',
+            name='gold_loan_o_mobile__fc18f7_idx',
+        ),
+        migrations.AddIndex(
+            model_name='otprecord',
+            index=models.Index(condition=models.Q(('is_expired', False), ('is_verified', False)), fields=['mobile_number', 'purpose', 'created_at'], name='otprecord_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otprecord',
+            index=models.Index(fields=['created_at'], name='gold_loan_o_created_6868ab_idx'),
+        ),
+    ]
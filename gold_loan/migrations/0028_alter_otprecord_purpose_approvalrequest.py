@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-19 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gold_loan', '0027_remove_otprecord_gold_loan_o_mobile__fc18f7_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='otprecord',
+            name='purpose',
+            field=models.CharField(choices=[('loan_creation', 'Loan Creation'), ('loan_closure', 'Loan Closure'), ('loan_extension', 'Loan Extension'), ('batch_approval', 'Batch Approval')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ApprovalRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purpose', models.CharField(choices=[('loan_creation', 'Loan Creation'), ('loan_closure', 'Loan Closure'), ('loan_extension', 'Loan Extension'), ('batch_approval', 'Batch Approval')], max_length=20)),
+                ('next_action', models.CharField(blank=True, max_length=10)),
+                ('mobile_number', models.CharField(max_length=10)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('used', 'Used'), ('cancelled', 'Cancelled')], default='pending', max_length=10)),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+                ('approved_at', models.DateTimeField(blank=True, null=True)),
+                ('used_at', models.DateTimeField(blank=True, null=True)),
+                ('batch_otp', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='batch_requests', to='gold_loan.otprecord')),
+                ('loan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='approval_requests', to='gold_loan.loan')),
+                ('otp_record', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='gold_loan.otprecord')),
+            ],
+            options={
+                'ordering': ['requested_at'],
+                'indexes': [models.Index(fields=['loan', 'purpose', 'status'], name='gold_loan_a_loan_id_76fc33_idx'), models.Index(fields=['status', 'requested_at'], name='gold_loan_a_status_dba003_idx')],
+            },
+        ),
+    ]
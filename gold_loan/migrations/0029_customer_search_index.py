@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-19 13:05
+
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from gold_loan.customer_search import CustomerSearchIndex
+    CustomerSearchIndex.install(schema_editor.connection)
+
+
+def uninstall_search_index(apps, schema_editor):
+    from gold_loan.customer_search import CustomerSearchIndex
+    CustomerSearchIndex.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gold_loan', '0028_alter_otprecord_purpose_approvalrequest'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
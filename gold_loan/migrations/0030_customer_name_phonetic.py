@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-19 14:20
+
+from django.db import migrations, models
+
+
+def backfill_name_phonetic(apps, schema_editor):
+    from gold_loan.phonetic import phonetic_keys
+
+    Customer = apps.get_model('gold_loan', 'Customer')
+    customers = Customer.objects.using(schema_editor.connection.alias)
+
+    # One UPDATE per distinct key (many customers share one) instead of bulk_update's CASE per row
+    ids_by_key = {}
+    for customer_id, name in customers.values_list('id', 'name').iterator(chunk_size=2000):
+        ids_by_key.setdefault(phonetic_keys(name), []).append(customer_id)
+    for key, ids in ids_by_key.items():
+        for start in range(0, len(ids), 500):
+            customers.filter(id__in=ids[start:start + 500]).update(name_phonetic=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gold_loan', '0029_customer_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='name_phonetic',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(backfill_name_phonetic, migrations.RunPython.noop),
+    ]
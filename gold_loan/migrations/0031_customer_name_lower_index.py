@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 15:05
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gold_loan', '0030_customer_name_phonetic'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='gold_loan_customer_name_lower'),
+        ),
+    ]
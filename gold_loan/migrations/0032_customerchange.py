@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-19 15:40
+
+from django.db import migrations, models
+
+
+def install_change_log(apps, schema_editor):
+    from gold_loan.customer_search import CustomerPrefixIndex
+    CustomerPrefixIndex.install(schema_editor.connection)
+
+
+def uninstall_change_log(apps, schema_editor):
+    from gold_loan.customer_search import CustomerPrefixIndex
+    CustomerPrefixIndex.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gold_loan', '0031_customer_name_lower_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('customer_pk', models.BigIntegerField()),
+            ],
+        ),
+        migrations.RunPython(install_change_log, uninstall_change_log),
+    ]
@@ -1,9 +1,13 @@
-from django.db import models
+import uuid
+from django.db import models, transaction
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.core.validators import RegexValidator
 
 # Import OTP models
 from .otp_models import OTPRecord
+from .storage import content_storage
+from .phonetic import phonetic_keys
 
 
 # =========================
@@ -27,6 +31,9 @@ aadhaar_validator = RegexValidator(
 class Customer(models.Model):
     name = models.CharField(max_length=100)
 
+    # Phonetic keys of the name words (see phonetic.py), kept in step with name on save
+    name_phonetic = models.CharField(max_length=100, blank=True, editable=False, db_index=True)
+
     mobile_primary = models.CharField(
         max_length=10,
         unique=True,
@@ -57,16 +64,30 @@ class Customer(models.Model):
         validators=[mobile_validator]
     )
 
-    photo = models.ImageField(upload_to="customers/photos/", blank=True)
+    photo = models.ImageField(upload_to="customers/photos/", blank=True, storage=content_storage)
 
     customer_id = models.CharField(max_length=10, unique=True, blank=True, null=True)
 
+    # Change tracking (used as the watermark for incremental exports)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Case-insensitive exact / prefix name lookups (CustomerSearchIndex)
+            models.Index(Lower("name"), name="gold_loan_customer_name_lower"),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.customer_id or 'No ID'})"
 
     def save(self, *args, **kwargs):
         if not self.customer_id:
             self.customer_id = self.generate_customer_id()
+        self.name_phonetic = phonetic_keys(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "name_phonetic"}
         super().save(*args, **kwargs)
 
     @staticmethod
@@ -102,9 +123,79 @@ class Customer(models.Model):
         return f"PG{new_seq:06d}"
 
 
+class CustomerChange(models.Model):
+    """
+    One row per customer insert, delete or change of a prefix-indexed column,
+    appended by database triggers (see CustomerPrefixIndex.install), so bulk
+    and raw SQL writes are logged too. The id is the change counter each
+    worker's CustomerPrefixIndex catches up from.
+    """
+    customer_pk = models.BigIntegerField()
+
+    def __str__(self):
+        return f"Change #{self.id} of customer {self.customer_pk}"
+
+
+class DeletedRecord(models.Model):
+    """
+    Tombstone of a deleted customer or booked loan, written by post_delete
+    receivers (see apps.py), so incremental exports (`since`) can report
+    removals as well as changes.
+    """
+    TYPE_CUSTOMER = "customer"
+    TYPE_LOAN = "loan"
+
+    TYPE_CHOICES = [
+        (TYPE_CUSTOMER, "Customer"),
+        (TYPE_LOAN, "Loan"),
+    ]
+
+    record_type = models.CharField(max_length=10, choices=TYPE_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    # The identifier exports carry: customer ID (PGxxxxxx) or loan number
+    record_key = models.CharField(max_length=20, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ["deleted_at"]
+
+    def __str__(self):
+        return f"{self.record_type} {self.record_key or self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+    @classmethod
+    def customer_deleted(cls, sender, instance, using, **kwargs):
+        cls.objects.using(using).create(
+            record_type=cls.TYPE_CUSTOMER, object_id=instance.pk, record_key=instance.customer_id or ""
+        )
+
+    @classmethod
+    def loan_deleted(cls, sender, instance, using, **kwargs):
+        # Drafts were never exported
+        if instance.status != sender.STATUS_DRAFT:
+            cls.objects.using(using).create(
+                record_type=cls.TYPE_LOAN, object_id=instance.pk, record_key=instance.loan_number
+            )
+
+
 # =========================
 # LOAN
 # =========================
+class LoanManager(models.Manager):
+    """
+    Default manager: booked loans only.
+    Drafts from the entry wizard are excluded so they never reach
+    dashboards, lot checks, reports or related managers.
+    """
+    def get_queryset(self):
+        return super().get_queryset().exclude(status=self.model.STATUS_DRAFT)
+
+
+class LoanDraftManager(models.Manager):
+    """Loans still being entered through the 5-step wizard"""
+    def get_queryset(self):
+        return super().get_queryset().filter(status=self.model.STATUS_DRAFT)
+
+
 class Loan(models.Model):
 
     STATUS_DRAFT = "draft"
@@ -120,17 +211,20 @@ class Loan(models.Model):
     lot_number = models.CharField(max_length=20)
     loan_number = models.CharField(max_length=20, unique=True)
 
+    # Empty only while a draft is for a customer that is not created yet
     customer = models.ForeignKey(
         Customer,
         on_delete=models.PROTECT,
-        related_name="loans"
+        related_name="loans",
+        null=True,
+        blank=True
     )
 
-    interest_rate = models.DecimalField(max_digits=5, decimal_places=2)
-    price_per_gram = models.DecimalField(max_digits=8, decimal_places=2)
+    interest_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    price_per_gram = models.DecimalField(max_digits=8, decimal_places=2, default=0)
 
-    approved_grams = models.DecimalField(max_digits=6, decimal_places=3)
-    total_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    approved_grams = models.DecimalField(max_digits=6, decimal_places=3, default=0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
     status = models.CharField(
         max_length=10,
@@ -139,7 +233,7 @@ class Loan(models.Model):
     )
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     pending_interest = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     
@@ -157,9 +251,28 @@ class Loan(models.Model):
     pledge_receipt_no = models.CharField(max_length=100, blank=True, null=True)
     pledge_notes = models.TextField(blank=True, null=True)
 
+    # Draft only: new customer details from step 1 (customer is created on approval)
+    draft_customer_data = models.JSONField(blank=True, null=True)
+
+    objects = LoanManager()
+    drafts = LoanDraftManager()
+    all_objects = models.Manager()
+
     def __str__(self):
         return self.loan_number
 
+    @property
+    def draft_customer_name(self):
+        """Customer name for a draft, whether the customer exists yet or not"""
+        if self.customer_id:
+            return self.customer.name
+        return (self.draft_customer_data or {}).get("name", "")
+
+    @staticmethod
+    def generate_draft_number():
+        """Generate placeholder loan number for drafts in format: DRAFT-XXXXXXXXXXXX"""
+        return f"DRAFT-{uuid.uuid4().hex[:12].upper()}"
+
     @staticmethod
     def generate_lot_number():
         """Generate unique lot number in format: LOT-YYYYMMDD-XXXX"""
@@ -251,7 +364,7 @@ class GoldItemImage(models.Model):
         related_name="images"
     )
 
-    image = models.ImageField(upload_to="gold_items/images/")
+    image = models.ImageField(upload_to="gold_items/images/", storage=content_storage)
 
     def __str__(self):
         return f"Image for {self.gold_item.item_name}"
@@ -298,12 +411,277 @@ class LoanDocument(models.Model):
         blank=True
     )
 
-    image = models.FileField(upload_to="loan_documents/", blank=True)
+    image = models.FileField(upload_to="loan_documents/", blank=True, storage=content_storage)
 
     def __str__(self):
         return f"{self.document_type} document for {self.loan.loan_number}"
 
 
+# =========================
+# CHUNKED UPLOAD (resumable wizard upload)
+# =========================
+class ChunkedUpload(models.Model):
+    """
+    One resumable upload of an item photo or document scan for a draft loan.
+    Chunks are appended in order; on completion the file lands in the staging area.
+    """
+
+    PURPOSE_ITEM = "item"
+    PURPOSE_DOCUMENT = "document"
+
+    PURPOSE_CHOICES = [
+        (PURPOSE_ITEM, "Gold Item Image"),
+        (PURPOSE_DOCUMENT, "Loan Document"),
+    ]
+
+    loan = models.ForeignKey(
+        Loan,
+        on_delete=models.CASCADE,
+        related_name="chunked_uploads"
+    )
+
+    upload_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES)
+    filename = models.CharField(max_length=255)
+
+    total_size = models.PositiveBigIntegerField()
+    received_bytes = models.PositiveBigIntegerField(default=0)
+
+    # Staging name (e.g. temp_items/<sha256>.jpg), set when the upload completes
+    staged_name = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+
+    def __str__(self):
+        return f"{self.purpose} upload {self.upload_id} ({self.received_bytes}/{self.total_size})"
+
+
+# =========================
+# MEDIA TASK (post-commit background processing)
+# =========================
+class MediaTask(models.Model):
+    """
+    Deferred image work for a file field of a saved row. Rows are written in
+    the request's transaction and run after commit by the in-process pool or
+    by `manage.py run_media_worker`, so pending work survives restarts.
+    """
+
+    TASK_INGEST = "ingest"
+    TASK_DERIVATIVES = "derivatives"
+
+    TASK_CHOICES = [
+        (TASK_INGEST, "Normalize stored image"),
+        (TASK_DERIVATIVES, "Generate thumbnails"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    task_type = models.CharField(max_length=20, choices=TASK_CHOICES)
+
+    # Target file: <app_label>.<Model> row and its FileField name
+    model_label = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    field_name = models.CharField(max_length=50)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.task_type} {self.model_label}#{self.object_id}.{self.field_name} ({self.status})"
+
+
+# =========================
+# APPROVAL REQUEST (batched admin OTP)
+# =========================
+class ApprovalRequest(models.Model):
+    """
+    A loan creation, closure or extension waiting in the admin's approval queue.
+
+    Instead of one SMS per operation, requests accumulate here and the admin
+    approves a selected batch with a single OTP (`batch_otp`). Approval writes a
+    verified OTPRecord per request (`otp_record`) so every operation keeps its own
+    audit row; the operator then continues the flow, which uses the approval up.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_APPROVED = "approved"
+    STATUS_USED = "used"
+    STATUS_CANCELLED = "cancelled"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_APPROVED, "Approved"),
+        (STATUS_USED, "Used"),
+        (STATUS_CANCELLED, "Cancelled"),
+    ]
+
+    OPEN_STATUSES = [STATUS_PENDING, STATUS_APPROVED]
+
+    loan = models.ForeignKey(
+        Loan,
+        on_delete=models.CASCADE,
+        related_name="approval_requests"
+    )
+
+    purpose = models.CharField(max_length=20, choices=OTPRecord.PURPOSE_CHOICES)
+    next_action = models.CharField(max_length=10, blank=True)  # Closure: 'close' or 'extend'
+
+    # Customer mobile and loan amount at the time of the request. An approval
+    # only covers that customer, amount and next_action; any change needs a fresh one
+    mobile_number = models.CharField(max_length=10)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+
+    # The admin OTP this request was selected under, and its own audit row once approved
+    batch_otp = models.ForeignKey(
+        OTPRecord,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="batch_requests"
+    )
+    otp_record = models.ForeignKey(
+        OTPRecord,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+
+    requested_at = models.DateTimeField(auto_now_add=True)
+    approved_at = models.DateTimeField(null=True, blank=True)
+    used_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["requested_at"]
+        indexes = [
+            models.Index(fields=["loan", "purpose", "status"]),
+            models.Index(fields=["status", "requested_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_purpose_display()} for loan #{self.loan_id} ({self.status})"
+
+    @classmethod
+    def _matching(cls, loan, purpose, mobile_number, next_action):
+        """Requests for exactly this operation: loan, purpose, customer mobile, next action and current amount"""
+        return cls.objects.filter(
+            loan=loan, purpose=purpose, mobile_number=mobile_number, next_action=next_action,
+            amount=loan.total_amount
+        )
+
+    @classmethod
+    def current(cls, loan, purpose, mobile_number, next_action=""):
+        """The open (pending or approved) request for this exact operation, or None"""
+        return cls._matching(loan, purpose, mobile_number, next_action).filter(
+            status__in=cls.OPEN_STATUSES
+        ).order_by("-requested_at").first()
+
+    @classmethod
+    def submit(cls, loan, purpose, mobile_number, next_action=""):
+        """
+        Queue `loan` for admin approval, reusing its open request if there is one.
+        Open requests for the loan/purpose made for a different amount, customer
+        or next action are cancelled.
+        """
+        approval = cls.current(loan, purpose, mobile_number, next_action)
+        stale = cls.objects.filter(loan=loan, purpose=purpose, status__in=cls.OPEN_STATUSES)
+        if approval is not None:
+            stale = stale.exclude(id=approval.id)
+        stale.update(status=cls.STATUS_CANCELLED)
+
+        if approval is None:
+            approval = cls.objects.create(
+                loan=loan,
+                purpose=purpose,
+                next_action=next_action,
+                mobile_number=mobile_number,
+                amount=loan.total_amount
+            )
+        return approval
+
+    @classmethod
+    def withdraw(cls, loan, purpose):
+        """Cancel open requests once the operation was authorized by its own OTP"""
+        return cls.objects.filter(
+            loan=loan, purpose=purpose, status__in=cls.OPEN_STATUSES
+        ).update(status=cls.STATUS_CANCELLED)
+
+    @classmethod
+    def consume(cls, loan, purpose, mobile_number, next_action=""):
+        """
+        Use up the approval for this exact operation (a single conditional UPDATE,
+        so two tabs cannot both use it). An approval given for another customer,
+        amount or next action does not count. Returns True if there was one.
+        """
+        return cls._matching(loan, purpose, mobile_number, next_action).filter(
+            status=cls.STATUS_APPROVED
+        ).update(status=cls.STATUS_USED, used_at=timezone.now()) > 0
+
+    @classmethod
+    def approve_batch(cls, batch_otp):
+        """
+        Approve every pending request selected under `batch_otp` (already
+        verified with the provider) in one transaction, writing a verified
+        OTPRecord per request as its audit row.
+
+        Returns:
+            int: number of requests approved
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            requests = list(
+                cls.objects.select_for_update().filter(batch_otp=batch_otp, status=cls.STATUS_PENDING)
+            )
+            audit_rows = OTPRecord.objects.bulk_create([
+                OTPRecord(
+                    mobile_number=approval.mobile_number,
+                    purpose=approval.purpose,
+                    reference_id=str(approval.loan_id),
+                    is_verified=True,
+                    expires_at=now,
+                    verified_at=now
+                )
+                for approval in requests
+            ])
+            for approval, audit_row in zip(requests, audit_rows):
+                approval.status = cls.STATUS_APPROVED
+                approval.approved_at = now
+                approval.otp_record = audit_row
+            cls.objects.bulk_update(requests, ["status", "approved_at", "otp_record"])
+
+            OTPRecord.objects.filter(id=batch_otp.id).update(is_verified=True, verified_at=now)
+        return len(requests)
+
+
 # =========================
 # PAYMENT
 # =========================
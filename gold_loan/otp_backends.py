@@ -0,0 +1,285 @@
+import os
+import json
+import logging
+import threading
+import http.client
+from urllib.parse import urlsplit
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OTPGatewayError(Exception):
+    """
+    The provider could not be reached or failed on its side (timeout, connection
+    error, 5xx). OTPService counts these towards its circuit breaker and may retry.
+    """
+
+
+class BaseOTPBackend:
+    """
+    Provider interface used by OTPService (select one with OTP_BACKEND).
+
+    The provider generates the code, delivers it to `phone` (E.164) and later
+    checks the code the operator typed. Both methods return
+    (success (bool), message (str)) for answers from the provider (including
+    rejections such as a wrong code) and raise OTPGatewayError when the provider
+    is unavailable. `timeout` (seconds) bounds the call when given.
+    """
+
+    def send(self, phone, timeout=None):
+        raise NotImplementedError
+
+    def check(self, phone, code, timeout=None):
+        raise NotImplementedError
+
+
+# =========================
+# TWILIO VERIFY
+# =========================
+
+def _twilio_http_client_class():
+    from twilio.http.http_client import TwilioHttpClient
+
+    class DeadlineHttpClient(TwilioHttpClient):
+        """Pooled Twilio HTTP client that honours the calling thread's deadline (see TwilioVerifyBackend)"""
+
+        def request(self, *args, **kwargs):
+            timeout = getattr(TwilioVerifyBackend._call, "timeout", None)
+            if kwargs.get("timeout") is None and timeout is not None:
+                kwargs["timeout"] = timeout
+            return super().request(*args, **kwargs)
+
+    return DeadlineHttpClient
+
+
+class TwilioVerifyBackend(BaseOTPBackend):
+    """Twilio Verify (production)"""
+
+    # One Twilio client per process, reused across requests (see get_client)
+    _client = None
+    _client_key = None
+    _client_lock = threading.Lock()
+
+    # Per-thread timeout of the call in progress (the client itself is shared)
+    _call = threading.local()
+
+    @classmethod
+    def get_client(cls):
+        """
+        Return the process-wide Twilio Client, creating it on first use.
+
+        The client keeps one pooled HTTP session, so repeated sends and verifies
+        reuse the TLS connection to Twilio instead of opening a new one each time.
+        twilio is imported here rather than at module load to keep it off Django's
+        startup path. A forked child builds its own client; sockets are never shared.
+        """
+        account_sid = os.getenv('TWILIO_ACCOUNT_SID') or getattr(settings, 'TWILIO_ACCOUNT_SID', None)
+        auth_token = os.getenv('TWILIO_AUTH_TOKEN') or getattr(settings, 'TWILIO_AUTH_TOKEN', None)
+
+        if not account_sid or not auth_token:
+            logger.error("Twilio Credentials missing.")
+            return None
+
+        key = (os.getpid(), account_sid, auth_token)
+        with cls._client_lock:
+            if cls._client is None or cls._client_key != key:
+                from twilio.rest import Client
+
+                connect_timeout = getattr(settings, 'TWILIO_CONNECT_TIMEOUT', 3)
+                read_timeout = getattr(settings, 'TWILIO_READ_TIMEOUT', 10)
+
+                http_client = _twilio_http_client_class()(pool_connections=True, timeout=read_timeout)
+                # requests accepts a (connect, read) pair; fail fast when Twilio is unreachable
+                http_client.timeout = (connect_timeout, read_timeout)
+
+                cls._client = Client(account_sid, auth_token, http_client=http_client)
+                cls._client_key = key
+            return cls._client
+
+    @staticmethod
+    def _verify_sid():
+        return os.getenv('TWILIO_VERIFY_SERVICE_SID') or getattr(settings, 'TWILIO_VERIFY_SERVICE_SID', None)
+
+    @classmethod
+    def _set_timeout(cls, timeout):
+        """Shorten this thread's next request to `timeout` seconds if that is below the configured read timeout"""
+        if timeout is not None and timeout < getattr(settings, 'TWILIO_READ_TIMEOUT', 10):
+            cls._call.timeout = max(timeout, 0.001)
+        else:
+            cls._call.timeout = None
+
+    @staticmethod
+    def _raise_if_unavailable(error):
+        """Twilio-side failures (5xx, throttling) count as an outage; other errors are answers"""
+        if error.status is not None and (error.status >= 500 or error.status == 429):
+            raise OTPGatewayError(f"Twilio Error: {error.msg}") from error
+
+    def send(self, phone, timeout=None):
+        verify_sid = self._verify_sid()
+        if not verify_sid:
+            logger.error("TWILIO_VERIFY_SERVICE_SID is not set.")
+            return False, "SMS Configuration Error"
+
+        client = self.get_client()
+        if not client:
+            return False, "SMS Service Unavailable"
+
+        from twilio.base.exceptions import TwilioRestException
+
+        self._set_timeout(timeout)
+        try:
+            verification = client.verify.v2.services(verify_sid).verifications.create(
+                to=phone,
+                channel='sms'
+            )
+            logger.info(f"Twilio Verify sent to {phone}: {verification.status} (SID: {verification.sid})")
+            return True, "OTP sent successfully"
+        except TwilioRestException as e:
+            logger.error(f"Twilio Error sending OTP to {phone}: {e}")
+            self._raise_if_unavailable(e)
+            return False, f"Twilio Error: {e.msg}"
+        except Exception as e:
+            # Connection errors and timeouts from the HTTP layer
+            logger.error(f"Unexpected error sending OTP: {e}")
+            raise OTPGatewayError("Failed to send OTP") from e
+        finally:
+            self._call.timeout = None
+
+    def check(self, phone, code, timeout=None):
+        verify_sid = self._verify_sid()
+        if not verify_sid:
+            return False, "Verification Service Error"
+
+        client = self.get_client()
+        if not client:
+            return False, "Service Unavailable"
+
+        from twilio.base.exceptions import TwilioRestException
+
+        self._set_timeout(timeout)
+        try:
+            verification_check = client.verify.v2.services(verify_sid).verification_checks.create(
+                to=phone,
+                code=code
+            )
+
+            if verification_check.status == 'approved':
+                logger.info(f"Twilio Verify Success for {phone}")
+                return True, "OTP Verified Successfully"
+            else:
+                logger.warning(f"Twilio Verify Failed for {phone}: {verification_check.status}")
+                return False, "Invalid OTP"
+
+        except TwilioRestException as e:
+            logger.error(f"Twilio Verify Error for {phone}: {e}")
+            self._raise_if_unavailable(e)
+            if e.code == 20404:  # Resource not found (expired/invalid)
+                return False, "OTP Expired or Invalid"
+            return False, "Incorrect OTP or Expired"
+        except Exception as e:
+            logger.error(f"Unexpected error verifying OTP: {e}")
+            raise OTPGatewayError("Verification failed due to system error") from e
+        finally:
+            self._call.timeout = None
+
+
+# =========================
+# LOCAL (development / tests)
+# =========================
+
+class LocalOTPBackend(BaseOTPBackend):
+    """
+    In-process provider with no network: every send succeeds at once and the
+    code is always OTP_LOCAL_CODE. Never use in production.
+    """
+
+    def send(self, phone, timeout=None):
+        logger.info(f"Local OTP backend: code for {phone} is {getattr(settings, 'OTP_LOCAL_CODE', '123456')}")
+        return True, "OTP sent successfully"
+
+    def check(self, phone, code, timeout=None):
+        if str(code) == str(getattr(settings, 'OTP_LOCAL_CODE', '123456')):
+            return True, "OTP Verified Successfully"
+        return False, "Invalid OTP"
+
+
+# =========================
+# HTTP GATEWAY (load testing)
+# =========================
+
+class HTTPGatewayBackend(BaseOTPBackend):
+    """
+    Talks to a Verify-like HTTP gateway at OTP_GATEWAY_URL:
+
+        POST /send   {"to": phone}                -> 200 {"status": "pending"}
+        POST /check  {"to": phone, "code": code}  -> 200 {"status": "approved" | "pending"}
+
+    `manage.py run_otp_gateway` serves this API locally with configurable latency
+    and failure rate, so the OTP flows can be benchmarked without Twilio.
+    Connections are kept alive, one per thread.
+    """
+
+    _local = threading.local()
+
+    def _connection(self):
+        url = urlsplit(getattr(settings, 'OTP_GATEWAY_URL', 'http://127.0.0.1:8025'))
+        key = (os.getpid(), url.netloc)
+        if getattr(self._local, 'key', None) != key:
+            connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+            self._local.connection = connection_class(url.netloc, timeout=getattr(settings, 'OTP_GATEWAY_TIMEOUT', 5))
+            self._local.key = key
+            self._local.prefix = url.path.rstrip('/')
+        return self._local.connection
+
+    def _post(self, path, payload, timeout=None):
+        """POST JSON; returns (status code, parsed body). Retries once on a stale keep-alive connection."""
+        body = json.dumps(payload)
+        if timeout is None:
+            timeout = getattr(settings, 'OTP_GATEWAY_TIMEOUT', 5)
+        timeout = max(min(timeout, getattr(settings, 'OTP_GATEWAY_TIMEOUT', 5)), 0.001)
+        for attempt in range(2):
+            connection = self._connection()
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+            try:
+                connection.request('POST', f"{self._local.prefix}{path}", body=body,
+                                   headers={'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                data = response.read()
+                return response.status, json.loads(data or b'{}')
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if attempt:
+                    raise
+
+    def send(self, phone, timeout=None):
+        try:
+            status, data = self._post('/send', {'to': phone}, timeout)
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            self._connection().close()
+            logger.error(f"OTP gateway error sending to {phone}: {e}")
+            raise OTPGatewayError("SMS Service Unavailable") from e
+
+        if status >= 500:
+            raise OTPGatewayError(f"Gateway Error: {data.get('error', status)}")
+        if status != 200:
+            return False, f"Gateway Error: {data.get('error', status)}"
+        return True, "OTP sent successfully"
+
+    def check(self, phone, code, timeout=None):
+        try:
+            status, data = self._post('/check', {'to': phone, 'code': code}, timeout)
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            self._connection().close()
+            logger.error(f"OTP gateway error verifying {phone}: {e}")
+            raise OTPGatewayError("Verification failed due to system error") from e
+
+        if status >= 500:
+            raise OTPGatewayError(f"Gateway Error: {data.get('error', status)}")
+        if status != 200:
+            return False, "Incorrect OTP or Expired"
+        if data.get('status') == 'approved':
+            return True, "OTP Verified Successfully"
+        return False, "Invalid OTP"
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 from datetime import timedelta
 import random
@@ -14,12 +15,18 @@ class OTPRecord(models.Model):
     OTP_PURPOSE_LOAN_CREATION = 'loan_creation'
     OTP_PURPOSE_LOAN_CLOSURE = 'loan_closure'
     OTP_PURPOSE_LOAN_EXTENSION = 'loan_extension'
+    OTP_PURPOSE_BATCH_APPROVAL = 'batch_approval'  # One admin OTP for queued requests (see ApprovalRequest)
     
     PURPOSE_CHOICES = [
         (OTP_PURPOSE_LOAN_CREATION, 'Loan Creation'),
         (OTP_PURPOSE_LOAN_CLOSURE, 'Loan Closure'),
         (OTP_PURPOSE_LOAN_EXTENSION, 'Loan Extension'),
+        (OTP_PURPOSE_BATCH_APPROVAL, 'Batch Approval'),
     ]
+
+    DELIVERY_PENDING = 'pending'
+    DELIVERY_SENT = 'sent'
+    DELIVERY_FAILED = 'failed'
     
     # Who is this OTP for
     mobile_number = models.CharField(max_length=10)
@@ -45,38 +52,51 @@ class OTPRecord(models.Model):
     verification_attempts = models.IntegerField(default=0)
     max_attempts = models.IntegerField(default=3)
     
-    # Delivery tracking
+    # Delivery tracking (SMS is sent in the background, see OTPService.dispatch)
     sent_via_sms = models.BooleanField(default=False)
     sent_via_email = models.BooleanField(default=False)
+    delivery_error = models.CharField(max_length=255, blank=True)
     
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['mobile_number', 'purpose', 'is_verified']),
+            # Only live OTPs are ever looked up by mobile/purpose, so the index
+            # stays small however many spent records the table holds
+            models.Index(
+                fields=['mobile_number', 'purpose', 'created_at'],
+                name='otprecord_live_idx',
+                condition=Q(is_verified=False, is_expired=False),
+            ),
             models.Index(fields=['otp_code', 'is_verified']),
+            models.Index(fields=['created_at']),  # Retention purge
         ]
     
     def __str__(self):
         return f"OTP for {self.mobile_number} - {self.purpose} - {'Verified' if self.is_verified else 'Pending'}"
     
+    @property
+    def delivery_status(self):
+        """'sent', 'failed' or 'pending' (still queued for the SMS gateway)"""
+        if self.sent_via_sms:
+            return self.DELIVERY_SENT
+        if self.delivery_error:
+            return self.DELIVERY_FAILED
+        return self.DELIVERY_PENDING
+
     @staticmethod
     def generate_otp_code(length=6):
         """Generate a random numeric OTP code"""
         return ''.join(random.choices(string.digits, k=length))
     
     def is_valid(self):
-        """Check if OTP is still valid"""
+        """Check if OTP is still valid (read only; never writes to the database)"""
         if self.is_verified:
             return False
         if self.is_expired:
             return False
         if timezone.now() > self.expires_at:
-            self.is_expired = True
-            self.save()
             return False
         if self.verification_attempts >= self.max_attempts:
-            self.is_expired = True
-            self.save()
             return False
         return True
     
@@ -89,6 +109,9 @@ class OTPRecord(models.Model):
         self.save()
         
         if not self.is_valid():
+            if not self.is_expired:
+                self.is_expired = True
+                self.save(update_fields=['is_expired'])
             return False, "OTP has expired or exceeded maximum attempts"
         
         if self.otp_code != code:
@@ -112,11 +135,12 @@ class OTPRecord(models.Model):
         Create a new OTP record.
         Invalidates any previous unverified OTPs for the same mobile/purpose.
         """
-        # Invalidate previous OTPs
+        # Invalidate previous OTPs (only live rows; spent ones are left alone)
         cls.objects.filter(
             mobile_number=mobile_number,
             purpose=purpose,
-            is_verified=False
+            is_verified=False,
+            is_expired=False
         ).update(is_expired=True)
         
         # Generate new OTP - Set to None as Twilio Verify handles the code
@@ -134,19 +158,62 @@ class OTPRecord(models.Model):
         
         return otp_record
     
+    @classmethod
+    def live(cls):
+        """OTPs that can still be verified: the rows covered by otprecord_live_idx"""
+        return cls.objects.filter(
+            is_verified=False,
+            is_expired=False,
+            expires_at__gt=timezone.now(),
+            verification_attempts__lt=F('max_attempts')
+        )
+
     @classmethod
     def get_latest_valid_otp(cls, mobile_number, purpose):
-        """Get the latest valid OTP for a mobile number and purpose"""
-        try:
-            otp = cls.objects.filter(
-                mobile_number=mobile_number,
-                purpose=purpose,
-                is_verified=False,
-                is_expired=False
-            ).latest('created_at')
-            
-            if otp.is_valid():
-                return otp
-            return None
-        except cls.DoesNotExist:
-            return None
+        """Get the latest valid OTP for a mobile number and purpose (a single read)"""
+        return cls.live().filter(
+            mobile_number=mobile_number,
+            purpose=purpose
+        ).order_by('-created_at').first()
+
+    # =========================
+    # RETENTION
+    # =========================
+
+    @classmethod
+    def expire_stale(cls):
+        """Flag live-looking rows whose time or attempts ran out, dropping them from the live index"""
+        return cls.objects.filter(is_verified=False, is_expired=False).filter(
+            Q(expires_at__lte=timezone.now()) | Q(verification_attempts__gte=F('max_attempts'))
+        ).update(is_expired=True)
+
+    @classmethod
+    def purgeable(cls, before):
+        """Spent (verified or expired) records created before `before`"""
+        return cls.objects.filter(created_at__lt=before).filter(
+            Q(is_verified=True) | Q(is_expired=True) | Q(expires_at__lte=timezone.now())
+        )
+
+    @classmethod
+    def purge(cls, before, batch_size=1000, archive=None):
+        """
+        Delete spent records created before `before`, `batch_size` rows per
+        transaction so the table is never locked for long. If `archive` is given
+        it is called with each batch (a list of dicts) before the batch is deleted.
+
+        Returns:
+            int: number of records deleted
+        """
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    cls.purgeable(before).order_by('created_at').values()[:batch_size]
+                )
+                if not batch:
+                    return deleted
+
+                if archive is not None:
+                    archive(batch)
+                cls.objects.filter(id__in=[row['id'] for row in batch]).delete()
+                deleted += len(batch)
@@ -1,29 +1,149 @@
 import os
+import time
+import random
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+
+from .circuit_breaker import CircuitBreaker
+from .otp_backends import OTPGatewayError, TwilioVerifyBackend
+from .otp_models import OTPRecord
+from .ratelimit import OTPRateLimit
 
 logger = logging.getLogger(__name__)
 
 class OTPService:
     """
-    Service class to handle OTP generation and delivery via Twilio Verify.
+    Service class to handle OTP generation and delivery.
+    The provider (Twilio Verify by default) is chosen with OTP_BACKEND.
+    Provider calls go through a circuit breaker with bounded, jittered retries
+    and a deadline per call (see _call_gateway).
     """
 
+    DEFAULT_CIRCUIT_BREAKER = {
+        "failure_threshold": 5,
+        "window": 60,
+        "recovery_timeout": 30,
+    }
+
+    _backend = None
+    _backend_path = None
+
+    # Background SMS dispatch (see dispatch)
+    _executor = None
+    _executor_pid = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def get_backend(cls):
+        """The configured OTP provider (see otp_backends.py), instantiated once"""
+        path = getattr(settings, 'OTP_BACKEND', 'gold_loan.otp_backends.TwilioVerifyBackend')
+        if cls._backend is None or cls._backend_path != path:
+            cls._backend = import_string(path)()
+            cls._backend_path = path
+        return cls._backend
+
+    @classmethod
+    def get_circuit_breaker(cls):
+        """Breaker around the OTP provider, shared by all workers through the cache (OTP_CIRCUIT_BREAKER)"""
+        options = {**cls.DEFAULT_CIRCUIT_BREAKER, **getattr(settings, 'OTP_CIRCUIT_BREAKER', {})}
+        return CircuitBreaker("otp_gateway", **options)
+
+    @classmethod
+    def _call_gateway(cls, operation, *args, retries=0, unavailable_message="SMS Service Unavailable"):
+        """
+        Call a backend method under the circuit breaker.
+
+        The whole call, retries included, must finish within OTP_GATEWAY_DEADLINE
+        seconds; each attempt gets the time that is left. After an OTPGatewayError
+        it is retried up to `retries` times with full-jitter exponential backoff
+        (OTP_GATEWAY_BACKOFF base seconds). While the circuit is open the call
+        fails at once without touching the network.
+
+        Returns:
+            tuple: (success (bool), message (str))
+        """
+        breaker = cls.get_circuit_breaker()
+        deadline = time.monotonic() + getattr(settings, 'OTP_GATEWAY_DEADLINE', 8)
+        backoff = getattr(settings, 'OTP_GATEWAY_BACKOFF', 0.2)
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                logger.warning("OTP provider circuit is open; failing fast")
+                return False, unavailable_message
+
+            try:
+                result = operation(*args, timeout=deadline - time.monotonic())
+            except OTPGatewayError as e:
+                breaker.record_failure()
+                attempt += 1
+                delay = random.uniform(0, backoff * (2 ** attempt))
+                if attempt > retries or time.monotonic() + delay >= deadline:
+                    logger.error(f"OTP provider unavailable after {attempt} attempt(s): {e}")
+                    return False, str(e) or unavailable_message
+                time.sleep(delay)
+                continue
+
+            breaker.record_success()
+            return result
+
     @staticmethod
     def get_twilio_client():
+        """Process-wide Twilio Client (see TwilioVerifyBackend.get_client)"""
+        return TwilioVerifyBackend.get_client()
+
+    @classmethod
+    def _get_executor(cls):
+        with cls._executor_lock:
+            # A forked child must not reuse the parent's threads
+            if cls._executor is None or cls._executor_pid != os.getpid():
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'OTP_DISPATCH_THREADS', 2),
+                    thread_name_prefix="otp-dispatch"
+                )
+                cls._executor_pid = os.getpid()
+            return cls._executor
+
+    @classmethod
+    def dispatch(cls, otp_record):
         """
-        Initialize and return Twilio Client.
+        Send the SMS for `otp_record` in the background, after the current
+        transaction commits, so the page renders without waiting for the gateway.
+        The outcome is written back to the record (sent_via_sms / delivery_error).
         """
-        account_sid = os.getenv('TWILIO_ACCOUNT_SID') or getattr(settings, 'TWILIO_ACCOUNT_SID', None)
-        auth_token = os.getenv('TWILIO_AUTH_TOKEN') or getattr(settings, 'TWILIO_AUTH_TOKEN', None)
-        
-        if not account_sid or not auth_token:
-            logger.error("Twilio Credentials missing.")
-            return None
-            
-        return Client(account_sid, auth_token)
+        otp_id = otp_record.id
+        transaction.on_commit(lambda: cls._get_executor().submit(cls._deliver, otp_id))
+
+    @staticmethod
+    def _delivery_failed(otp_record, message):
+        """Expire the OTP and lift the resend debounce so the operator can retry at once"""
+        OTPRecord.objects.filter(id=otp_record.id).update(delivery_error=message[:255], is_expired=True)
+        OTPRateLimit.reset_send(otp_record.mobile_number, otp_record.purpose)
+
+    @staticmethod
+    def _deliver(otp_id):
+        close_old_connections()
+        otp_record = None
+        try:
+            otp_record = OTPRecord.objects.filter(id=otp_id).only("id", "mobile_number", "purpose").first()
+            if otp_record is None:
+                return
+
+            success, message = OTPService.send_otp_to_customer(otp_record.mobile_number)
+            if success:
+                OTPRecord.objects.filter(id=otp_id).update(sent_via_sms=True)
+            else:
+                OTPService._delivery_failed(otp_record, message)
+        except Exception:
+            logger.exception(f"OTP dispatch failed for record {otp_id}")
+            if otp_record is not None:
+                OTPService._delivery_failed(otp_record, "Failed to send OTP")
+        finally:
+            close_old_connections()
 
     @staticmethod
     def normalize_mobile_number(mobile):
@@ -56,7 +176,7 @@ class OTPService:
     @staticmethod
     def send_otp_to_customer(mobile_number_ignored=None):
         """
-        Send OTP to ADMIN via Twilio Verify.
+        Send OTP to ADMIN via the configured provider.
         Arguments are ignored to enforce sending to Admin only.
         
         Returns:
@@ -71,36 +191,16 @@ class OTPService:
         if not normalized_number:
             return False, "Invalid mobile number"
 
-
-
-        # PRODUCTION MODE: Twilio Verify Use
-        verify_sid = os.getenv('TWILIO_VERIFY_SERVICE_SID') or getattr(settings, 'TWILIO_VERIFY_SERVICE_SID', None)
-        if not verify_sid:
-            logger.error("TWILIO_VERIFY_SERVICE_SID is not set.")
-            return False, "SMS Configuration Error"
-
-        client = OTPService.get_twilio_client()
-        if not client:
-             return False, "SMS Service Unavailable"
-
-        try:
-            verification = client.verify.v2.services(verify_sid).verifications.create(
-                to=normalized_number, 
-                channel='sms'
-            )
-            logger.info(f"Twilio Verify sent to {normalized_number}: {verification.status} (SID: {verification.sid})")
-            return True, "OTP sent successfully"
-        except TwilioRestException as e:
-            logger.error(f"Twilio Error sending OTP to {normalized_number}: {e}")
-            return False, f"Twilio Error: {e.msg}"
-        except Exception as e:
-            logger.error(f"Unexpected error sending OTP: {e}")
-            return False, "Failed to send OTP"
+        # Sending again is harmless (Verify reuses the pending code), so sends are retried
+        return OTPService._call_gateway(
+            OTPService.get_backend().send, normalized_number,
+            retries=getattr(settings, 'OTP_GATEWAY_RETRIES', 2)
+        )
 
     @staticmethod
     def verify_customer_otp(mobile_number_ignored, otp_code):
         """
-        Verify OTP using Twilio Verify against ADMIN number.
+        Verify OTP with the configured provider against ADMIN number.
         
         Args:
             mobile_number_ignored: Ignored, we always verify against admin.
@@ -120,37 +220,8 @@ class OTPService:
         if not otp_code:
             return False, "OTP code is required"
 
-
-
-
-
-        # Verify via Twilio
-        verify_sid = os.getenv('TWILIO_VERIFY_SERVICE_SID') or getattr(settings, 'TWILIO_VERIFY_SERVICE_SID', None)
-        if not verify_sid:
-             return False, "Verification Service Error"
-
-        client = OTPService.get_twilio_client()
-        if not client:
-             return False, "Service Unavailable"
-
-        try:
-            verification_check = client.verify.v2.services(verify_sid).verification_checks.create(
-                to=normalized_number,
-                code=otp_code
-            )
-            
-            if verification_check.status == 'approved':
-                logger.info(f"Twilio Verify Success for {normalized_number}")
-                return True, "OTP Verified Successfully"
-            else:
-                logger.warning(f"Twilio Verify Failed for {normalized_number}: {verification_check.status}")
-                return False, "Invalid OTP"
-                
-        except TwilioRestException as e:
-            logger.error(f"Twilio Verify Error for {normalized_number}: {e}")
-            if e.code == 20404: # Resource not found (expired/invalid)
-                 return False, "OTP Expired or Invalid"
-            return False, "Incorrect OTP or Expired"
-        except Exception as e:
-            logger.error(f"Unexpected error verifying OTP: {e}")
-            return False, "Verification failed due to system error"
+        # Not retried: a check that reached the provider counts against the OTP's attempts
+        return OTPService._call_gateway(
+            OTPService.get_backend().check, normalized_number, otp_code,
+            unavailable_message="Verification service unavailable. Please try again shortly."
+        )
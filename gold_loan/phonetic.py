@@ -0,0 +1,124 @@
+import re
+import unicodedata
+
+# Romanizations of Indian names vary in aspiration (th/t, bh/b), vowel length
+# (aa/a, ee/i), doubled consonants and a handful of interchangeable spellings
+# (ck/k, x/ks, z/j, w/v, f/ph, zh/l). The key keeps the consonant skeleton of
+# each word after folding those together, Metaphone style.
+
+_DIGRAPHS = [
+    ("chh", "C"),
+    ("ch", "C"),
+    ("sch", "S"),
+    ("sh", "S"),
+    ("zh", "L"),    # Tamil retroflex: Azhagu / Alagu
+    ("ck", "K"),
+    ("kh", "K"),
+    ("gh", "G"),
+    ("th", "T"),
+    ("dh", "D"),
+    ("ph", "P"),
+    ("bh", "B"),
+    ("jh", "J"),
+    ("x", "KS"),
+    ("q", "K"),
+]
+
+_LETTERS = {
+    "c": "K",       # c before e/i/y is handled below
+    "f": "P",       # Fani / Phani
+    "z": "J",       # Zaheer / Jaheer
+    "w": "V",
+}
+
+_VOWELS = set("aeiou")
+
+
+def _fold(word):
+    """Lowercase ASCII letters only (accents stripped)"""
+    word = unicodedata.normalize("NFKD", word).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z]", "", word.lower())
+
+
+def phonetic_key(word):
+    """
+    Phonetic key of one name word, e.g. Karthik / Karthick / Kaarthik -> KRTK,
+    Lakshmi / Laxmi -> LKSM. A leading vowel is kept as "A"; other vowels,
+    h after a consonant and doubled letters are dropped.
+    """
+    word = _fold(word)
+    if not word:
+        return ""
+
+    out = []
+    i = 0
+    while i < len(word):
+        char = word[i]
+        following = word[i + 1] if i + 1 < len(word) else ""
+
+        for digraph, code in _DIGRAPHS:
+            if word.startswith(digraph, i):
+                out.append(code)
+                i += len(digraph)
+                break
+        else:
+            if char in _VOWELS:
+                if i == 0:
+                    out.append("A")
+            elif char in "yw":
+                # Semivowels count only before a vowel and not after a consonant
+                # (Gowri / Gauri, Jyothi / Jothi, Vijay / Vijai)
+                previous = word[i - 1] if i else ""
+                if following in _VOWELS and (not previous or previous in _VOWELS):
+                    out.append(_LETTERS.get(char, char.upper()))
+                elif i == 0:
+                    out.append("A")
+            elif char == "h":
+                # Aspiration after a consonant or before one is silent
+                if (not i or word[i - 1] in _VOWELS) and following in _VOWELS:
+                    out.append("H")
+            elif char == "c" and following in ("e", "i", "y"):
+                out.append("S")
+            else:
+                out.append(_LETTERS.get(char, char.upper()))
+            i += 1
+
+    key = []
+    for code in "".join(out):
+        if not key or key[-1] != code:
+            key.append(code)
+    return "".join(key)
+
+
+def name_words(name):
+    return [word for word in (_fold(part) for part in re.split(r"[\s.,'-]+", name or "")) if word]
+
+
+def phonetic_keys(name):
+    """Space-separated keys of every word in `name`, as stored on Customer.name_phonetic"""
+    return " ".join(key for key in (phonetic_key(word) for word in name_words(name)) if key)
+
+
+def edit_distance(a, b, limit=None):
+    """
+    Levenshtein distance between `a` and `b`. With `limit`, stops early and
+    returns limit + 1 once the distance is known to exceed it.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
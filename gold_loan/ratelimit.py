@@ -0,0 +1,171 @@
+import math
+import time
+import hashlib
+import logging
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `capacity` requests per `period` seconds, refilled
+    evenly, kept in Django's cache so no database round trip is needed.
+
+    Each bucket is a single integer: the time (ms) at which it will be full
+    again (GCRA). Taking a token is one cache.incr(); a rejected request gives
+    its token back with decr(). The limit holds across processes only with a
+    shared cache whose add/incr are atomic (Memcached, Redis). The file-based
+    backend's incr is a read-then-write, so concurrent requests can slip
+    through; with the local-memory backend limits are per process.
+    """
+
+    def __init__(self, scope, rate):
+        self.scope = scope
+        self.capacity, self.period = self.parse_rate(rate)
+        self.interval = self.period * 1000 // self.capacity  # ms per token
+
+    @staticmethod
+    def parse_rate(rate):
+        """'5/300' -> (5, 300): 5 requests per 300 seconds"""
+        capacity, period = str(rate).split("/")
+        return max(1, int(capacity)), max(1, int(period))
+
+    def _key(self, parts):
+        digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()[:32]
+        return f"ratelimit:{self.scope}:{digest}"
+
+    def consume(self, *parts):
+        """
+        Take one token from the bucket identified by `parts`.
+
+        Returns:
+            tuple: (allowed (bool), retry_after seconds (int, 0 when allowed))
+        """
+        key = self._key(parts)
+        now = int(time.time() * 1000)
+        limit = self.period * 1000
+
+        # Empty cache slot = full bucket
+        if cache.add(key, now + self.interval, timeout=self.period):
+            return True, 0
+
+        try:
+            tat = cache.incr(key, self.interval)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(key, now + self.interval, timeout=self.period)
+            return True, 0
+
+        if tat - self.interval < now:
+            # Bucket had refilled completely; restart the clock from now
+            cache.set(key, now + self.interval, timeout=self.period)
+            return True, 0
+
+        if tat - now <= limit:
+            cache.touch(key, math.ceil((tat - now) / 1000))
+            return True, 0
+
+        cache.decr(key, self.interval)
+        return False, max(1, math.ceil((tat - limit - now) / 1000))
+
+    def refund(self, *parts):
+        """Give back one token taken by consume()"""
+        try:
+            cache.decr(self._key(parts), self.interval)
+        except ValueError:
+            pass  # Bucket already expired, i.e. full
+
+    def reset(self, *parts):
+        """Refill the bucket completely"""
+        cache.delete(self._key(parts))
+
+
+class OTPRateLimit:
+    """
+    Throttling for every OTP entry point (OTP_RATE_LIMITS):
+
+    - send:        per mobile + purpose (the resend debounce)
+    - send_client: per operator (logged-in user, else browser session), across all mobiles
+    - send_ip:     per client IP; a whole branch usually shares one, so this is
+                   only a ceiling against scripted abuse
+    - verify:      per mobile + purpose + client IP
+    """
+
+    DEFAULT_RATES = {
+        "send": "1/60",
+        "send_client": "30/3600",
+        "send_ip": "300/3600",
+        "verify": "5/300",
+    }
+
+    _buckets = {}
+
+    @classmethod
+    def bucket(cls, name):
+        if name not in cls._buckets:
+            rates = {**cls.DEFAULT_RATES, **getattr(settings, "OTP_RATE_LIMITS", {})}
+            cls._buckets[name] = TokenBucket(f"otp_{name}", rates[name])
+        return cls._buckets[name]
+
+    @staticmethod
+    def client_ip(request):
+        return request.META.get("REMOTE_ADDR", "")
+
+    @classmethod
+    def client_id(cls, request):
+        """The operator behind a request: user, else session, else IP"""
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        session = getattr(request, "session", None)
+        if session is not None:
+            if session.session_key is None:
+                session.save()
+            return f"session:{session.session_key}"
+        return f"ip:{cls.client_ip(request)}"
+
+    @classmethod
+    def allow_send(cls, request, mobile_number, purpose):
+        """
+        Whether an OTP may be sent now.
+
+        Returns:
+            tuple: (allowed (bool), retry_after seconds (int))
+        """
+        allowed, retry_after = cls.bucket("send").consume(mobile_number, purpose)
+        if not allowed:
+            return False, retry_after
+
+        allowed, retry_after = cls.bucket("send_client").consume(cls.client_id(request))
+        if not allowed:
+            logger.warning(f"OTP sends throttled for {cls.client_id(request)}")
+            cls.bucket("send").refund(mobile_number, purpose)  # Nothing was sent for this mobile
+            return False, retry_after
+
+        allowed, retry_after = cls.bucket("send_ip").consume(cls.client_ip(request))
+        if not allowed:
+            logger.warning(f"OTP sends throttled for client IP {cls.client_ip(request)}")
+            cls.bucket("send").refund(mobile_number, purpose)
+            cls.bucket("send_client").refund(cls.client_id(request))
+            return False, retry_after
+        return True, 0
+
+    @classmethod
+    def reset_send(cls, mobile_number, purpose):
+        """Allow the next send straight away (OTP used up, or delivery failed)"""
+        cls.bucket("send").reset(mobile_number, purpose)
+
+    @classmethod
+    def allow_verify(cls, request, mobile_number, purpose):
+        """
+        Whether another verification attempt is allowed now.
+
+        Returns:
+            tuple: (allowed (bool), retry_after seconds (int))
+        """
+        allowed, retry_after = cls.bucket("verify").consume(mobile_number, purpose, cls.client_ip(request))
+        if not allowed:
+            logger.warning(f"OTP verification throttled for {mobile_number} ({purpose})")
+        return allowed, retry_after
@@ -1,4 +1,9 @@
 (function () {
+    // Captures are downscaled before upload; the server caps stored images
+    // at MEDIA_INGEST_MAX_DIMENSION (2048px) anyway.
+    const MAX_CAPTURE_DIMENSION = 2048;
+    const CAPTURE_QUALITY = 0.85;
+
     let stream = null;
     let facingMode = "environment";
     let currentTargetInputId = null;
@@ -43,8 +48,9 @@
     async function capturePhoto() {
         if (!video || !canvas) return;
 
-        canvas.width = video.videoWidth;
-        canvas.height = video.videoHeight;
+        const scale = Math.min(1, MAX_CAPTURE_DIMENSION / Math.max(video.videoWidth, video.videoHeight));
+        canvas.width = Math.round(video.videoWidth * scale);
+        canvas.height = Math.round(video.videoHeight * scale);
 
         const ctx = canvas.getContext("2d");
         if (facingMode === 'user') {
@@ -52,10 +58,10 @@
             ctx.translate(canvas.width, 0);
             ctx.scale(-1, 1);
         }
-        ctx.drawImage(video, 0, 0);
+        ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
 
         const blob = await new Promise(resolve =>
-            canvas.toBlob(resolve, "image/jpeg", 0.9)
+            canvas.toBlob(resolve, "image/jpeg", CAPTURE_QUALITY)
         );
 
         const file = new File([blob], `capture_${Date.now()}.jpg`, {
@@ -124,3 +130,180 @@
     if (cancelBtn) cancelBtn.addEventListener("click", closeModal);
 
 })();
+
+// Background (resumable) uploads for wizard file inputs.
+// Inputs opt in with data-upload-purpose; their form carries data-upload-url.
+// Captures are sent in checksummed chunks while the operator keeps typing, and
+// on submit the form posts only the staged names instead of the files.
+(function () {
+    const MAX_CHUNK_RETRIES = 5;
+    const uploads = new Map(); // file key -> { promise, stagedName, failed }
+
+    // Per-chunk checksums need SubtleCrypto (HTTPS or localhost); without it
+    // files simply go with the form as before.
+    const supported = !!(window.crypto && window.crypto.subtle && window.fetch);
+
+    function fileKey(file) {
+        return `${file.name}-${file.size}-${file.lastModified}`;
+    }
+
+    function csrfToken(form) {
+        const input = form.querySelector("input[name='csrfmiddlewaretoken']");
+        return input ? input.value : "";
+    }
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    async function sha256Hex(buffer) {
+        const digest = await crypto.subtle.digest("SHA-256", buffer);
+        return Array.from(new Uint8Array(digest))
+            .map(b => b.toString(16).padStart(2, "0"))
+            .join("");
+    }
+
+    async function post(url, token, body, headers = {}) {
+        const response = await fetch(url, {
+            method: "POST",
+            credentials: "same-origin",
+            headers: { "X-CSRFToken": token, ...headers },
+            body: body
+        });
+        const data = await response.json().catch(() => ({}));
+        return { status: response.status, data: data };
+    }
+
+    async function uploadFile(form, file, purpose) {
+        const token = csrfToken(form);
+
+        const initBody = new FormData();
+        initBody.append("filename", file.name);
+        initBody.append("size", file.size);
+        initBody.append("purpose", purpose);
+
+        const init = await post(form.dataset.uploadUrl, token, initBody);
+        if (init.status !== 200 || !init.data.success) {
+            throw new Error(init.data.error || "Upload could not start");
+        }
+
+        let state = init.data;
+        let attempts = 0;
+
+        while (state.offset < state.size) {
+            const chunk = await file.slice(state.offset, state.offset + state.chunk_size).arrayBuffer();
+
+            try {
+                const result = await post(state.append_url, token, chunk, {
+                    "Content-Type": "application/octet-stream",
+                    "X-Upload-Offset": String(state.offset),
+                    "X-Chunk-Sha256": await sha256Hex(chunk)
+                });
+
+                if (result.status === 200 && result.data.success) {
+                    state = result.data;
+                    attempts = 0;
+                    continue;
+                }
+                if (result.status === 409 && result.data.upload_id) {
+                    // Server tells us where to resume
+                    state = result.data;
+                    continue;
+                }
+                if (result.status !== 422 && result.status < 500) {
+                    throw new Error(result.data.error || "Upload rejected");
+                }
+            } catch (err) {
+                if (!(err instanceof TypeError)) throw err; // TypeError = network failure, retry
+            }
+
+            attempts++;
+            if (attempts > MAX_CHUNK_RETRIES) throw new Error("Upload failed after retries");
+            await sleep(500 * 2 ** attempts);
+
+            // Resume from whatever the server actually received
+            try {
+                const probe = await fetch(state.status_url, { credentials: "same-origin" }).then(r => r.json());
+                if (probe.success) state = probe;
+            } catch (err) {
+                // Still offline; retry the same chunk
+            }
+        }
+
+        const done = await post(state.complete_url, token);
+        if (done.status !== 200 || !done.data.success) {
+            throw new Error(done.data.error || "Upload could not complete");
+        }
+        return done.data.staged_name;
+    }
+
+    function track(input) {
+        const form = input.form;
+        if (!supported || !form || !form.dataset.uploadUrl) return;
+
+        Array.from(input.files).forEach(file => {
+            const key = fileKey(file);
+            if (uploads.has(key)) return;
+
+            const entry = { stagedName: null, failed: false };
+            entry.promise = uploadFile(form, file, input.dataset.uploadPurpose)
+                .then(name => { entry.stagedName = name; })
+                .catch(err => {
+                    entry.failed = true;
+                    console.warn("Background upload failed, file will be sent with the form:", err.message);
+                });
+            uploads.set(key, entry);
+        });
+    }
+
+    /**
+     * Call from the form's submit handler after validation. Returns true when
+     * it took over the submission (waits for in-flight uploads, swaps files
+     * for staged names, then submits); false for a plain multipart submit.
+     */
+    function handleSubmit(form, event) {
+        if (form.dataset.uploading) {
+            event.preventDefault();
+            return true;
+        }
+
+        const inputs = Array.from(form.querySelectorAll("input[type='file'][data-upload-purpose]"));
+        const entries = [];
+        inputs.forEach(input => Array.from(input.files).forEach(file => entries.push(uploads.get(fileKey(file)))));
+
+        if (!entries.length || entries.some(entry => !entry)) return false;
+
+        event.preventDefault();
+        form.dataset.uploading = "1";
+
+        Promise.all(entries.map(entry => entry.promise)).then(() => {
+            if (!entries.some(entry => entry.failed)) {
+                inputs.forEach(input => {
+                    const names = Array.from(input.files).map(file => uploads.get(fileKey(file)).stagedName);
+                    // Positional inputs (one per document row) always send exactly one value
+                    const values = input.hasAttribute("data-upload-positional") ? [names[0] || ""] : names;
+
+                    values.forEach(value => {
+                        const hidden = document.createElement("input");
+                        hidden.type = "hidden";
+                        hidden.name = input.name.replace("[]", "_staged[]");
+                        hidden.value = value;
+                        form.appendChild(hidden);
+                    });
+                    input.files = new DataTransfer().files;
+                });
+            }
+            // On any failure the files are still attached and go with the form
+            form.submit();
+        });
+        return true;
+    }
+
+    document.addEventListener("change", (e) => {
+        if (e.target.matches && e.target.matches("input[type='file'][data-upload-purpose]")) {
+            track(e.target);
+        }
+    });
+
+    window.BackgroundUploader = { handleSubmit: handleSubmit };
+})();
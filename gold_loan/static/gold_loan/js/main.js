@@ -83,3 +83,40 @@ document.addEventListener('DOMContentLoaded', function () {
         });
     }
 });
+
+// ==============================
+// OTP DELIVERY STATUS
+// ==============================
+// OTP SMS are sent in the background; elements with data-otp-status-url show
+// the outcome by polling the status endpoint until it is no longer pending.
+const OTP_STATUS_TEXT = {
+    pending: 'Sending OTP...',
+    sent: 'OTP sent.',
+    failed: 'OTP could not be sent'
+};
+
+function pollOtpStatus(el, attempt = 0) {
+    const render = (status, error) => {
+        el.dataset.otpStatus = status;
+        el.innerText = OTP_STATUS_TEXT[status] + (status === 'failed' && error ? `: ${error}. Please resend.` : '');
+        el.style.color = status === 'failed' ? '#991b1b' : '';
+    };
+
+    fetch(el.dataset.otpStatusUrl, { credentials: 'same-origin' })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) return;
+            render(data.status, data.error);
+            // Stop after ~1 minute; the gateway has either answered or timed out by then
+            if (data.status === 'pending' && attempt < 40) {
+                setTimeout(() => pollOtpStatus(el, attempt + 1), 1500);
+            }
+        })
+        .catch(() => {
+            if (attempt < 40) setTimeout(() => pollOtpStatus(el, attempt + 1), 3000);
+        });
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('[data-otp-status-url]').forEach(el => pollOtpStatus(el));
+});
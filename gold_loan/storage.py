@@ -0,0 +1,85 @@
+import os
+import uuid
+import hashlib
+import logging
+import posixpath
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+logger = logging.getLogger(__name__)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File storage that names every file by the SHA-256 of its content:
+    '<upload_to>/<sha256><ext>'. This is the same scheme the loan wizard uses
+    when it promotes staged uploads (see MediaService.promote).
+
+    Identical files therefore share one name and are written once; a duplicate
+    is recognised from the hash before any bytes are written. Concurrent saves
+    of the same bytes are safe: each writes a private part file and renames it
+    onto the hash name, so the name always holds exactly that content.
+
+    delete() leaves content-addressed files in place: another request may have
+    just been handed the same name by save() without its row being committed
+    yet. Unreferenced files are removed by the orphan collector
+    (MediaService.collect_orphans) once idle for MEDIA_GC_TTL_HOURS.
+    """
+
+    HASH_BLOCK_SIZE = 1024 * 1024
+
+    def content_name(self, name, content):
+        """Content-addressed name for `content` in the directory of `name`"""
+        digest = hashlib.sha256()
+        for chunk in content.chunks(self.HASH_BLOCK_SIZE):
+            digest.update(chunk)
+        content.seek(0)
+
+        directory = posixpath.dirname(name.replace("\\", "/"))
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(directory, f"{digest.hexdigest()}{extension}")
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = self.content_name(self.generate_filename(name), content)
+        if self.exists(name):
+            # Refresh the mtime so the orphan collector's TTL covers the new reference
+            try:
+                os.utime(self.path(name))
+                logger.info(f"Duplicate upload stored once: {name}")
+                return name
+            except FileNotFoundError:
+                pass  # Collected in the meantime; write it again
+
+        return super().save(name, content, max_length=max_length)
+
+    def get_available_name(self, name, max_length=None):
+        # An existing file under a content-addressed name holds these very bytes
+        return name
+
+    def _save(self, name, content):
+        # Write under a unique part name, then rename over the hash name
+        # (atomic; a concurrent writer of the same name wrote the same bytes)
+        partial_name = super()._save(f"{name}.{uuid.uuid4().hex}.part", content)
+        try:
+            os.replace(self.path(partial_name), self.path(name))
+        except OSError:
+            super().delete(partial_name)
+            raise
+        return name
+
+    def delete(self, name):
+        from .media_service import CONTENT_NAME_RE, MediaService
+
+        if not name or CONTENT_NAME_RE.match(posixpath.basename(name)):
+            return  # Left to the orphan collector (see class docstring)
+        if MediaService.reference_count(name) > 0:
+            return  # Legacy name still referenced by another row
+        super().delete(name)
+
+
+content_storage = ContentAddressedStorage()
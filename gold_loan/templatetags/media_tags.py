@@ -0,0 +1,36 @@
+import os
+from django import template
+from django.conf import settings
+from django.urls import reverse
+from django.utils.html import format_html
+
+from ..media_service import MediaService
+
+register = template.Library()
+
+
+def _rendition_url(name, rendition):
+    """Cached file if it already exists, otherwise the view that builds it"""
+    derivative = MediaService.derivative_name(name, rendition)
+    if os.path.exists(MediaService.absolute_path(derivative)):
+        return settings.MEDIA_URL + derivative
+    return reverse("gold_loan:media_derivative", args=[rendition, name])
+
+
+@register.simple_tag
+def image_srcset(field, sizes="160px", rendition=MediaService.RENDITION_THUMB):
+    """
+    Emit src/srcset/sizes attributes for an image field so the browser loads the
+    smallest adequate rendition instead of the full-resolution upload.
+    Usage: <img {% image_srcset img.image sizes="80px" %} alt="...">
+    """
+    if not field:
+        return ""
+
+    name = field.name
+    if not MediaService.has_derivatives(name) or MediaService.is_staged(name):
+        return format_html('src="{}"', field.url)
+
+    urls = {r: _rendition_url(name, r) for r in MediaService.RENDITIONS}
+    srcset = ", ".join(f"{urls[r]} {width}w" for r, width in MediaService.RENDITIONS.items())
+    return format_html('src="{}" srcset="{}" sizes="{}"', urls[rendition], srcset, sizes)
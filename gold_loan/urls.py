@@ -23,6 +23,20 @@ urlpatterns = [
     path("loan/entry/step-4/", views.loan_entry_step4, name="loan_entry_step4"),
     path("loan/entry/step-5/", views.loan_entry_step5, name="loan_entry_step5"),
     path("api/resend-otp/", views.resend_otp_api, name="resend_otp_api"),
+    path("api/otp/<int:otp_id>/status/", views.otp_status_api, name="otp_status_api"),
+    path("api/otp/gateway/status/", views.otp_gateway_status_api, name="otp_gateway_status_api"),
+    path("approvals/", views.approval_queue, name="approval_queue"),
+
+    # Loan Drafts (wizard progress saved server-side)
+    path("loan/drafts/", views.loan_draft_list, name="loan_draft_list"),
+    path("loan/drafts/<int:draft_id>/resume/", views.loan_draft_resume, name="loan_draft_resume"),
+    path("loan/drafts/<int:draft_id>/discard/", views.loan_draft_discard, name="loan_draft_discard"),
+
+    # Resumable uploads for step 2 / step 4 (init -> append -> complete)
+    path("api/uploads/", views.chunked_upload_init, name="chunked_upload_init"),
+    path("api/uploads/<uuid:upload_id>/", views.chunked_upload_status, name="chunked_upload_status"),
+    path("api/uploads/<uuid:upload_id>/append/", views.chunked_upload_append, name="chunked_upload_append"),
+    path("api/uploads/<uuid:upload_id>/complete/", views.chunked_upload_complete, name="chunked_upload_complete"),
 
     # Other Pages
     # Payment
@@ -60,6 +74,9 @@ urlpatterns = [
     path("loan/<int:loan_id>/extend-action/", views.loan_extend_action, name="loan_extend_action"),
     path("api/loan/<int:loan_id>/simulate-interest/", views.simulate_interest, name="simulate_interest"),
     
+    # Image thumbnails / previews (generated on first request)
+    path("media-derivatives/<str:rendition>/<path:name>", views.media_derivative, name="media_derivative"),
+
     # Reports
     path("analytics/export/", views.export_report, name="export_report"),
 ]
@@ -5,21 +5,40 @@ from django.db.models import Q
 from decimal import Decimal, DecimalException, InvalidOperation
 import os
 from django.conf import settings
-from django.core.files.storage import FileSystemStorage
-from django.core.files import File
 from django.db import transaction
 from django.utils import timezone
 from datetime import datetime
 from datetime import timedelta
 from django.db.models import Sum, Count
 import csv
-from .models import Customer, Loan, GoldItem, GoldItemImage, GoldItemBundle, LoanDocument, Payment, LoanExpense, LoanPledge, LoanPledgeAdjustment
+import hashlib
+import logging
+from .models import Customer, Loan, GoldItem, GoldItemImage, GoldItemBundle, LoanDocument, Payment, LoanExpense, LoanPledge, LoanPledgeAdjustment, ChunkedUpload, MediaTask, ApprovalRequest, DeletedRecord
 from .otp_models import OTPRecord
 from .otp_service import OTPService
+from .ratelimit import OTPRateLimit
+from .media_service import MediaService
+from .media_worker import MediaWorker
+from .customer_search import CustomerSearchIndex, CustomerPrefixIndex, CustomerPhoneticSearch
 
+logger = logging.getLogger(__name__)
 
-def get_loan_session(request):
-    return request.session.setdefault("loan_entry", {})
+
+def get_loan_draft(request):
+    """Return the draft Loan the entry wizard is working on, or None"""
+    draft_id = request.session.get("loan_draft_id")
+    if not draft_id:
+        return None
+    return Loan.drafts.select_related("customer").filter(id=draft_id).first()
+
+
+def get_or_create_loan_draft(request):
+    """Return the wizard's draft Loan, starting a new one if needed"""
+    draft = get_loan_draft(request)
+    if draft is None:
+        draft = Loan.drafts.create(loan_number=Loan.generate_draft_number())
+        request.session["loan_draft_id"] = draft.id
+    return draft
 
 def home(request):
     from datetime import date, timedelta
@@ -64,7 +83,9 @@ def home(request):
 
     # 3. Top 10 Customers (by loan count)
     from django.db.models import Count
-    top_customers = Customer.objects.annotate(loan_count=Count('loans')).order_by('-loan_count')[:10]
+    top_customers = Customer.objects.annotate(
+        loan_count=Count('loans', filter=~Q(loans__status=Loan.STATUS_DRAFT))
+    ).order_by('-loan_count')[:10]
     
     # 4. Top 10 Highest Active Loans (by volume)
     top_active_loans = Loan.objects.filter(status=Loan.STATUS_ACTIVE).order_by('-total_amount')[:10]
@@ -90,10 +111,12 @@ def dashboard(request):
         loans = loans.filter(status=Loan.STATUS_ACTIVE)
     elif status_param == "closed":
         # Closed but NOT extended
-        loans = loans.filter(status=Loan.STATUS_CLOSED, extensions__isnull=True)
+        loans = loans.filter(status=Loan.STATUS_CLOSED).exclude(
+            extensions__status__in=[Loan.STATUS_ACTIVE, Loan.STATUS_CLOSED]
+        )
     elif status_param == "extended":
         # Loans that have been extended (are parents to other loans)
-        loans = loans.filter(extensions__isnull=False)
+        loans = loans.filter(extensions__status__in=[Loan.STATUS_ACTIVE, Loan.STATUS_CLOSED])
     elif status_param == "all":
         # No filter
         pass
@@ -116,10 +139,9 @@ def dashboard(request):
     return render(request, "gold_loan/dashboard/dashboard.html", context)
 
 
-# Redirect /loan/ → Step 1
+# Redirect /loan/ → Step 1 (a new draft; earlier ones stay resumable from the drafts list)
 def loan_entry(request):
-    if "loan_entry" in request.session:
-        del request.session["loan_entry"]
+    request.session.pop("loan_draft_id", None)
     return redirect("gold_loan:loan_entry_step1")
 
 
@@ -196,18 +218,32 @@ def loan_close_otp(request, loan_id):
         otp_input = request.POST.get("otp")
         next_action = request.POST.get("next_action", "close") # Preserve from form
 
-        success, message = OTPService.verify_customer_otp(customer.mobile_primary, otp_input)
+        if request.POST.get("approval"):
+            # Approved in the admin's approval queue (audit row already written)
+            success = ApprovalRequest.consume(
+                loan, OTPRecord.OTP_PURPOSE_LOAN_CLOSURE, customer.mobile_primary, next_action
+            )
+            message = "This closure has not been approved in the approval queue."
+        else:
+            allowed, retry_after = OTPRateLimit.allow_verify(request, customer.mobile_primary, OTPRecord.OTP_PURPOSE_LOAN_CLOSURE)
+            if allowed:
+                success, message = OTPService.verify_customer_otp(customer.mobile_primary, otp_input)
+            else:
+                success, message = False, f"Too many attempts. Please try again in {retry_after} seconds."
         
-        if success:
-             # Mark log as verified
-             otp_record = OTPRecord.get_latest_valid_otp(
-                mobile_number=customer.mobile_primary,
-                purpose=OTPRecord.OTP_PURPOSE_LOAN_CLOSURE
-             )
-             if otp_record:
-                 otp_record.is_verified = True
-                 otp_record.verified_at = timezone.now()
-                 otp_record.save()
+            if success:
+                 # Mark log as verified
+                 otp_record = OTPRecord.get_latest_valid_otp(
+                    mobile_number=customer.mobile_primary,
+                    purpose=OTPRecord.OTP_PURPOSE_LOAN_CLOSURE
+                 )
+                 if otp_record:
+                     otp_record.is_verified = True
+                     otp_record.verified_at = timezone.now()
+                     otp_record.save()
+                 # The OTP is used up; the next operation may send a new one straight away
+                 OTPRateLimit.reset_send(customer.mobile_primary, OTPRecord.OTP_PURPOSE_LOAN_CLOSURE)
+                 ApprovalRequest.withdraw(loan, OTPRecord.OTP_PURPOSE_LOAN_CLOSURE)
 
         if success:
             # Set session flag
@@ -223,41 +259,35 @@ def loan_close_otp(request, loan_id):
                 "next_action": next_action
             })
             
-    # GET: Send/Generate OTP
-    # Check if a valid OTP was sent recently (debounce)
-    existing_otp = OTPRecord.get_latest_valid_otp(
-        mobile_number=customer.mobile_primary,
-        purpose=OTPRecord.OTP_PURPOSE_LOAN_CLOSURE
-    )
-    
-    otp_code = None
-    if existing_otp:
-        # If generated less than 60 seconds ago, don't resend
-        if (timezone.now() - existing_otp.created_at).total_seconds() < 60:
-            pass # Wait
-        else:
-            # Expire old one and create new (log only)
-            OTPRecord.create_otp(
+    approval = _queued_approval(request, loan, OTPRecord.OTP_PURPOSE_LOAN_CLOSURE, customer.mobile_primary, next_action)
+    if approval is not None:
+        # Authorized through the approval queue; no SMS for this one
+        otp_record = None
+    else:
+        # GET: Send/Generate OTP (unless one was sent recently: debounce)
+        allowed, _ = OTPRateLimit.allow_send(request, customer.mobile_primary, OTPRecord.OTP_PURPOSE_LOAN_CLOSURE)
+        if allowed:
+            # Expires the previous one and creates a new log
+            otp_record = OTPRecord.create_otp(
                 mobile_number=customer.mobile_primary,
                 purpose=OTPRecord.OTP_PURPOSE_LOAN_CLOSURE,
                 reference_id=str(loan.id),
                 email=customer.email
             )
-            OTPService.send_otp_to_customer(customer.mobile_primary)
-    else:
-        # Create new OTP Log
-        OTPRecord.create_otp(
-            mobile_number=customer.mobile_primary,
-            purpose=OTPRecord.OTP_PURPOSE_LOAN_CLOSURE,
-            reference_id=str(loan.id),
-            email=customer.email
-        )
-        OTPService.send_otp_to_customer(customer.mobile_primary)
+            OTPService.dispatch(otp_record)
+        else:
+            # Show the delivery status of the recent one
+            otp_record = OTPRecord.get_latest_valid_otp(
+                mobile_number=customer.mobile_primary,
+                purpose=OTPRecord.OTP_PURPOSE_LOAN_CLOSURE
+            )
 
     return render(request, "gold_loan/closure/loan_close_otp.html", {
         "loan": loan,
         "next_action": next_action,
-        "mobile_masked": f"xxxxxx{customer.mobile_primary[-4:]}"
+        "mobile_masked": f"xxxxxx{customer.mobile_primary[-4:]}",
+        "otp_record": otp_record,
+        "approval": approval
     })
 
 
@@ -277,12 +307,15 @@ def loan_close_upload(request, loan_id):
         if action == "upload":
             receipt_image = request.FILES.get("receipt_image")
             if receipt_image:
-                LoanDocument.objects.create(
-                    loan=loan,
-                    document_type=LoanDocument.DOCUMENT_CLOSURE,
-                    image=receipt_image,
-                    other_name="Closure Receipt"
-                )
+                with transaction.atomic():
+                    receipt = LoanDocument.objects.create(
+                        loan=loan,
+                        document_type=LoanDocument.DOCUMENT_CLOSURE,
+                        image=receipt_image,
+                        other_name="Closure Receipt"
+                    )
+                    # Stored as uploaded; normalized + thumbnailed by the media worker after commit
+                    MediaWorker.enqueue(MediaTask.TASK_INGEST, [receipt], "image")
                 
         elif action == "delete":
             doc_id = request.POST.get("doc_id")
@@ -352,18 +385,30 @@ def loan_extend_otp(request, loan_id):
         is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
         otp_input = request.POST.get("otp")
 
-        success, message = OTPService.verify_customer_otp(customer.mobile_primary, otp_input)
+        if request.POST.get("approval"):
+            # Approved in the admin's approval queue (audit row already written)
+            success = ApprovalRequest.consume(loan, OTPRecord.OTP_PURPOSE_LOAN_EXTENSION, customer.mobile_primary)
+            message = "This extension has not been approved in the approval queue."
+        else:
+            allowed, retry_after = OTPRateLimit.allow_verify(request, customer.mobile_primary, OTPRecord.OTP_PURPOSE_LOAN_EXTENSION)
+            if allowed:
+                success, message = OTPService.verify_customer_otp(customer.mobile_primary, otp_input)
+            else:
+                success, message = False, f"Too many attempts. Please try again in {retry_after} seconds."
         
-        if success:
-             # Mark log as verified
-             otp_record = OTPRecord.get_latest_valid_otp(
-                mobile_number=customer.mobile_primary,
-                purpose=OTPRecord.OTP_PURPOSE_LOAN_EXTENSION
-             )
-             if otp_record:
-                 otp_record.is_verified = True
-                 otp_record.verified_at = timezone.now()
-                 otp_record.save()
+            if success:
+                 # Mark log as verified
+                 otp_record = OTPRecord.get_latest_valid_otp(
+                    mobile_number=customer.mobile_primary,
+                    purpose=OTPRecord.OTP_PURPOSE_LOAN_EXTENSION
+                 )
+                 if otp_record:
+                     otp_record.is_verified = True
+                     otp_record.verified_at = timezone.now()
+                     otp_record.save()
+                 # The OTP is used up; the next operation may send a new one straight away
+                 OTPRateLimit.reset_send(customer.mobile_primary, OTPRecord.OTP_PURPOSE_LOAN_EXTENSION)
+                 ApprovalRequest.withdraw(loan, OTPRecord.OTP_PURPOSE_LOAN_EXTENSION)
 
         if success:
              if is_ajax: return JsonResponse({'success': True, 'redirect_url': reverse("gold_loan:loan_extend_action", args=[loan.id])})
@@ -375,36 +420,32 @@ def loan_extend_otp(request, loan_id):
                 "error": message
              })
              
-    # GET: Send/Generate OTP
-    # Check debouncing
-    existing_otp = OTPRecord.get_latest_valid_otp(
-        mobile_number=customer.mobile_primary,
-        purpose=OTPRecord.OTP_PURPOSE_LOAN_EXTENSION
-    )
-    
-    if existing_otp:
-        if (timezone.now() - existing_otp.created_at).total_seconds() >= 60:
-             # Resend if > 60s
-            OTPRecord.create_otp(
+    approval = _queued_approval(request, loan, OTPRecord.OTP_PURPOSE_LOAN_EXTENSION, customer.mobile_primary)
+    if approval is not None:
+        # Authorized through the approval queue; no SMS for this one
+        otp_record = None
+    else:
+        # GET: Send/Generate OTP (unless one was sent recently: debounce)
+        allowed, _ = OTPRateLimit.allow_send(request, customer.mobile_primary, OTPRecord.OTP_PURPOSE_LOAN_EXTENSION)
+        if allowed:
+            otp_record = OTPRecord.create_otp(
                 mobile_number=customer.mobile_primary,
                 purpose=OTPRecord.OTP_PURPOSE_LOAN_EXTENSION,
                 reference_id=str(loan.id),
                 email=customer.email
             )
-            OTPService.send_otp_to_customer(customer.mobile_primary)
-    else:
-        # Create new
-        OTPRecord.create_otp(
-            mobile_number=customer.mobile_primary,
-            purpose=OTPRecord.OTP_PURPOSE_LOAN_EXTENSION,
-            reference_id=str(loan.id),
-            email=customer.email
-        )
-        OTPService.send_otp_to_customer(customer.mobile_primary)
+            OTPService.dispatch(otp_record)
+        else:
+            otp_record = OTPRecord.get_latest_valid_otp(
+                mobile_number=customer.mobile_primary,
+                purpose=OTPRecord.OTP_PURPOSE_LOAN_EXTENSION
+            )
     
     return render(request, "gold_loan/loan/loan_extend_otp.html", {
         "loan": loan,
-        "mobile_masked": f"xxxxxx{customer.mobile_primary[-4:]}"
+        "mobile_masked": f"xxxxxx{customer.mobile_primary[-4:]}",
+        "otp_record": otp_record,
+        "approval": approval
     })
 
 
@@ -422,26 +463,168 @@ def loan_extend_action(request, loan_id):
         messages.error(request, "This loan has already been extended once. Multiple extensions are not allowed.")
         return redirect("gold_loan:loan_view", loan_id=loan.id)
         
-    # Redirect to Step 1 with existing customer
-    session = get_loan_session(request)
-    session.clear() # Clear any staled session
-    
-    # Pre-select customer
-    request.session["loan_entry"] = {
-        "existing_customer_id": loan.customer.id,
-        "parent_loan_id": loan.id
-    }
-    request.session.modified = True
-    
-    return redirect(f"/loan/entry/step-1/?customer_id={loan.customer.id}")
-    
+    # Start (or resume) the extension draft. The pledged gold is unchanged, so a
+    # new draft starts as a copy of the parent loan and the operator only reviews it.
+    draft = Loan.drafts.filter(parent_loan=loan).first()
+    if draft is None:
+        with transaction.atomic():
+            draft = Loan.drafts.create(
+                loan_number=Loan.generate_draft_number(),
+                customer=loan.customer,
+                parent_loan=loan,
+                lot_number=loan.lot_number,
+                interest_rate=loan.interest_rate,
+                price_per_gram=loan.price_per_gram,
+                approved_grams=loan.approved_grams,
+                total_amount=loan.total_amount
+            )
+            _carry_over_parent_loan(draft, loan)
+    request.session["loan_draft_id"] = draft.id
 
+    step = _draft_next_step(draft)
+    if step == 1:
+        return redirect(f"{reverse('gold_loan:loan_entry_step1')}?customer_id={loan.customer.id}")
+    # Land on the loan terms; items and documents are one step back if they need changes
+    return redirect(f"gold_loan:loan_entry_step{min(step, 3)}")
 
 
+def _carry_over_parent_loan(draft, parent):
+    """
+    Clone the parent loan's gold items, bundles, item images and documents into
+    an extension draft with one bulk query per model. Images and scans keep
+    pointing at the parent's files; nothing is copied on disk.
+    """
+    item_fields = ("item_name", "carat", "gross_weight", "approved_net_weight", "description")
+
+    parent_items = list(parent.items.select_related("bundle").prefetch_related("images").order_by("id"))
+    clones = GoldItem.objects.bulk_create([
+        GoldItem(loan=draft, **{f: getattr(item, f) for f in item_fields})
+        for item in parent_items
+    ])
+
+    GoldItemBundle.objects.bulk_create([
+        GoldItemBundle(gold_item=clone, item_count=item.bundle.item_count)
+        for item, clone in zip(parent_items, clones)
+        if hasattr(item, "bundle")
+    ])
+    GoldItemImage.objects.bulk_create([
+        GoldItemImage(gold_item=clone, image=image.image.name)
+        for item, clone in zip(parent_items, clones)
+        for image in item.images.all()
+    ])
+
+    # Closure receipts belong to the parent loan only
+    LoanDocument.objects.bulk_create([
+        LoanDocument(loan=draft, document_type=doc.document_type, other_name=doc.other_name, image=doc.image.name)
+        for doc in parent.documents.exclude(document_type=LoanDocument.DOCUMENT_CLOSURE).order_by("id")
+    ])
+
+
+# =========================
+# LOAN DRAFTS
+# =========================
+
+def loan_draft_list(request):
+    """
+    List loans that were started in the entry wizard but not yet approved.
+    """
+    drafts = Loan.drafts.select_related("customer", "parent_loan").annotate(
+        item_count=Count("items", distinct=True),
+        document_count=Count("documents", distinct=True)
+    ).order_by("-updated_at")
+
+    return render(request, "gold_loan/loan/draft_list.html", {
+        "drafts": drafts,
+        "title": "Draft Loans"
+    })
+
+
+def loan_draft_resume(request, draft_id):
+    """
+    Point the wizard at an existing draft and continue from its first incomplete step.
+    """
+    draft = get_object_or_404(Loan.drafts, id=draft_id)
+    request.session["loan_draft_id"] = draft.id
+
+    step = _draft_next_step(draft)
+    if step == 1 and draft.customer_id:
+        return redirect(f"{reverse('gold_loan:loan_entry_step1')}?customer_id={draft.customer_id}")
+    return redirect(f"gold_loan:loan_entry_step{step}")
+
+
+def loan_draft_discard(request, draft_id):
+    """
+    Delete an abandoned draft (items, images and documents cascade).
+    """
+    if request.method != "POST":
+        return redirect("gold_loan:loan_draft_list")
+
+    draft = get_object_or_404(Loan.drafts, id=draft_id)
+    draft.delete()
+
+    if request.session.get("loan_draft_id") == draft_id:
+        del request.session["loan_draft_id"]
+
+    messages.success(request, "Draft discarded.")
+    return redirect("gold_loan:loan_draft_list")
+
+
+def _draft_next_step(draft):
+    """First wizard step the draft has not completed yet (1-5)"""
+    if not draft.customer_id and not draft.draft_customer_data:
+        return 1
+    if not draft.items.exists():
+        return 2
+    if not draft.lot_number:
+        return 3
+    if not draft.documents.exists():
+        return 4
+    return 5
+
+
+def _draft_items_context(draft):
+    """Gold items of a draft, shaped as the step 2 form expects them"""
+    if draft is None:
+        return []
+
+    items = []
+    for item in draft.items.select_related("bundle").prefetch_related("images").order_by("id"):
+        items.append({
+            "item_name": item.item_name,
+            "carat": item.carat,
+            "gross_weight": item.gross_weight,
+            "approved_net_weight": item.approved_net_weight,
+            "item_count": item.bundle.item_count if hasattr(item, "bundle") else 1,
+            "description": item.description,
+            "images": [img.image.name for img in item.images.all()],
+        })
+    return items
+
+
+def _draft_documents_context(draft):
+    """Documents of a draft, shaped as the step 4 form expects them"""
+    if draft is None:
+        return []
+
+    return [
+        {
+            "document_type": doc.document_type,
+            "other_name": doc.other_name,
+            "image": doc.image.name or None,
+        }
+        for doc in draft.documents.order_by("id")
+    ]
+
+
+def _draft_total_approved_grams(draft):
+    if draft is None:
+        return Decimal("0")
+    return draft.items.aggregate(total=Sum("approved_net_weight"))["total"] or Decimal("0")
 
 
 def loan_entry_step1(request):
-    session = get_loan_session(request)
+    draft = get_loan_draft(request)
+    draft_customer = (draft.draft_customer_data if draft else None) or {}
 
     if request.method == "POST":
         # Check if existing customer was selected
@@ -451,17 +634,17 @@ def loan_entry_step1(request):
             # Use existing customer
             try:
                 customer = Customer.objects.get(id=existing_customer_id)
-                session["existing_customer_id"] = existing_customer_id
-                session["customer"] = None  # Clear any new customer data
-                session["customer_photo"] = None
-                request.session.modified = True
+                draft = get_or_create_loan_draft(request)
+                draft.customer = customer
+                draft.draft_customer_data = None  # Clear any new customer data
+                draft.save(update_fields=["customer", "draft_customer_data", "updated_at"])
                 return redirect("gold_loan:loan_entry_step2")
             except Customer.DoesNotExist:
                 return render(request, "gold_loan/loan/step1_personal.html", {
                     "error": "Selected customer not found"
                 })
         
-        # NEW CUSTOMER - validate and save to session
+        # NEW CUSTOMER - validate and save to the draft
         mobile_primary = request.POST.get("mobile_primary", "")
         aadhaar_number = request.POST.get("aadhaar_number", "")
         
@@ -500,31 +683,23 @@ def loan_entry_step1(request):
             "nominee_mobile": request.POST.get("nominee_mobile"),
         }
 
-        # Save customer photo to temp location
+        # Save customer photo to temp location (keep the draft's photo if none re-uploaded)
         photo = request.FILES.get("customer_photo")
-        photo_path = None
+        photo_path = draft_customer.get("photo")
         
         if photo:
-            # Ensure temp directory exists
-            temp_loc = os.path.join(settings.MEDIA_ROOT, "temp_customers")
-            if not os.path.exists(temp_loc):
-                os.makedirs(temp_loc, exist_ok=True)
-                
-            fs = FileSystemStorage(location=temp_loc)
-            filename = fs.save(photo.name, photo)
-            photo_path = f"temp_customers/{filename}"
+            photo_path = MediaService.stage_upload(photo, MediaService.STAGING_CUSTOMERS)
 
-        session["customer"] = customer_data
-        session["customer_photo"] = photo_path
-        session["existing_customer_id"] = None  # Clear existing customer
-
-        request.session.modified = True
+        draft = get_or_create_loan_draft(request)
+        draft.customer = None  # Clear existing customer
+        draft.draft_customer_data = {**customer_data, "photo": photo_path}
+        draft.save(update_fields=["customer", "draft_customer_data", "updated_at"])
 
         return redirect("gold_loan:loan_entry_step2")
 
     # Handle pre-selected customer for extension or other flows
     preselected_customer = None
-    existing_id = request.GET.get("customer_id") or session.get("existing_customer_id")
+    existing_id = request.GET.get("customer_id") or (draft.customer_id if draft else None)
     if existing_id:
         try:
             preselected_customer = Customer.objects.get(id=existing_id)
@@ -533,16 +708,19 @@ def loan_entry_step1(request):
 
     return render(request, "gold_loan/loan/step1_personal.html", {
         "preselected_customer": preselected_customer,
-        "existing_data": session.get("customer"),
-        "customer_photo": session.get("customer_photo")
+        "existing_data": draft_customer or None,
+        "customer_photo": draft_customer.get("photo")
     })
 
 
 
 def loan_entry_step2(request):
-    session = get_loan_session(request)
+    draft = get_loan_draft(request)
 
     if request.method == "POST":
+        if draft is None:
+            return redirect("gold_loan:loan_entry_step1")
+
         items = []
 
         names = request.POST.getlist("item_name[]")
@@ -552,12 +730,13 @@ def loan_entry_step2(request):
         item_counts = request.POST.getlist("item_count[]")
         descriptions = request.POST.getlist("description[]")
 
-        # Ensure temp directory exists
-        temp_dir = os.path.join(settings.MEDIA_ROOT, "temp_items")
-        os.makedirs(temp_dir, exist_ok=True)
-        fs = FileSystemStorage(location=temp_dir)
+        existing_items = _draft_items_context(draft)
 
-        existing_items = session.get("items", [])
+        # Images already sent by the background uploader (staged names)
+        uploaded_by_item = [request.POST.getlist(f"item_images_{i}_staged[]") for i in range(len(names))]
+        claimed = _claimed_uploads(
+            draft, ChunkedUpload.PURPOSE_ITEM, [name for group in uploaded_by_item for name in group]
+        )
 
         for index in range(len(names)):
             gross = Decimal(gross_weights[index])
@@ -601,6 +780,7 @@ def loan_entry_step2(request):
 
             # Get images for this specific item
             new_images = request.FILES.getlist(f"item_images_{index}[]")
+            uploaded_images = [name for name in uploaded_by_item[index] if name in claimed]
             
             # Check existing images for this card if available
             existing_image_paths = []
@@ -608,7 +788,7 @@ def loan_entry_step2(request):
                 existing_image_paths = existing_items[index].get("images", [])
 
             # Total images (new + existing)
-            if len(new_images) + len(existing_image_paths) < 1:
+            if len(new_images) + len(uploaded_images) + len(existing_image_paths) < 1:
                 # Build current items from POST data to preserve user input
                 current_items = []
                 for i in range(len(names)):
@@ -626,51 +806,107 @@ def loan_entry_step2(request):
                     "items": current_items
                 })
 
-            image_paths = list(existing_image_paths) # Keep existing ones
-            for img in new_images:
-                filename = fs.save(img.name, img)
-                image_paths.append(f"temp_items/{filename}")
+            new_image_paths = uploaded_images + [
+                MediaService.stage_upload(img, MediaService.STAGING_ITEMS)
+                for img in new_images
+            ]
 
             items.append({
                 "item_name": names[index],
-                "carat": int(carats[index]),  # Store as integer for template comparison
-                "gross_weight": gross_weights[index],
-                "approved_net_weight": approved_weights[index],
+                "carat": int(carats[index]),
+                "gross_weight": gross,
+                "approved_net_weight": approved,
                 "item_count": int(item_counts[index]) if index < len(item_counts) else 1,
                 "description": descriptions[index],
-                "images": image_paths,
+                "new_images": new_image_paths,
             })
 
-        session["items"] = items
-        request.session.modified = True
+        _save_draft_items(draft, items)
 
         return redirect("gold_loan:loan_entry_step3")
 
     return render(request, "gold_loan/loan/step2_items.html", {
-        "items": session.get("items", [])
+        "items": _draft_items_context(draft)
     })
 
 
+def _save_draft_items(draft, items):
+    """
+    Write step 2 into the draft: items are matched to the draft's existing
+    rows by position, so only changed rows, new rows and new images are written.
+    Every model is written with one bulk query, so the number of statements
+    does not grow with the number of items or photos.
+    """
+    fields = ("item_name", "carat", "gross_weight", "approved_net_weight", "description")
+
+    with transaction.atomic():
+        existing_rows = list(draft.items.select_related("bundle").order_by("id"))
+
+        changed_items, changed_fields = [], set()
+        changed_bundles = []
+        new_items = []
+
+        for index, item_data in enumerate(items[:len(existing_rows)]):
+            gold_item = existing_rows[index]
+            changed = [f for f in fields if getattr(gold_item, f) != item_data[f]]
+            if changed:
+                for f in changed:
+                    setattr(gold_item, f, item_data[f])
+                changed_items.append(gold_item)
+                changed_fields.update(changed)
+
+            bundle = getattr(gold_item, "bundle", None)
+            if bundle is None:
+                new_items.append((gold_item, item_data))  # Only the bundle is missing
+            elif bundle.item_count != item_data["item_count"]:
+                bundle.item_count = item_data["item_count"]
+                changed_bundles.append(bundle)
+
+        if changed_items:
+            GoldItem.objects.bulk_update(changed_items, sorted(changed_fields))
+        GoldItemBundle.objects.bulk_update(changed_bundles, ["item_count"])
+
+        # New items: primary keys come back from bulk_create so bundles and images can link
+        created = GoldItem.objects.bulk_create([
+            GoldItem(loan=draft, **{f: item_data[f] for f in fields})
+            for item_data in items[len(existing_rows):]
+        ])
+        new_items.extend(zip(created, items[len(existing_rows):]))
+
+        GoldItemBundle.objects.bulk_create([
+            GoldItemBundle(gold_item=gold_item, item_count=item_data["item_count"])
+            for gold_item, item_data in new_items
+        ])
+
+        all_rows = existing_rows[:len(items)] + created
+        GoldItemImage.objects.bulk_create([
+            GoldItemImage(gold_item=gold_item, image=path)
+            for gold_item, item_data in zip(all_rows, items)
+            for path in item_data["new_images"]
+        ])
+
+        # Items removed from the form
+        removed_ids = [row.id for row in existing_rows[len(items):]]
+        if removed_ids:
+            GoldItem.objects.filter(id__in=removed_ids).delete()
+
+        draft.save(update_fields=["updated_at"])
 
 
 def loan_entry_step3(request):
-    session = get_loan_session(request)
+    draft = get_loan_draft(request)
 
     if request.method == "POST":
+        if draft is None:
+            return redirect("gold_loan:loan_entry_step1")
+
+        total_approved_grams = _draft_total_approved_grams(draft)
+
         try:
             approved_grams = Decimal(request.POST.get("approved_grams"))
             price_per_gram = Decimal(request.POST.get("price_per_gram"))
             interest_rate = Decimal(request.POST.get("interest_rate", "0"))
         except (ValueError, TypeError, DecimalException):
-            # Recalculate total_approved_grams for context if an error occurs here
-            total_approved_grams_for_context = Decimal("0")
-            items = session.get("items", [])
-            for item in items:
-                approved_weight = item.get("approved_net_weight", "0")
-                try:
-                    total_approved_grams_for_context += Decimal(approved_weight)
-                except:
-                    pass
             # Preserve user input from POST data
             loan_data = {
                 "lot_number": request.POST.get("lot_number", ""),
@@ -679,20 +915,11 @@ def loan_entry_step3(request):
             }
             return render(request, "gold_loan/loan/step3_loan.html", {
                 "error": "Invalid numeric values provided.",
-                "total_approved_grams": total_approved_grams_for_context,
+                "total_approved_grams": total_approved_grams,
                 "loan_data": loan_data
             })
 
         if price_per_gram <= 0 or interest_rate < 0:
-            # Recalculate total_approved_grams for context if an error occurs here
-            total_approved_grams_for_context = Decimal("0")
-            items = session.get("items", [])
-            for item in items:
-                approved_weight = item.get("approved_net_weight", "0")
-                try:
-                    total_approved_grams_for_context += Decimal(approved_weight)
-                except:
-                    pass
             # Preserve user input from POST data
             loan_data = {
                 "lot_number": request.POST.get("lot_number", ""),
@@ -701,7 +928,7 @@ def loan_entry_step3(request):
             }
             return render(request, "gold_loan/loan/step3_loan.html", {
                 "error": "Price per gram must be positive and Interest rate cannot be negative.",
-                "total_approved_grams": total_approved_grams_for_context,
+                "total_approved_grams": total_approved_grams,
                 "loan_data": loan_data
             })
 
@@ -710,44 +937,35 @@ def loan_entry_step3(request):
         occupied = Loan.objects.filter(lot_number=lot_number).exclude(status=Loan.STATUS_CLOSED).exists()
         
         if occupied:
-            # Recalculate context for error
-            total_approved_grams_for_context = Decimal("0")
-            items = session.get("items", [])
-            for item in items:
-                try: total_approved_grams_for_context += Decimal(item.get("approved_net_weight", "0"))
-                except: pass
-            
             return render(request, "gold_loan/loan/step3_loan.html", {
                 "error": f"Lot Number '{lot_number}' is already in use by another active loan record.",
-                "total_approved_grams": total_approved_grams_for_context,
+                "total_approved_grams": total_approved_grams,
                 "loan_data": request.POST
             })
 
-        session["loan"] = {
-            "lot_number": lot_number,
-            "interest_rate": request.POST.get("interest_rate"),
-            "price_per_gram": str(price_per_gram),
-            "approved_grams": str(approved_grams),
-            "total_amount": str(approved_grams * price_per_gram),
-        }
+        draft.lot_number = lot_number
+        draft.interest_rate = interest_rate
+        draft.price_per_gram = price_per_gram
+        draft.approved_grams = approved_grams
+        draft.total_amount = approved_grams * price_per_gram
+        draft.save(update_fields=[
+            "lot_number", "interest_rate", "price_per_gram",
+            "approved_grams", "total_amount", "updated_at"
+        ])
 
-        request.session.modified = True
         return redirect("gold_loan:loan_entry_step4")
 
-    # Calculate total approved grams from items in step 2
-    total_approved_grams = Decimal("0")
-    items = session.get("items", [])
-    
-    for item in items:
-        approved_weight = item.get("approved_net_weight", "0")
-        try:
-            total_approved_grams += Decimal(approved_weight)
-        except:
-            pass
-    
+    loan_data = None
+    if draft and draft.lot_number:
+        loan_data = {
+            "lot_number": draft.lot_number,
+            "interest_rate": draft.interest_rate,
+            "price_per_gram": draft.price_per_gram,
+        }
+
     context = {
-        "total_approved_grams": total_approved_grams,
-        "loan_data": session.get("loan"),
+        "total_approved_grams": _draft_total_approved_grams(draft),
+        "loan_data": loan_data,
         "loan_number": Loan.generate_loan_number()
     }
 
@@ -756,42 +974,48 @@ def loan_entry_step3(request):
 
 
 def loan_entry_step4(request):
-    session = get_loan_session(request)
+    draft = get_loan_draft(request)
 
     if request.method == "POST":
+        if draft is None:
+            return redirect("gold_loan:loan_entry_step1")
+
         docs = []
 
         types = request.POST.getlist("document_type[]")
         names = request.POST.getlist("other_document_name[]")
         images = request.FILES.getlist("document_image[]")
 
-        # Ensure temp directory exists
-        temp_dir = os.path.join(settings.MEDIA_ROOT, "temp_documents")
-        os.makedirs(temp_dir, exist_ok=True)
-        fs = FileSystemStorage(location=temp_dir)
+        existing_docs = _draft_documents_context(draft)
+
+        # One staged name per row ('' if the row's scan was not sent in the background)
+        uploaded_docs = request.POST.getlist("document_image_staged[]")
+        claimed = _claimed_uploads(draft, ChunkedUpload.PURPOSE_DOCUMENT, uploaded_docs)
 
         if not types:
             return render(request, "gold_loan/loan/step4_documents.html", {
                 "error": "At least one document is required.",
-                "documents": session.get("documents", [])
+                "documents": existing_docs
             })
 
-        existing_docs = session.get("documents", [])
-
         for i in range(len(types)):
             # Get new image if uploaded
             try:
-                doc_image = request.FILES.getlist("document_image[]")[i]
+                doc_image = images[i]
             except (IndexError, KeyError):
                 doc_image = None
             
+            uploaded_name = uploaded_docs[i] if i < len(uploaded_docs) else ""
+            if uploaded_name not in claimed:
+                uploaded_name = None
+
             # Check existing image for this row
             existing_image_path = None
             if i < len(existing_docs):
                 existing_image_path = existing_docs[i].get("image")
 
             # Error if no image exists anywhere
-            if not doc_image and not existing_image_path:
+            if not doc_image and not uploaded_name and not existing_image_path:
                 # Build current documents from POST data to preserve user input
                 current_docs = []
                 for j in range(len(types)):
@@ -806,9 +1030,10 @@ def loan_entry_step4(request):
                 })
             
             image_path = existing_image_path
-            if doc_image:
-                filename = fs.save(doc_image.name, doc_image)
-                image_path = f"temp_documents/{filename}"
+            if uploaded_name:
+                image_path = uploaded_name
+            elif doc_image:
+                image_path = MediaService.stage_upload(doc_image, MediaService.STAGING_DOCUMENTS)
 
             docs.append({
                 "document_type": types[i],
@@ -816,63 +1041,148 @@ def loan_entry_step4(request):
                 "image": image_path,
             })
 
-        session["documents"] = docs
-        request.session.modified = True
+        _save_draft_documents(draft, docs)
 
         return redirect("gold_loan:loan_entry_step5")
 
     return render(request, "gold_loan/loan/step4_documents.html", {
-        "documents": session.get("documents", [])
+        "documents": _draft_documents_context(draft)
     })
 
 
+def _save_draft_documents(draft, docs):
+    """
+    Write step 4 into the draft, matching rows by position like _save_draft_items.
+    """
+    with transaction.atomic():
+        existing_rows = list(draft.documents.order_by("id"))
+        new_rows = []
+        changed_rows, changed_fields = [], set()
+
+        for index, doc_data in enumerate(docs):
+            if index < len(existing_rows):
+                document = existing_rows[index]
+                changed = []
+                if document.document_type != doc_data["document_type"]:
+                    document.document_type = doc_data["document_type"]
+                    changed.append("document_type")
+                if document.other_name != doc_data["other_name"]:
+                    document.other_name = doc_data["other_name"]
+                    changed.append("other_name")
+                if document.image.name != doc_data["image"]:
+                    document.image = doc_data["image"]
+                    changed.append("image")
+                if changed:
+                    changed_rows.append(document)
+                    changed_fields.update(changed)
+            else:
+                new_rows.append(LoanDocument(loan=draft, **doc_data))
+
+        if changed_rows:
+            LoanDocument.objects.bulk_update(changed_rows, sorted(changed_fields))
+        LoanDocument.objects.bulk_create(new_rows)
+
+        # Documents removed from the form
+        removed_ids = [row.id for row in existing_rows[len(docs):]]
+        if removed_ids:
+            LoanDocument.objects.filter(id__in=removed_ids).delete()
+
+        draft.save(update_fields=["updated_at"])
+
+
+def _promote_draft_media(draft):
+    """
+    Move the draft's staged item images and documents to their final upload_to
+    directories. Files are hard-linked, never re-read; only names are updated.
+
+    Returns:
+        tuple: (all item images, all documents) of the draft
+    """
+    image_field = GoldItemImage._meta.get_field("image")
+    images = list(GoldItemImage.objects.filter(gold_item__loan=draft).only("id", "gold_item_id", "image"))
+    moved_images = []
+    for image in images:
+        final_name = MediaService.promote(image.image.name, image_field)
+        if final_name != image.image.name:
+            image.image = final_name
+            moved_images.append(image)
+    GoldItemImage.objects.bulk_update(moved_images, ["image"])
+
+    document_field = LoanDocument._meta.get_field("image")
+    documents = list(draft.documents.only("id", "loan_id", "image"))
+    moved_documents = []
+    for document in documents:
+        final_name = MediaService.promote(document.image.name, document_field)
+        if final_name != document.image.name:
+            document.image = final_name
+            moved_documents.append(document)
+    LoanDocument.objects.bulk_update(moved_documents, ["image"])
+
+    return images, documents
+
+
 
 
 def loan_entry_step5(request):
-    session = request.session.get("loan_entry")
+    draft = get_loan_draft(request)
 
-    if not session:
+    if not draft:
         return redirect("gold_loan:loan_entry_step1")
 
+    # Send the operator back to the first incomplete step
+    next_step = _draft_next_step(draft)
+    if next_step < 5:
+        return redirect(f"gold_loan:loan_entry_step{next_step}")
+
     # Resolve Customer Info for OTP
-    existing_customer_id = session.get("existing_customer_id")
     mobile_number = None
     email = None
     customer_name = "Customer"
+    draft_customer = draft.draft_customer_data or {}
     
-    if existing_customer_id:
-        try:
-             c = Customer.objects.get(id=existing_customer_id)
-             mobile_number = c.mobile_primary
-             email = c.email
-             customer_name = c.name
-        except Customer.DoesNotExist:
-             return redirect("gold_loan:loan_entry_step1")
-    elif "customer" in session:
-        mobile_number = session["customer"].get("mobile_primary")
-        email = session["customer"].get("email")
-        customer_name = session["customer"].get("name", "New Customer")
+    if draft.customer_id:
+        mobile_number = draft.customer.mobile_primary
+        email = draft.customer.email
+        customer_name = draft.customer.name
+    elif draft_customer:
+        mobile_number = draft_customer.get("mobile_primary")
+        email = draft_customer.get("email")
+        customer_name = draft_customer.get("name", "New Customer")
     
     if not mobile_number:
-         messages.error(request, "Mobile number missing from session.")
+         messages.error(request, "Mobile number missing from draft.")
          return redirect("gold_loan:loan_entry_step1")
 
     if request.method == "POST":
         is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
         otp_input = request.POST.get("otp")
+        use_approval = bool(request.POST.get("approval"))
 
-        success, message = OTPService.verify_customer_otp(mobile_number, otp_input)
+        if use_approval:
+            # Approved in the admin's approval queue; used up below, with the loan
+            approval = ApprovalRequest.current(draft, OTPRecord.OTP_PURPOSE_LOAN_CREATION, mobile_number)
+            success = approval is not None and approval.status == ApprovalRequest.STATUS_APPROVED
+            message = "This loan has not been approved in the approval queue."
+        else:
+            allowed, retry_after = OTPRateLimit.allow_verify(request, mobile_number, OTPRecord.OTP_PURPOSE_LOAN_CREATION)
+            if allowed:
+                success, message = OTPService.verify_customer_otp(mobile_number, otp_input)
+            else:
+                success, message = False, f"Too many attempts. Please try again in {retry_after} seconds."
         
-        if success:
-             # Mark log as verified
-             otp_record = OTPRecord.get_latest_valid_otp(
-                mobile_number=mobile_number,
-                purpose=OTPRecord.OTP_PURPOSE_LOAN_CREATION
-             )
-             if otp_record:
-                 otp_record.is_verified = True
-                 otp_record.verified_at = timezone.now()
-                 otp_record.save()
+            if success:
+                 # Mark log as verified
+                 otp_record = OTPRecord.get_latest_valid_otp(
+                    mobile_number=mobile_number,
+                    purpose=OTPRecord.OTP_PURPOSE_LOAN_CREATION
+                 )
+                 if otp_record:
+                     otp_record.is_verified = True
+                     otp_record.verified_at = timezone.now()
+                     otp_record.save()
+                 # The OTP is used up; the next operation may send a new one straight away
+                 OTPRateLimit.reset_send(mobile_number, OTPRecord.OTP_PURPOSE_LOAN_CREATION)
+                 ApprovalRequest.withdraw(draft, OTPRecord.OTP_PURPOSE_LOAN_CREATION)
         
         if not success:
             if is_ajax: return JsonResponse({'success': False, 'error': message})
@@ -883,126 +1193,79 @@ def loan_entry_step5(request):
 
         try:
             with transaction.atomic():
+                # Rolled back with the loan if anything below fails
+                if use_approval and not ApprovalRequest.consume(draft, OTPRecord.OTP_PURPOSE_LOAN_CREATION, mobile_number):
+                    raise ValueError("The admin approval is no longer valid. Please request approval again.")
+
                 # -----------------------
                 # CUSTOMER
                 # -----------------------
-                existing_customer_id = session.get("existing_customer_id")
+                customer = draft.customer
                 
-                if existing_customer_id:
-                    # Use existing customer
-                    customer = Customer.objects.get(id=existing_customer_id)
-                else:
+                if customer is None:
                     # Create or GET existing customer by mobile
-                    customer_data = session["customer"].copy()
+                    customer_data = dict(draft_customer)
+                    customer_photo_path = customer_data.pop("photo", None)
                     mobile = customer_data.get("mobile_primary")
                     
                     # Try to find existing first to avoid IntegrityError
                     customer = Customer.objects.filter(mobile_primary=mobile).first()
                     
                     if not customer:
-                        # Handle customer photo
-                        customer_photo_path = session.get("customer_photo")
-                        
-                        # Create customer first without photo
-                        customer = Customer.objects.create(**customer_data)
-                        
                         if customer_photo_path:
-                            # Construct full path to temp file
-                            full_temp_path = os.path.join(settings.MEDIA_ROOT, customer_photo_path)
-                            
-                            if os.path.exists(full_temp_path):
-                                with open(full_temp_path, 'rb') as f:
-                                    # Save to model field - this moves it to 'customers/photos/' as per model definition
-                                    customer.photo.save(os.path.basename(customer_photo_path), File(f), save=True)
-                                
-                                # Clean up temp file
-                                try:
-                                    os.remove(full_temp_path)
-                                except OSError:
-                                    pass
+                            # Link the staged photo into 'customers/photos/' (no byte copy)
+                            customer_data["photo"] = MediaService.promote(
+                                customer_photo_path, Customer._meta.get_field("photo")
+                            )
+                        customer = Customer.objects.create(**customer_data)
                     else:
                         # Customer exists, update their details if necessary? 
                         # For now, just use the existing record to allow the loan to proceed.
                         logger.info(f"Linking loan to existing customer found by mobile: {mobile}")
 
+                # An extension may only be approved once per parent loan
+                if draft.parent_loan_id and Loan.objects.filter(parent_loan_id=draft.parent_loan_id).exists():
+                    raise ValueError("This loan has already been extended once. Multiple extensions are not allowed.")
 
                 # -----------------------
-                # LOAN
+                # LOAN (promote the draft; items, images and documents are already attached)
                 # -----------------------
-                loan_data = session["loan"]
                 
                 # Initial Interest Logic
                 now = timezone.now()
                 # 10 Days interest upfront
                 # Formula: (principal * rate * 10) / (365 * 100)
-                principal = Decimal(loan_data["total_amount"])
-                rate = Decimal(loan_data["interest_rate"])
+                principal = Decimal(draft.total_amount)
+                rate = Decimal(draft.interest_rate)
                 initial_interest = (principal * rate * 10) / (Decimal("365") * Decimal("100"))
                 initial_interest = round(initial_interest, 2)
 
                 loan_start = now
                 interest_lock = now + timedelta(days=10)
 
-                loan = Loan.objects.create(
-                    customer=customer,
-                    lot_number=loan_data["lot_number"], # Use chosen lot number
-                    loan_number=Loan.generate_loan_number(),
-                    interest_rate=loan_data["interest_rate"],
-                    price_per_gram=loan_data["price_per_gram"],
-                    approved_grams=loan_data["approved_grams"],
-                    total_amount=loan_data["total_amount"],
-                    status=Loan.STATUS_ACTIVE,
-                    
-                    # Interest Logic Fields
-                    pending_interest=initial_interest,
-                    loan_start_date=loan_start,
-                    interest_lock_until=interest_lock,
-                    last_interest_calculated_at=loan_start,
-                    parent_loan_id=session.get("parent_loan_id")
-                )
+                images, documents = _promote_draft_media(draft)
+                draft.chunked_uploads.all().delete()
 
-                # -----------------------
-                # GOLD ITEMS + IMAGES
-                # -----------------------
-                for item_data in session["items"]:
-                    # Extract images before creating item
-                    image_paths = item_data.pop("images", [])
-
-                    gold_item = GoldItem.objects.create(
-                        loan=loan,
-                        item_name=item_data["item_name"],
-                        carat=item_data["carat"],
-                        gross_weight=item_data["gross_weight"],
-                        approved_net_weight=item_data["approved_net_weight"],
-                        description=item_data["description"],
-                    )
-
-                    # Create GoldItemBundle for item count
-                    GoldItemBundle.objects.create(
-                        gold_item=gold_item,
-                        item_count=item_data.get("item_count", 1)
-                    )
-
-                    # Create images for this item
-                    for img_path in image_paths:
-                        GoldItemImage.objects.create(
-                            gold_item=gold_item,
-                            image=img_path
-                        )
+                # Thumbnails are built by the media worker once this commits
+                MediaWorker.enqueue(MediaTask.TASK_DERIVATIVES, images, "image")
+                MediaWorker.enqueue(MediaTask.TASK_DERIVATIVES, documents, "image")
+                MediaWorker.enqueue(MediaTask.TASK_DERIVATIVES, [customer], "photo")
 
-                # -----------------------
-                # DOCUMENTS
-                # -----------------------
-                for doc_data in session.get("documents", []):
-                    LoanDocument.objects.create(
-                        loan=loan,
-                        document_type=doc_data["document_type"],
-                        other_name=doc_data.get("other_name", ""),
-                        image=doc_data.get("image", "")
-                    )
-
-            # Clear session after successful save
-            del request.session["loan_entry"]
+                draft.customer = customer
+                draft.loan_number = Loan.generate_loan_number()
+                draft.status = Loan.STATUS_ACTIVE
+                draft.created_at = now  # Booked now, not when the wizard was started
+                draft.draft_customer_data = None
+                
+                # Interest Logic Fields
+                draft.pending_interest = initial_interest
+                draft.loan_start_date = loan_start
+                draft.interest_lock_until = interest_lock
+                draft.last_interest_calculated_at = loan_start
+                draft.save()
+
+            # Detach the wizard from the now-active loan
+            request.session.pop("loan_draft_id", None)
             if is_ajax: return JsonResponse({'success': True, 'redirect_url': reverse("gold_loan:dashboard")})
             return redirect("gold_loan:dashboard")
 
@@ -1010,9 +1273,9 @@ def loan_entry_step5(request):
             # Handle errors (e.g., duplicate mobile/Aadhaar)
             error_message = str(e)
             if "mobile_primary" in error_message:
-                error_message = f"Mobile number '{session.get('customer', {}).get('mobile_primary')}' already belongs to an existing customer. Please go back to Step 1 and select the existing customer."
+                error_message = f"Mobile number '{draft_customer.get('mobile_primary')}' already belongs to an existing customer. Please go back to Step 1 and select the existing customer."
             elif "aadhaar_number" in error_message:
-                error_message = f"Aadhaar number '{session.get('customer', {}).get('aadhaar_number')}' is already registered. Please go back to Step 1 and select the existing customer."
+                error_message = f"Aadhaar number '{draft_customer.get('aadhaar_number')}' is already registered. Please go back to Step 1 and select the existing customer."
             else:
                 error_message = f"Error saving loan: {error_message}"
             
@@ -1022,32 +1285,245 @@ def loan_entry_step5(request):
                 "mobile_masked": f"xxxxxx{mobile_number[-4:]}"
             })
     
-    # GET: Send OTP
-    existing_otp = OTPRecord.get_latest_valid_otp(
-        mobile_number=mobile_number,
-        purpose=OTPRecord.OTP_PURPOSE_LOAN_CREATION
-    )
-    
-    if existing_otp and (timezone.now() - existing_otp.created_at).total_seconds() < 60:
-         pass # Wait for debounce
+    approval = _queued_approval(request, draft, OTPRecord.OTP_PURPOSE_LOAN_CREATION, mobile_number)
+    if approval is not None:
+        # Authorized through the approval queue; no SMS for this one
+        otp_record = None
     else:
-        OTPRecord.create_otp(
-            mobile_number=mobile_number,
-            purpose=OTPRecord.OTP_PURPOSE_LOAN_CREATION,
-            reference_id="new_loan", # No ID yet
-            email=email
-        )
-        OTPService.send_otp_to_customer(mobile_number)
+        # GET: Send OTP (unless one was sent recently: debounce)
+        allowed, _ = OTPRateLimit.allow_send(request, mobile_number, OTPRecord.OTP_PURPOSE_LOAN_CREATION)
+        if allowed:
+            otp_record = OTPRecord.create_otp(
+                mobile_number=mobile_number,
+                purpose=OTPRecord.OTP_PURPOSE_LOAN_CREATION,
+                reference_id=str(draft.id), # Draft loan (gets its loan number on approval)
+                email=email
+            )
+            OTPService.dispatch(otp_record)
+        else:
+            otp_record = OTPRecord.get_latest_valid_otp(
+                mobile_number=mobile_number,
+                purpose=OTPRecord.OTP_PURPOSE_LOAN_CREATION
+            )
 
     return render(request, "gold_loan/loan/step5_otp.html", {
-        "mobile_masked": f"xxxxxx{mobile_number[-4:]}"
+        "mobile_masked": f"xxxxxx{mobile_number[-4:]}",
+        "otp_record": otp_record,
+        "approval": approval
     })
 
+# =========================
+# RESUMABLE UPLOADS (Step 2 item images / Step 4 documents)
+# =========================
+# Protocol: init -> append (chunks in order, each with its SHA-256) -> complete.
+# After a dropped connection the client asks for the status and resumes from
+# the acknowledged offset. Completed uploads land in the staging area and the
+# step form then submits only their staged names.
+
+CHUNKED_UPLOAD_CHUNK_SIZE = 512 * 1024
+CHUNKED_UPLOAD_MAX_SIZE = 25 * 1024 * 1024
+
+CHUNKED_UPLOAD_STAGING = {
+    ChunkedUpload.PURPOSE_ITEM: MediaService.STAGING_ITEMS,
+    ChunkedUpload.PURPOSE_DOCUMENT: MediaService.STAGING_DOCUMENTS,
+}
+
+
+def _chunked_upload_state(upload):
+    return {
+        "upload_id": str(upload.upload_id),
+        "offset": upload.received_bytes,
+        "size": upload.total_size,
+        "chunk_size": CHUNKED_UPLOAD_CHUNK_SIZE,
+        "complete": upload.is_complete,
+        "staged_name": upload.staged_name,
+        "status_url": reverse("gold_loan:chunked_upload_status", args=[upload.upload_id]),
+        "append_url": reverse("gold_loan:chunked_upload_append", args=[upload.upload_id]),
+        "complete_url": reverse("gold_loan:chunked_upload_complete", args=[upload.upload_id]),
+    }
+
+
+def _claimed_uploads(draft, purpose, staged_names):
+    """
+    Staged names submitted by a step form that belong to completed uploads of
+    this draft. Anything else is ignored, so a form cannot point at foreign files.
+    """
+    staged_names = [name for name in staged_names if name]
+    if not staged_names:
+        return set()
+    return set(
+        ChunkedUpload.objects.filter(
+            loan=draft,
+            purpose=purpose,
+            completed_at__isnull=False,
+            staged_name__in=staged_names,
+        ).values_list("staged_name", flat=True)
+    )
+
+
+def chunked_upload_init(request):
+    """
+    Start a resumable upload for the wizard's draft loan.
+    POST: filename, size, purpose ('item' or 'document')
+    """
+    if request.method != "POST":
+        return JsonResponse({"success": False, "error": "Invalid request method"}, status=400)
+
+    draft = get_loan_draft(request)
+    if not draft:
+        return JsonResponse({"success": False, "error": "No loan entry in progress"}, status=400)
+
+    purpose = request.POST.get("purpose")
+    if purpose not in CHUNKED_UPLOAD_STAGING:
+        return JsonResponse({"success": False, "error": "Invalid purpose provided"}, status=400)
+
+    try:
+        size = int(request.POST.get("size", ""))
+    except ValueError:
+        size = 0
+    if size <= 0 or size > CHUNKED_UPLOAD_MAX_SIZE:
+        return JsonResponse({"success": False, "error": "Invalid file size"}, status=400)
+
+    upload = ChunkedUpload.objects.create(
+        loan=draft,
+        purpose=purpose,
+        filename=(request.POST.get("filename") or "upload")[:255],
+        total_size=size,
+    )
+    return JsonResponse({"success": True, **_chunked_upload_state(upload)})
+
+
+def chunked_upload_status(request, upload_id):
+    """Current offset of an upload, used by the client to resume"""
+    draft = get_loan_draft(request)
+    upload = ChunkedUpload.objects.filter(loan=draft, upload_id=upload_id).first() if draft else None
+    if not upload:
+        return JsonResponse({"success": False, "error": "Upload not found"}, status=404)
+
+    return JsonResponse({"success": True, **_chunked_upload_state(upload)})
+
+
+def chunked_upload_append(request, upload_id):
+    """
+    Append one chunk. The raw request body is the chunk; headers carry
+    X-Upload-Offset and X-Chunk-Sha256. Re-sending an acknowledged chunk is a no-op.
+    """
+    if request.method != "POST":
+        return JsonResponse({"success": False, "error": "Invalid request method"}, status=400)
+
+    draft = get_loan_draft(request)
+    if not draft:
+        return JsonResponse({"success": False, "error": "No loan entry in progress"}, status=400)
+
+    try:
+        offset = int(request.headers.get("X-Upload-Offset", ""))
+    except ValueError:
+        return JsonResponse({"success": False, "error": "Missing upload offset"}, status=400)
+
+    data = request.body
+    if not data or len(data) > CHUNKED_UPLOAD_CHUNK_SIZE:
+        return JsonResponse({"success": False, "error": "Invalid chunk size"}, status=400)
+
+    checksum = request.headers.get("X-Chunk-Sha256", "").lower()
+    if hashlib.sha256(data).hexdigest() != checksum:
+        # Corrupted in transit; the client re-sends the same chunk
+        return JsonResponse({"success": False, "error": "Chunk checksum mismatch"}, status=422)
+
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().filter(loan=draft, upload_id=upload_id).first()
+        if not upload:
+            return JsonResponse({"success": False, "error": "Upload not found"}, status=404)
+
+        if upload.is_complete or offset + len(data) <= upload.received_bytes:
+            # Retry of a chunk we already have
+            return JsonResponse({"success": True, **_chunked_upload_state(upload)})
+
+        if offset != upload.received_bytes:
+            return JsonResponse({"success": False, "error": "Unexpected offset", **_chunked_upload_state(upload)}, status=409)
+
+        if offset + len(data) > upload.total_size:
+            return JsonResponse({"success": False, "error": "Chunk exceeds declared file size"}, status=400)
+
+        MediaService.write_chunk(upload.upload_id, offset, data)
+        upload.received_bytes = offset + len(data)
+        upload.save(update_fields=["received_bytes", "updated_at"])
+
+    return JsonResponse({"success": True, **_chunked_upload_state(upload)})
+
+
+def chunked_upload_complete(request, upload_id):
+    """Move a fully received upload into the staging area"""
+    if request.method != "POST":
+        return JsonResponse({"success": False, "error": "Invalid request method"}, status=400)
+
+    draft = get_loan_draft(request)
+    if not draft:
+        return JsonResponse({"success": False, "error": "No loan entry in progress"}, status=400)
+
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().filter(loan=draft, upload_id=upload_id).first()
+        if not upload:
+            return JsonResponse({"success": False, "error": "Upload not found"}, status=404)
+
+        if not upload.is_complete:
+            if upload.received_bytes != upload.total_size:
+                return JsonResponse({"success": False, "error": "Upload incomplete", **_chunked_upload_state(upload)}, status=409)
+
+            upload.staged_name, bytes_saved = MediaService.complete_chunked_upload(
+                upload.upload_id, upload.filename, CHUNKED_UPLOAD_STAGING[upload.purpose]
+            )
+            upload.completed_at = timezone.now()
+            upload.save(update_fields=["staged_name", "completed_at", "updated_at"])
+        else:
+            bytes_saved = 0
+
+    return JsonResponse({"success": True, "bytes_saved": bytes_saved, **_chunked_upload_state(upload)})
+
+
+# =========================
+# IMAGE DERIVATIVES (thumbnails / previews)
+# =========================
+
+def media_derivative(request, rendition, name):
+    """
+    Serve a thumbnail or preview of a media image, generating it on first request.
+    Later page renders link the cached file under MEDIA_URL directly (see media_tags).
+    """
+    from django.http import FileResponse, Http404, HttpResponse
+    from django.utils._os import safe_join
+
+    if rendition not in MediaService.RENDITIONS or not MediaService.has_derivatives(name):
+        raise Http404("Unknown rendition")
+
+    try:
+        # Rejects '..' and absolute paths that would escape MEDIA_ROOT
+        safe_join(settings.MEDIA_ROOT, name)
+    except Exception:
+        raise Http404("Invalid path")
+
+    if name.startswith(f"{MediaService.DERIVATIVE_DIR}/") or MediaService.is_staged(name):
+        raise Http404("Invalid path")
+
+    try:
+        path = MediaService.get_or_create_derivative(name, rendition)
+    except FileNotFoundError:
+        raise Http404("Image not found")
+    except MediaService.DECODE_ERRORS as e:
+        # Corrupt, truncated or oversized (decompression bomb) image
+        logger.warning(f"Could not build {rendition} for {name}: {e}")
+        return HttpResponse("Unsupported image", status=415, content_type="text/plain")
+
+    content_type = "image/webp" if path.endswith(".webp") else "image/jpeg"
+    response = FileResponse(open(path, "rb"), content_type=content_type)
+    response["Cache-Control"] = "public, max-age=86400"
+    return response
+
+
 def resend_otp_api(request):
     """
     API to resend OTP based on context.
     Supports:
-    1. Loan Creation (via session)
+    1. Loan Creation (via the wizard's draft loan)
     2. Loan Closure/Extension (via POST params)
     """
     if request.method != "POST":
@@ -1083,35 +1559,30 @@ def resend_otp_api(request):
         except Loan.DoesNotExist:
              return JsonResponse({"success": False, "error": "Loan not found"}, status=404)
 
-    # SCENARIO 2: Loan Entry Session (Step 5)
-    elif request.session.get("loan_entry"):
-        session = request.session["loan_entry"]
+    # SCENARIO 2: Loan Entry Draft (Step 5)
+    elif get_loan_draft(request):
+        draft = get_loan_draft(request)
         otp_purpose = OTPRecord.OTP_PURPOSE_LOAN_CREATION
         purpose_text = "Loan Creation"
-        reference_id = "new_loan"
+        reference_id = str(draft.id)
         
         # Resolve Customer
-        existing_id = session.get("existing_customer_id")
-        if existing_id:
-             try:
-                 c = Customer.objects.get(id=existing_id)
-                 mobile_number = c.mobile_primary
-                 email = c.email
-                 customer_name = c.name
-             except Customer.DoesNotExist:
-                 return JsonResponse({"success": False, "error": "Customer not found"}, status=404)
-        elif "customer" in session:
-             mobile_number = session["customer"].get("mobile_primary")
-             email = session["customer"].get("email")
-             customer_name = session["customer"].get("name", "Customer")
+        if draft.customer_id:
+             mobile_number = draft.customer.mobile_primary
+             email = draft.customer.email
+             customer_name = draft.customer.name
+        elif draft.draft_customer_data:
+             mobile_number = draft.draft_customer_data.get("mobile_primary")
+             email = draft.draft_customer_data.get("email")
+             customer_name = draft.draft_customer_data.get("name", "Customer")
     
     if not mobile_number or not otp_purpose:
         return JsonResponse({"success": False, "error": "Unable to determine context for OTP"}, status=400)
         
-    # Rate Limit / Debounce (60 seconds)
-    last_otp = OTPRecord.get_latest_valid_otp(mobile_number, otp_purpose)
-    if last_otp and (timezone.now() - last_otp.created_at).total_seconds() < 60:
-         return JsonResponse({"success": False, "error": "Please wait 60 seconds before resending OTP"})
+    # Rate Limit / Debounce (cache only, see OTPRateLimit)
+    allowed, retry_after = OTPRateLimit.allow_send(request, mobile_number, otp_purpose)
+    if not allowed:
+         return JsonResponse({"success": False, "error": f"Please wait {retry_after} seconds before resending OTP"}, status=429)
          
     # Send
     new_otp = OTPRecord.create_otp(
@@ -1121,38 +1592,200 @@ def resend_otp_api(request):
         email=email
     )
     
-    success, msg = OTPService.send_otp_to_customer(mobile_number)
-    
-    if success:
-        return JsonResponse({"success": True, "message": f"OTP sent via SMS"})
-    else:
-        # If sending failed, delete the OTP record so the user isn't blocked by the 60s debounce
-        new_otp.delete()
-        return JsonResponse({"success": False, "error": msg})
+    # Delivered in the background; the page polls status_url for the outcome
+    OTPService.dispatch(new_otp)
+
+    return JsonResponse({
+        "success": True,
+        "message": "OTP is being sent via SMS",
+        "otp_id": new_otp.id,
+        "status_url": reverse("gold_loan:otp_status_api", args=[new_otp.id])
+    })
+
+
+def otp_status_api(request, otp_id):
+    """
+    Delivery status of a queued OTP SMS: pending, sent or failed.
+    A failed OTP is already expired, so the page can offer a resend straight away.
+    """
+    otp_record = OTPRecord.objects.filter(id=otp_id).only("sent_via_sms", "delivery_error").first()
+    if otp_record is None:
+        return JsonResponse({"success": False, "error": "OTP not found"}, status=404)
+
+    return JsonResponse({
+        "success": True,
+        "status": otp_record.delivery_status,
+        "error": otp_record.delivery_error
+    })
+
+
+def otp_gateway_status_api(request):
+    """
+    Health of the OTP provider as seen by the circuit breaker: closed (normal),
+    open (failing fast, `retry_in` seconds until a probe) or half_open (probing).
+    """
+    return JsonResponse({
+        "success": True,
+        "backend": getattr(settings, "OTP_BACKEND", "gold_loan.otp_backends.TwilioVerifyBackend"),
+        "circuit": OTPService.get_circuit_breaker().status()
+    })
+
+
+# =========================
+# APPROVAL QUEUE (one admin OTP for a batch of operations)
+# =========================
+
+def _queued_approval(request, loan, purpose, mobile_number, next_action=""):
+    """
+    The approval-queue request authorizing this operation, or None if it should
+    get its own OTP. `?queue=1` / `?queue=0` switch the operator's session between
+    queueing operations for the admin and sending an SMS per operation.
+    """
+    if "queue" in request.GET:
+        request.session["otp_approval_queue"] = request.GET["queue"] == "1"
+
+    if request.session.get("otp_approval_queue"):
+        return ApprovalRequest.submit(loan, purpose, mobile_number, next_action)
+
+    # Per-operation OTPs, but an approval the admin already gave still counts
+    approval = ApprovalRequest.current(loan, purpose, mobile_number, next_action)
+    if approval is not None and approval.status == ApprovalRequest.STATUS_APPROVED:
+        return approval
+    return None
+
+
+def _approval_admin_mobile():
+    """Admin mobile (10 digits) the batch OTP is logged against, or None if not configured"""
+    normalized = OTPService.normalize_mobile_number(getattr(settings, "OTP_ADMIN_MOBILE", None))
+    return normalized[-10:] if normalized else None
+
+
+def approval_queue(request):
+    """
+    Admin approval queue. Pending creations, closures and extensions are
+    selected and approved together: one OTP is sent for the selection and, once
+    verified, every selected request is approved atomically with its own audit
+    OTPRecord (see ApprovalRequest.approve_batch).
+    """
+    admin_mobile = _approval_admin_mobile()
+    purpose = OTPRecord.OTP_PURPOSE_BATCH_APPROVAL
+
+    if request.method == "POST":
+        action = request.POST.get("action")
+
+        if not admin_mobile:
+            messages.error(request, "Admin mobile number not configured")
+
+        elif action == "send":
+            request_ids = list(ApprovalRequest.objects.filter(
+                id__in=[value for value in request.POST.getlist("request_ids") if value.isdigit()],
+                status=ApprovalRequest.STATUS_PENDING
+            ).values_list("id", flat=True))
+            if not request_ids:
+                messages.error(request, "Select at least one pending request to approve.")
+                return redirect("gold_loan:approval_queue")
+
+            allowed, retry_after = OTPRateLimit.allow_send(request, admin_mobile, purpose)
+            if not allowed:
+                messages.error(request, f"Please wait {retry_after} seconds before sending another OTP")
+                return redirect("gold_loan:approval_queue")
+
+            # One SMS for the whole selection
+            with transaction.atomic():
+                batch_otp = OTPRecord.create_otp(
+                    mobile_number=admin_mobile,
+                    purpose=purpose,
+                    reference_id=f"{len(request_ids)} request(s)"
+                )
+                ApprovalRequest.objects.filter(id__in=request_ids).update(batch_otp=batch_otp)
+                OTPService.dispatch(batch_otp)
+            messages.success(request, f"OTP is being sent to approve {len(request_ids)} request(s).")
+
+        elif action == "verify":
+            batch_otp = OTPRecord.live().filter(
+                id=request.POST.get("batch_id"), purpose=purpose
+            ).first()
+            if batch_otp is None:
+                messages.error(request, "This approval OTP has expired. Please send a new one.")
+                return redirect("gold_loan:approval_queue")
+
+            allowed, retry_after = OTPRateLimit.allow_verify(request, admin_mobile, purpose)
+            if allowed:
+                success, message = OTPService.verify_customer_otp(None, request.POST.get("otp"))
+            else:
+                success, message = False, f"Too many attempts. Please try again in {retry_after} seconds."
+
+            if success:
+                approved = ApprovalRequest.approve_batch(batch_otp)
+                OTPRateLimit.reset_send(admin_mobile, purpose)
+                messages.success(request, f"Approved {approved} request(s).")
+            else:
+                messages.error(request, message)
+
+        elif action == "cancel":
+            cancelled = ApprovalRequest.objects.filter(
+                id__in=[value for value in request.POST.getlist("request_ids") if value.isdigit()],
+                status__in=ApprovalRequest.OPEN_STATUSES
+            ).update(status=ApprovalRequest.STATUS_CANCELLED)
+            messages.success(request, f"Cancelled {cancelled} request(s).")
+
+        return redirect("gold_loan:approval_queue")
+
+    open_requests = list(
+        ApprovalRequest.objects.filter(status__in=ApprovalRequest.OPEN_STATUSES)
+        .select_related("loan", "loan__customer", "batch_otp")
+        .order_by("requested_at")
+    )
+    pending = [approval for approval in open_requests if approval.status == ApprovalRequest.STATUS_PENDING]
+    approved = [approval for approval in open_requests if approval.status == ApprovalRequest.STATUS_APPROVED]
+
+    # The batch awaiting its code: the latest live admin OTP still holding pending requests
+    batch_otp = None
+    if admin_mobile:
+        batch_otp = OTPRecord.get_latest_valid_otp(mobile_number=admin_mobile, purpose=purpose)
+    batch = [approval for approval in pending if batch_otp and approval.batch_otp_id == batch_otp.id]
+    if not batch:
+        batch_otp = None
+
+    return render(request, "gold_loan/approval/approval_queue.html", {
+        "title": "Approval Queue",
+        "pending": pending,
+        "approved": approved,
+        "batch_otp": batch_otp,
+        "batch": batch
+    })
 
 
 # API Endpoints for customer search
 
 def search_customers(request):
-    """Search customers by name, mobile, aadhaar, or customer ID"""
+    """
+    Search customers by name, mobile, aadhaar, or customer ID.
+    With fuzzy=1, names that sound like the query (other romanizations) come
+    first, ranked by spelling distance, followed by the ordinary matches.
+    """
     query = request.GET.get('q', '').strip()
+    fuzzy = request.GET.get('fuzzy') == '1'
     
     if len(query) < 1:
         return JsonResponse({'customers': []})
     
-    # Search in name, mobile, aadhaar, and customer_id
-    filters = (
-        Q(name__icontains=query) | 
-        Q(mobile_primary__icontains=query) |
-        Q(aadhaar_number__icontains=query) |
-        Q(customer_id__icontains=query)
-    )
+    # Mobile / Aadhaar / PGxxxxxx prefixes come from the in-process index; names,
+    # and whatever the prefixes leave room for (substring matches such as the
+    # last digits of a mobile), from the ranked search index
+    customers = CustomerPrefixIndex.search(query, limit=10) or []
+    if fuzzy and not customers:
+        customers = CustomerPhoneticSearch.search(query, limit=10) or []
+    if len(customers) < 10:
+        seen = {c.id for c in customers}
+        customers += [c for c in CustomerSearchIndex.search(query, limit=10) if c.id not in seen]
+        customers = customers[:10]
     
     # If query is numeric, also try to match exact DB ID (legacy support)
-    if query.isdigit():
-        filters |= Q(id=query)
-
-    customers = Customer.objects.filter(filters)[:10]  # Limit to 10 results
+    if query.isdigit() and all(c.id != int(query) for c in customers):
+        legacy = Customer.objects.filter(id=query).first()
+        if legacy:
+            customers = [legacy] + customers[:9]
     
     results = []
     for c in customers:
@@ -1283,6 +1916,100 @@ def _update_loan_interest(loan):
             break 
 
 
+def _accrue_projected_interest(loan, state, principal_paid, until):
+    """
+    Advance a projected loan `state` (dict with total_amount, pending_interest,
+    last_calculated_at, last_capitalization_date) to `until`, applying the same
+    daily accrual and YEARLY capitalization rules as _update_loan_interest.
+    """
+    while True:
+        base_date = state['last_capitalization_date'] or loan.loan_start_date
+        next_cap_date = base_date + timedelta(days=365)
+        start_calc_time = max(state['last_calculated_at'], loan.interest_lock_until)
+
+        if until > next_cap_date and next_cap_date > start_calc_time:
+            # Interest up to the capitalization moment, then capitalize
+            days = (next_cap_date - start_calc_time).days
+            if days > 0:
+                interest = ((state['total_amount'] - principal_paid) * loan.interest_rate * days) / (Decimal("365") * Decimal("100"))
+                state['pending_interest'] += round(interest, 2)
+
+            if state['pending_interest'] > 0:
+                state['total_amount'] += state['pending_interest']
+                state['pending_interest'] = Decimal("0.00")
+
+            state['last_capitalization_date'] = next_cap_date
+            state['last_calculated_at'] = next_cap_date
+            continue
+
+        if until > start_calc_time:
+            days = (until - start_calc_time).days
+            if days > 0:
+                interest = ((state['total_amount'] - principal_paid) * loan.interest_rate * days) / (Decimal("365") * Decimal("100"))
+                state['pending_interest'] += round(interest, 2)
+                # Whole days only; the remainder is carried into the next segment
+                state['last_calculated_at'] = start_calc_time + timedelta(days=days)
+        break
+
+
+def _project_loan_interest(loan, payments, as_of):
+    """
+    Read-only counterpart of _update_loan_interest for bulk reporting: the loan
+    as it stood at `as_of`, without querying or saving. `payments` are the loan's
+    payments up to `as_of`, oldest first (see _annotate_payment_totals).
+
+    A cutoff at or after the stored accrual point projects the stored state
+    forward. An earlier cutoff cannot start from the stored state (it already
+    holds later accrual, capitalization and payments), so the loan is rebuilt
+    from its start: original principal, the upfront lock-period interest charged
+    at booking, then accrual between the payments made up to `as_of`.
+
+    Returns (status, total_amount, pending_interest) as they would stand at `as_of`.
+    """
+    status = loan.status
+    if loan.status == Loan.STATUS_CLOSED and loan.closed_at and loan.closed_at > as_of:
+        status = Loan.STATUS_ACTIVE  # Closed after the cutoff
+
+    if status != Loan.STATUS_ACTIVE:
+        return status, loan.total_amount, loan.pending_interest
+
+    if not loan.last_interest_calculated_at or not loan.interest_lock_until or not loan.loan_start_date:
+        return status, loan.total_amount, loan.pending_interest
+
+    principal_paid = sum((payment.principal_component for payment in payments), Decimal('0'))
+
+    if as_of >= loan.last_interest_calculated_at:
+        state = {
+            'total_amount': loan.total_amount,
+            'pending_interest': loan.pending_interest,
+            'last_calculated_at': loan.last_interest_calculated_at,
+            'last_capitalization_date': loan.last_capitalization_date,
+        }
+        _accrue_projected_interest(loan, state, principal_paid, as_of)
+        return status, state['total_amount'], state['pending_interest']
+
+    # Capitalization has grown total_amount; the booked principal is grams x price
+    principal = loan.total_amount
+    if loan.last_capitalization_date and loan.approved_grams and loan.price_per_gram:
+        principal = (loan.approved_grams * loan.price_per_gram).quantize(Decimal('0.01'))
+    upfront_days = max((loan.interest_lock_until - loan.loan_start_date).days, 0)
+    state = {
+        'total_amount': principal,
+        'pending_interest': round((principal * loan.interest_rate * upfront_days) / (Decimal("365") * Decimal("100")), 2),
+        'last_calculated_at': loan.loan_start_date,
+        'last_capitalization_date': None,
+    }
+
+    paid_so_far = Decimal('0')
+    for payment in payments:
+        paid_at = timezone.make_aware(datetime.combine(payment.payment_date, datetime.min.time()))
+        _accrue_projected_interest(loan, state, paid_so_far, min(max(paid_at, loan.loan_start_date), as_of))
+        state['pending_interest'] -= payment.interest_component
+        paid_so_far += payment.principal_component
+    _accrue_projected_interest(loan, state, paid_so_far, as_of)
+    return status, state['total_amount'], state['pending_interest']
+
+
 def loan_view(request, loan_id):
     """
     Read-only view for a specific loan.
@@ -1856,25 +2583,36 @@ def loan_closure_receipt(request, loan_id):
 def customer_list(request):
     """
     List all customers with basic details and loan counts.
-    Supports searching by name, ID, or mobile.
+    Supports searching by name, ID, or mobile, and by how the name sounds (fuzzy=1).
     """
     query = request.GET.get('q', '').strip()
+    fuzzy = request.GET.get('fuzzy') == '1'
     customers = Customer.objects.annotate(
-        total_loans=Count('loans')
+        total_loans=Count('loans', filter=~Q(loans__status=Loan.STATUS_DRAFT))
     )
 
-    if query:
-        customers = customers.filter(
-            Q(name__icontains=query) |
-            Q(customer_id__icontains=query) |
-            Q(mobile_primary__icontains=query)
-        )
+    # Fuzzy mode: names that sound like the query, closest spelling first
+    ranked_ids = None
+    if query and fuzzy:
+        ranked_ids = CustomerPhoneticSearch.search_ids(query, limit=CustomerPhoneticSearch.CANDIDATES)
 
-    customers = customers.order_by('-id')
+    if ranked_ids is not None:
+        position = {customer_id: index for index, customer_id in enumerate(ranked_ids)}
+        customers = sorted(customers.filter(id__in=ranked_ids), key=lambda c: position[c.id])
+    else:
+        if query:
+            customers = customers.filter(
+                Q(name__icontains=query) |
+                Q(customer_id__icontains=query) |
+                Q(mobile_primary__icontains=query)
+            )
+
+        customers = customers.order_by('-id')
     
     context = {
         "customers": customers,
-        "search_query": query
+        "search_query": query,
+        "fuzzy": fuzzy,
     }
     return render(request, "gold_loan/customer/customer_list.html", context)
 
@@ -1964,7 +2702,7 @@ def customer_create(request):
             )
             
             if photo:
-                customer.photo = photo
+                customer.photo, _ = MediaService.ingest_upload(photo)
                 customer.save()
             
             messages.success(request, f"Customer '{customer.name}' created successfully!")
@@ -2019,8 +2757,7 @@ def customer_edit(request, customer_id):
 
             # Handle photo upload
             if "photo" in request.FILES:
-                photo = request.FILES["photo"]
-                customer.photo = photo
+                customer.photo, _ = MediaService.ingest_upload(request.FILES["photo"])
 
             customer.save()
             messages.success(request, "Customer details updated successfully.")
@@ -2096,7 +2833,7 @@ def analytics_dashboard(request):
     # Top Customers by Loan Count
     from django.db.models import Count as CountAgg
     top_customers = Customer.objects.annotate(
-        loan_count=CountAgg('loans')
+        loan_count=CountAgg('loans', filter=~Q(loans__status=Loan.STATUS_DRAFT))
     ).filter(loan_count__gt=0).order_by('-loan_count')[:5]
     
     # Recent Activity (Last 10 loans)
@@ -2149,7 +2886,17 @@ def analytics_dashboard(request):
 def export_report(request):
     """
     Export reports in PDF or Excel format with optional date filtering.
-    Supports: all_loans, active_loans, closed_loans, extended_loans, customers
+    Supports: all_loans, active_loans, closed_loans, extended_loans, customers,
+    portfolio_balances, deletions, and bundle (all of them in one ZIP; format
+    csv, pdf or both)
+    Formats: pdf, excel (CSV), csv.gz, ndjson, ndjson.gz (all but pdf are streamed)
+
+    Pass `since` (ISO timestamp) to export only rows changed after it.
+    The next watermark is returned in the X-Next-Watermark header; it lags
+    the export time by EXPORT_WATERMARK_LAG seconds so rows saved by
+    transactions that commit later are picked up by the next export. Removed
+    customers and loans are listed by the deletions report (and in the bundle
+    whenever `since` is given).
     """
     from django.http import HttpResponse
     from datetime import datetime
@@ -2157,6 +2904,7 @@ def export_report(request):
     report_type = request.GET.get('report_type', 'all_loans')
     export_format = request.GET.get('format', 'pdf')
     date_cutoff = request.GET.get('date_cutoff', '')
+    since_param = request.GET.get('since', '').strip()
     
     # Parse date cutoff
     cutoff_date = None
@@ -2165,12 +2913,45 @@ def export_report(request):
             cutoff_date = datetime.strptime(date_cutoff, '%Y-%m-%d')
         except ValueError:
             pass
-    
+
+    # Parse incremental watermark (only rows changed after it are exported)
+    since = None
+    if since_param:
+        since = _parse_since_watermark(since_param)
+        if since is None:
+            return HttpResponse("Invalid since watermark", status=400)
+
+    # Upper bound of this export; the caller passes it back as `since` next time.
+    # updated_at is stamped at save time, not commit time, so stop short of now
+    next_watermark = timezone.now() - timedelta(seconds=getattr(settings, 'EXPORT_WATERMARK_LAG', 300))
+    if since and next_watermark < since:
+        next_watermark = since
+    
+    if report_type == 'bundle':
+        # Every report in one ZIP from a single pass over the loans
+        if export_format in ('excel', 'csv', 'csv.gz'):
+            formats = ('csv',)
+        elif export_format == 'pdf':
+            formats = ('pdf',)
+        elif export_format == 'both':
+            formats = ('csv', 'pdf')
+        else:
+            return HttpResponse("Invalid format", status=400)
+
+        reports = _prepare_bundle_reports(cutoff_date, since, next_watermark)
+        watermark = {'since': since, 'next': next_watermark}
+        response = _generate_bundle_report(reports, date_cutoff, watermark, formats)
+        response['X-Next-Watermark'] = next_watermark.isoformat()
+        return response
+
+
     # Prepare data based on report type
     if report_type == 'all_loans':
         queryset = Loan.objects.select_related('customer').all()
         if cutoff_date:
             queryset = queryset.filter(created_at__lte=cutoff_date)
+        if since:
+            queryset = _filter_changed_loans(queryset, since, next_watermark)
         data = _prepare_loan_data(queryset)
         title = "All Loans Report"
         
@@ -2178,6 +2959,8 @@ def export_report(request):
         queryset = Loan.objects.select_related('customer').filter(status=Loan.STATUS_ACTIVE)
         if cutoff_date:
             queryset = queryset.filter(created_at__lte=cutoff_date)
+        if since:
+            queryset = _filter_changed_loans(queryset, since, next_watermark)
         data = _prepare_loan_data(queryset)
         title = "Active Loans Report"
         
@@ -2185,6 +2968,8 @@ def export_report(request):
         queryset = Loan.objects.select_related('customer').filter(status=Loan.STATUS_CLOSED)
         if cutoff_date:
             queryset = queryset.filter(created_at__lte=cutoff_date)
+        if since:
+            queryset = _filter_changed_loans(queryset, since, next_watermark)
         data = _prepare_loan_data(queryset)
         title = "Closed Loans Report"
         
@@ -2192,6 +2977,8 @@ def export_report(request):
         queryset = Loan.objects.select_related('customer', 'parent_loan').filter(parent_loan__isnull=False)
         if cutoff_date:
             queryset = queryset.filter(created_at__lte=cutoff_date)
+        if since:
+            queryset = _filter_changed_loans(queryset, since, next_watermark)
         data = _prepare_extended_loan_data(queryset)
         title = "Extended Loans Report"
         
@@ -2200,155 +2987,590 @@ def export_report(request):
         if cutoff_date:
             # For customers, we filter by the first loan's creation date
             queryset = queryset.filter(loans__created_at__lte=cutoff_date).distinct()
+        if since:
+            queryset = queryset.filter(updated_at__gt=since, updated_at__lte=next_watermark)
         data = _prepare_customer_data(queryset)
         title = "Customer Details Report"
+
+    elif report_type == 'portfolio_balances':
+        queryset, as_of = _portfolio_balance_loans(cutoff_date)
+        data = _prepare_portfolio_balance_data(queryset, as_of)
+        title = "Portfolio Balances Report"
+
+    elif report_type == 'deletions':
+        data = _prepare_deletion_data(_deleted_records(since, next_watermark))
+        title = "Deletions Report"
     else:
         return HttpResponse("Invalid report type", status=400)
     
+    watermark = {'since': since, 'next': next_watermark}
+
     # Generate report
     if export_format == 'pdf':
-        return _generate_pdf_report(data, title, date_cutoff)
+        response = _generate_pdf_report(data, title, date_cutoff, watermark)
     elif export_format == 'excel':
-        return _generate_excel_report(data, title, date_cutoff)
+        response = _generate_excel_report(data, title, date_cutoff, watermark)
+    elif export_format == 'csv.gz':
+        response = _generate_csv_gz_report(data, title, date_cutoff, watermark)
+    elif export_format in ('ndjson', 'ndjson.gz'):
+        response = _generate_ndjson_report(data, title, compress=export_format == 'ndjson.gz')
     else:
         return HttpResponse("Invalid format", status=400)
 
+    response['X-Next-Watermark'] = next_watermark.isoformat()
+    return response
+
+
+def _parse_since_watermark(value):
+    """
+    Parse a `since` watermark (ISO 8601 datetime or plain date).
+    Returns an aware datetime, or None if the value is not a valid timestamp.
+    """
+    from django.utils.dateparse import parse_date, parse_datetime
+
+    try:
+        since = parse_datetime(value)
+        if since is None:
+            since_date = parse_date(value)
+            if since_date is None:
+                return None
+            since = datetime.combine(since_date, datetime.min.time())
+    except ValueError:
+        return None
+
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def _filter_changed_loans(queryset, since, until):
+    """
+    Restrict loans to those changed within the (since, until] window.
+    A loan also counts as changed when its customer's details changed,
+    since the exported rows carry customer name / ID / mobile.
+    """
+    return queryset.filter(
+        Q(updated_at__gt=since, updated_at__lte=until) |
+        Q(customer__updated_at__gt=since, customer__updated_at__lte=until)
+    )
+
+
+# Rows fetched per DB round trip while streaming exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Uncompressed streams are flushed to the client in blocks of this size
+EXPORT_STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def _iter_export_source(source):
+    """Iterate a queryset in chunks, or an already-fetched list of rows as is"""
+    if hasattr(source, 'iterator'):
+        return source.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return iter(source)
+
 
 def _prepare_loan_data(queryset):
-    """Prepare loan data for export"""
-    data = []
+    """
+    Prepare loan data for export (rows are generated lazily). `rows` are display
+    strings for CSV / PDF, `records` the raw values for NDJSON.
+    """
     headers = ['Loan Number', 'Customer Name', 'Customer ID', 'Mobile', 'Lot Number', 
                'Total Amount (₹)', 'Interest Rate (%)', 'Status', 'Created Date']
+    fields = ['loan_number', 'customer_name', 'customer_id', 'mobile', 'lot_number',
+              'total_amount', 'interest_rate', 'status', 'created_at']
+    
+    def rows():
+        for loan in _iter_export_source(queryset):
+            yield [
+                loan.loan_number,
+                loan.customer.name,
+                loan.customer.customer_id or 'N/A',
+                loan.customer.mobile_primary,
+                loan.lot_number,
+                f"{loan.total_amount:.2f}",
+                f"{loan.interest_rate:.2f}",
+                loan.get_status_display(),
+                loan.created_at.strftime('%d-%b-%Y'),
+            ]
+
+    def records():
+        for loan in _iter_export_source(queryset):
+            yield [
+                loan.loan_number,
+                loan.customer.name,
+                loan.customer.customer_id,
+                loan.customer.mobile_primary,
+                loan.lot_number,
+                loan.total_amount,
+                loan.interest_rate,
+                loan.status,
+                loan.created_at,
+            ]
     
-    for loan in queryset:
-        data.append([
-            loan.loan_number,
-            loan.customer.name,
-            loan.customer.customer_id or 'N/A',
-            loan.customer.mobile_primary,
-            loan.lot_number,
-            f"{loan.total_amount:.2f}",
-            f"{loan.interest_rate:.2f}",
-            loan.get_status_display(),
-            loan.created_at.strftime('%d-%b-%Y'),
-        ])
-    
-    return {'headers': headers, 'rows': data}
+    return {'headers': headers, 'fields': fields, 'rows': rows(), 'records': records()}
 
 
 def _prepare_extended_loan_data(queryset):
-    """Prepare extended loan data for export"""
-    data = []
+    """Prepare extended loan data for export (rows are generated lazily; see _prepare_loan_data)"""
     headers = ['Loan Number', 'Customer Name', 'Parent Loan', 'Total Amount (₹)', 
                'Interest Rate (%)', 'Status', 'Created Date']
+    fields = ['loan_number', 'customer_name', 'parent_loan', 'total_amount',
+              'interest_rate', 'status', 'created_at']
+    
+    def rows():
+        for loan in _iter_export_source(queryset):
+            yield [
+                loan.loan_number,
+                loan.customer.name,
+                loan.parent_loan.loan_number if loan.parent_loan else 'N/A',
+                f"{loan.total_amount:.2f}",
+                f"{loan.interest_rate:.2f}",
+                loan.get_status_display(),
+                loan.created_at.strftime('%d-%b-%Y'),
+            ]
+
+    def records():
+        for loan in _iter_export_source(queryset):
+            yield [
+                loan.loan_number,
+                loan.customer.name,
+                loan.parent_loan.loan_number if loan.parent_loan else None,
+                loan.total_amount,
+                loan.interest_rate,
+                loan.status,
+                loan.created_at,
+            ]
     
-    for loan in queryset:
-        data.append([
-            loan.loan_number,
-            loan.customer.name,
-            loan.parent_loan.loan_number if loan.parent_loan else 'N/A',
-            f"{loan.total_amount:.2f}",
-            f"{loan.interest_rate:.2f}",
-            loan.get_status_display(),
-            loan.created_at.strftime('%d-%b-%Y'),
-        ])
-    
-    return {'headers': headers, 'rows': data}
+    return {'headers': headers, 'fields': fields, 'rows': rows(), 'records': records()}
 
 
 def _prepare_customer_data(queryset):
-    """Prepare customer data for export"""
-    data = []
+    """Prepare customer data for export (rows are generated lazily; see _prepare_loan_data)"""
     headers = ['Customer ID', 'Name', 'Mobile Primary', 'Mobile Secondary', 
                'Email', 'Address', 'Profession', 'Aadhaar', 'Nominee Name', 'Nominee Mobile']
+    fields = ['customer_id', 'name', 'mobile_primary', 'mobile_secondary',
+              'email', 'address', 'profession', 'aadhaar_number', 'nominee_name', 'nominee_mobile']
+    
+    def rows():
+        for customer in _iter_export_source(queryset):
+            yield [
+                customer.customer_id or 'N/A',
+                customer.name,
+                customer.mobile_primary,
+                customer.mobile_secondary or 'N/A',
+                customer.email or 'N/A',
+                customer.address,
+                customer.profession,
+                customer.aadhaar_number,
+                customer.nominee_name,
+                customer.nominee_mobile,
+            ]
+
+    def records():
+        for customer in _iter_export_source(queryset):
+            yield [
+                customer.customer_id,
+                customer.name,
+                customer.mobile_primary,
+                customer.mobile_secondary or None,
+                customer.email or None,
+                customer.address,
+                customer.profession,
+                customer.aadhaar_number,
+                customer.nominee_name,
+                customer.nominee_mobile,
+            ]
     
-    for customer in queryset:
-        data.append([
-            customer.customer_id or 'N/A',
-            customer.name,
-            customer.mobile_primary,
-            customer.mobile_secondary or 'N/A',
-            customer.email or 'N/A',
-            customer.address,
-            customer.profession,
-            customer.aadhaar_number,
-            customer.nominee_name,
-            customer.nominee_mobile,
-        ])
-    
-    return {'headers': headers, 'rows': data}
+    return {'headers': headers, 'fields': fields, 'rows': rows(), 'records': records()}
 
 
-def _generate_excel_report(data, title, date_cutoff):
-    """Generate Excel report using CSV format (compatible without external libraries)"""
-    from django.http import HttpResponse
-    from datetime import datetime
-    
-    response = HttpResponse(content_type='text/csv')
-    filename = f"{title.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    writer = csv.writer(response)
+def _deleted_records(since, until):
+    """Tombstones of customers / loans deleted within the (since, until] window"""
+    queryset = DeletedRecord.objects.filter(deleted_at__lte=until)
+    if since:
+        queryset = queryset.filter(deleted_at__gt=since)
+    return queryset.order_by('deleted_at', 'id')
+
+
+def _prepare_deletion_data(queryset):
+    """Prepare removed customers / loans for export (rows are generated lazily; see _prepare_loan_data)"""
+    headers = ['Record Type', 'Customer ID / Loan Number', 'Record ID', 'Deleted At']
+    fields = ['record_type', 'record_key', 'object_id', 'deleted_at']
+
+    def rows():
+        for record in _iter_export_source(queryset):
+            yield [
+                record.get_record_type_display(),
+                record.record_key or 'N/A',
+                record.object_id,
+                record.deleted_at.strftime('%d-%b-%Y %H:%M'),
+            ]
+
+    def records():
+        for record in _iter_export_source(queryset):
+            yield [
+                record.record_type,
+                record.record_key or None,
+                record.object_id,
+                record.deleted_at,
+            ]
+
+    return {'headers': headers, 'fields': fields, 'rows': rows(), 'records': records()}
+
+
+def _report_as_of(cutoff_date):
+    """Balances are reported as of the end of the cutoff day, or now without a cutoff"""
+    if cutoff_date:
+        return timezone.make_aware(cutoff_date.replace(hour=23, minute=59, second=59))
+    return timezone.now()
+
+
+def _annotate_payment_totals(queryset, as_of):
+    """
+    Annotate loans with principal / interest paid up to `as_of` (one grouped query)
+    and attach those payments, oldest first, as `payments_as_of` (one more query)
+    """
+    from django.db.models import Prefetch
+
+    paid_until = Q(payments__payment_date__lte=as_of.date())
+    return queryset.annotate(
+        principal_paid=Sum('payments__principal_component', filter=paid_until),
+        interest_paid=Sum('payments__interest_component', filter=paid_until),
+    ).prefetch_related(Prefetch(
+        'payments',
+        queryset=Payment.objects.filter(payment_date__lte=as_of.date()).order_by('payment_date', 'id'),
+        to_attr='payments_as_of',
+    ))
+
+
+def _portfolio_balance_loans(cutoff_date):
+    """
+    Loans for the Portfolio Balances Report, standalone or in the bundle: every
+    loan booked by the end of the cutoff day (or now). Balances move every day
+    through accrual, so the `since` watermark does not apply here.
+    Returns (annotated queryset, as_of).
+    """
+    as_of = _report_as_of(cutoff_date)
+    queryset = Loan.objects.select_related('customer').filter(
+        created_at__lte=as_of
+    ).order_by('created_at')
+    return _annotate_payment_totals(queryset, as_of), as_of
+
+
+def _prepare_portfolio_balance_data(queryset, as_of):
+    """
+    Prepare outstanding principal / accrued interest / amounts paid for every loan
+    as of `as_of` (status too: a loan closed after `as_of` is reported active).
+    Expects loans annotated by _annotate_payment_totals; interest accrual is
+    projected in memory, so no per-loan queries are issued.
+    `rows` are display strings, `records` raw values (see _prepare_loan_data).
+    """
+    headers = ['Loan Number', 'Customer Name', 'Customer ID', 'Status', 'Loan Amount (₹)',
+               'Principal Paid (₹)', 'Outstanding Principal (₹)', 'Interest Paid (₹)',
+               'Accrued Interest (₹)', 'Total Due (₹)']
+    fields = ['loan_number', 'customer_name', 'customer_id', 'status', 'loan_amount',
+              'principal_paid', 'outstanding_principal', 'interest_paid',
+              'accrued_interest', 'total_due']
+
+    def records():
+        for loan in _iter_export_source(queryset):
+            principal_paid = loan.principal_paid or Decimal('0')
+            interest_paid = loan.interest_paid or Decimal('0')
+            status, total_amount, accrued_interest = _project_loan_interest(loan, loan.payments_as_of, as_of)
+            outstanding_principal = total_amount - principal_paid
+            yield [
+                loan.loan_number,
+                loan.customer.name,
+                loan.customer.customer_id,
+                status,
+                total_amount,
+                principal_paid,
+                outstanding_principal,
+                interest_paid,
+                accrued_interest,
+                outstanding_principal + accrued_interest,
+            ]
+
+    def rows():
+        status_labels = dict(Loan.STATUS_CHOICES)
+        for loan_number, name, customer_id, status, *amounts in records():
+            yield [loan_number, name, customer_id or 'N/A', status_labels.get(status, status),
+                   *(f"{amount:.2f}" for amount in amounts)]
+
+    return {'headers': headers, 'fields': fields, 'rows': rows(), 'records': records()}
+
+
+def _prepare_bundle_reports(cutoff_date, since, next_watermark):
+    """
+    Build every report for the ZIP bundle. Without `since`, one loan query
+    (with customer, parent loan and the payment totals / payments as of the
+    cutoff, see _portfolio_balance_loans) feeds all the loan reports and the
+    balances; loans are split by status / extension in memory. With `since`
+    the loan reports cover only the changed loans, so the balances, which
+    cover every loan, take their own query. Customers take one more query,
+    and with `since` the deletions in the window are added.
+    Returns a list of (data, title).
+    """
+    balance_loans, as_of = _portfolio_balance_loans(cutoff_date)
+    balance_loans = balance_loans.select_related('parent_loan')
+
+    if since:
+        loans = Loan.objects.select_related('customer', 'parent_loan').order_by('created_at')
+        if cutoff_date:
+            loans = loans.filter(created_at__lte=cutoff_date)
+        loans = list(_filter_changed_loans(loans, since, next_watermark))
+    else:
+        balance_loans = list(balance_loans)
+        loans = balance_loans
+        if cutoff_date:
+            # Balances run to the end of the cutoff day, the loan reports to its start
+            booked_by = timezone.make_aware(cutoff_date)
+            loans = [loan for loan in balance_loans if loan.created_at <= booked_by]
+
+    active_loans = [loan for loan in loans if loan.status == Loan.STATUS_ACTIVE]
+    closed_loans = [loan for loan in loans if loan.status == Loan.STATUS_CLOSED]
+    extended_loans = [loan for loan in loans if loan.parent_loan_id]
+
+    customers = Customer.objects.all()
+    if cutoff_date:
+        customers = customers.filter(loans__created_at__lte=cutoff_date).distinct()
+    if since:
+        customers = customers.filter(updated_at__gt=since, updated_at__lte=next_watermark)
+
+    reports = [
+        (_prepare_loan_data(loans), "All Loans Report"),
+        (_prepare_loan_data(active_loans), "Active Loans Report"),
+        (_prepare_loan_data(closed_loans), "Closed Loans Report"),
+        (_prepare_extended_loan_data(extended_loans), "Extended Loans Report"),
+        (_prepare_customer_data(customers), "Customer Details Report"),
+        (_prepare_portfolio_balance_data(balance_loans, as_of), "Portfolio Balances Report"),
+    ]
+    if since:
+        reports.append((_prepare_deletion_data(_deleted_records(since, next_watermark)), "Deletions Report"))
+    return reports
+
+
+class _EchoBuffer:
+    """File-like object for csv.writer that hands each line back instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(data, title, date_cutoff, watermark=None):
+    """Yield the CSV report (metadata preamble, headers, rows) line by line"""
+    writer = csv.writer(_EchoBuffer())
     
     # Write metadata
-    writer.writerow([title])
-    writer.writerow([f"Generated: {datetime.now().strftime('%d %B %Y, %I:%M %p')}"])
+    yield writer.writerow([title])
+    yield writer.writerow([f"Generated: {datetime.now().strftime('%d %B %Y, %I:%M %p')}"])
     if date_cutoff:
-        writer.writerow([f"Data up to: {date_cutoff}"])
-    writer.writerow([])  # Empty row
+        yield writer.writerow([f"Data up to: {date_cutoff}"])
+    if watermark:
+        if watermark['since']:
+            yield writer.writerow([f"Changes since: {watermark['since'].isoformat()}"])
+        yield writer.writerow([f"Next watermark: {watermark['next'].isoformat()}"])
+    yield writer.writerow([])  # Empty row
     
     # Write headers
-    writer.writerow(data['headers'])
+    yield writer.writerow(data['headers'])
     
     # Write data rows
     for row in data['rows']:
-        writer.writerow(row)
-    
+        yield writer.writerow(row)
+
+
+def _ndjson_value(value):
+    """JSON encoding for raw report values: amounts as numbers, timestamps as ISO 8601"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _ndjson_lines(data):
+    """
+    Yield one JSON object per record, keyed by the report's machine-readable field
+    names. Values are raw (null, status codes, ISO timestamps, numbers), not the
+    display strings of the CSV / PDF rows.
+    """
+    import json
+
+    fields = data['fields']
+    for record in data['records']:
+        yield json.dumps(dict(zip(fields, record)), ensure_ascii=False, default=_ndjson_value) + "\n"
+
+
+def _encoded_blocks(lines):
+    """Encode text lines to UTF-8 and coalesce them into blocks for streaming"""
+    block = []
+    size = 0
+    for line in lines:
+        encoded = line.encode('utf-8')
+        block.append(encoded)
+        size += len(encoded)
+        if size >= EXPORT_STREAM_BLOCK_SIZE:
+            yield b''.join(block)
+            block = []
+            size = 0
+    if block:
+        yield b''.join(block)
+
+
+def _gzip_blocks(lines):
+    """Gzip text lines incrementally, yielding compressed blocks as the compressor emits them"""
+    import zlib
+
+    # wbits=31 -> gzip container (header + CRC trailer), readable by gunzip / gzip.open
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for line in lines:
+        chunk = compressor.compress(line.encode('utf-8'))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def _streaming_attachment(blocks, content_type, filename):
+    """Wrap a byte-block generator in a download response"""
+    from django.http import StreamingHttpResponse
+
+    response = StreamingHttpResponse(blocks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
 
-def _generate_pdf_report(data, title, date_cutoff):
-    """Generate PDF report using HTML template and simple rendering"""
-    from django.http import HttpResponse
+def _report_filename(title, extension):
+    return f"{title.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+
+def _generate_excel_report(data, title, date_cutoff, watermark=None):
+    """Generate Excel report using CSV format (compatible without external libraries)"""
+    lines = _csv_lines(data, title, date_cutoff, watermark)
+    return _streaming_attachment(_encoded_blocks(lines), 'text/csv', _report_filename(title, 'csv'))
+
+
+def _generate_csv_gz_report(data, title, date_cutoff, watermark=None):
+    """Generate the CSV report gzip-compressed on the fly"""
+    lines = _csv_lines(data, title, date_cutoff, watermark)
+    return _streaming_attachment(_gzip_blocks(lines), 'application/gzip', _report_filename(title, 'csv.gz'))
+
+
+def _generate_ndjson_report(data, title, compress=False):
+    """Generate newline-delimited JSON rows (no metadata preamble), optionally gzipped"""
+    lines = _ndjson_lines(data)
+    if compress:
+        return _streaming_attachment(_gzip_blocks(lines), 'application/gzip', _report_filename(title, 'ndjson.gz'))
+    return _streaming_attachment(_encoded_blocks(lines), 'application/x-ndjson', _report_filename(title, 'ndjson'))
+
+
+class _ZipStreamBuffer:
+    """
+    Write-only, non-seekable file object for zipfile. Bytes written by the
+    archive are collected and handed to the response with drain().
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _generate_bundle_report(reports, date_cutoff, watermark, formats):
+    """Stream a ZIP archive with each report as CSV and/or PDF"""
+    import zipfile
+
+    def blocks():
+        buffer = _ZipStreamBuffer()
+        with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for data, title in reports:
+                name = title.replace(' ', '_')
+                if len(formats) > 1:
+                    # Rows are consumed once per format
+                    data = {**data, 'rows': list(data['rows'])}
+
+                if 'csv' in formats:
+                    lines = _csv_lines(data, title, date_cutoff, watermark)
+                    with archive.open(f"{name}.csv", mode='w', force_zip64=True) as entry:
+                        for block in _encoded_blocks(lines):
+                            entry.write(block)
+                            chunk = buffer.drain()
+                            if chunk:
+                                yield chunk
+
+                if 'pdf' in formats:
+                    content, extension = _render_pdf_report(data, title, date_cutoff, watermark)
+                    if content is not None:
+                        archive.writestr(f"{name}.{extension}", content)
+
+                chunk = buffer.drain()
+                if chunk:
+                    yield chunk
+
+        # Central directory
+        yield buffer.drain()
+
+    filename = f"Reports_Bundle_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return _streaming_attachment(blocks(), 'application/zip', filename)
+
+
+def _render_pdf_report(data, title, date_cutoff, watermark=None):
+    """
+    Render the report table to PDF bytes.
+    Returns (content, extension). Falls back to printable HTML ('html') when
+    xhtml2pdf is not installed; content is None if PDF generation failed.
+    """
     from django.template.loader import render_to_string
-    from datetime import datetime
+    
+    # The template needs the full table, so materialize the lazy rows once
+    context = {
+        'title': title,
+        'generated_date': datetime.now().strftime('%d %B %Y, %I:%M %p'),
+        'date_cutoff': date_cutoff,
+        'watermark': watermark,
+        'headers': data['headers'],
+        'rows': list(data['rows']),
+    }
+    html = render_to_string('gold_loan/reports/pdf_template.html', context)
     
     # Try to use xhtml2pdf if available, otherwise fall back to HTML
     try:
         from xhtml2pdf import pisa
         from io import BytesIO
-        
-        context = {
-            'title': title,
-            'generated_date': datetime.now().strftime('%d %B %Y, %I:%M %p'),
-            'date_cutoff': date_cutoff,
-            'headers': data['headers'],
-            'rows': data['rows'],
-        }
-        
-        html = render_to_string('gold_loan/reports/pdf_template.html', context)
-        
-        result = BytesIO()
-        pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
-        
-        if not pdf.err:
-            response = HttpResponse(result.getvalue(), content_type='application/pdf')
-            filename = f"{title.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
-        else:
-            return HttpResponse("Error generating PDF", status=500)
-            
     except ImportError:
+        return html.encode('utf-8'), 'html'
+    
+    result = BytesIO()
+    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
+    if pdf.err:
+        return None, 'pdf'
+    return result.getvalue(), 'pdf'
+
+
+def _generate_pdf_report(data, title, date_cutoff, watermark=None):
+    """Generate PDF report using HTML template and simple rendering"""
+    from django.http import HttpResponse
+    
+    content, extension = _render_pdf_report(data, title, date_cutoff, watermark)
+    
+    if extension == 'html':
         # Fallback: Return HTML that can be printed as PDF
-        context = {
-            'title': title,
-            'generated_date': datetime.now().strftime('%d %B %Y, %I:%M %p'),
-            'date_cutoff': date_cutoff,
-            'headers': data['headers'],
-            'rows': data['rows'],
-        }
-        
-        html = render_to_string('gold_loan/reports/pdf_template.html', context)
-        response = HttpResponse(html, content_type='text/html')
-        return response
+        return HttpResponse(content, content_type='text/html')
+    
+    if content is None:
+        return HttpResponse("Error generating PDF", status=500)
+    
+    response = HttpResponse(content, content_type='application/pdf')
+    filename = _report_filename(title, 'pdf')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
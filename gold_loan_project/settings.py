@@ -87,6 +87,26 @@ DATABASES = {
 }
 
 
+# Cache (also holds the OTP rate-limit buckets and the OTP circuit breaker)
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Local memory is per process, so with several worker processes each one
+# enforces the OTP limits and trips the breaker on its own. To share them use
+# a backend with atomic add/incr: 'django.core.cache.backends.memcached.PyMemcacheCache'
+# or 'django.core.cache.backends.redis.RedisCache'. The file-based and database
+# backends are not atomic and let concurrent requests past the limits and
+# several breaker probes through. `manage.py check` warns about both cases
+# (gold_loan/checks.py).
+
+# Web worker processes serving the app (gunicorn/uvicorn WEB_CONCURRENCY)
+WEB_WORKERS = int(os.getenv('WEB_CONCURRENCY', '1'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -132,18 +152,84 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Uploaded images are normalized before storage: EXIF orientation applied,
+# longest side capped, re-encoded at this quality and metadata stripped.
+MEDIA_INGEST_MAX_DIMENSION = 2048  # pixels
+MEDIA_INGEST_JPEG_QUALITY = 82
+
+# Post-commit media worker (thumbnails, deferred recompression).
+# In process, each web process also sweeps the task table every
+# MEDIA_WORKER_SWEEP_INTERVAL seconds for retries, overflow and tasks left by
+# a restart. With MEDIA_WORKER_IN_PROCESS = False web processes only queue
+# tasks and `python manage.py run_media_worker` must be running to execute them.
+MEDIA_WORKER_IN_PROCESS = True
+MEDIA_WORKER_SWEEP_INTERVAL = 60  # seconds
+MEDIA_WORKER_THREADS = 2
+MEDIA_WORKER_MAX_ATTEMPTS = 3
+
+# Unreferenced uploads (abandoned wizards, deleted documents) older than this
+# are removed by `manage.py cleanup_media` / `run_media_worker --gc-interval`.
+MEDIA_GC_TTL_HOURS = 24
+
+
+# =========================
+# REPORT EXPORTS
+# =========================
+
+# Incremental exports (`since`) stop this many seconds before "now": rows are
+# stamped with updated_at when saved, not when their transaction commits, so
+# the window must be longer than the longest write transaction (loan entry
+# step 5 promotes files inside one).
+EXPORT_WATERMARK_LAG = 300  # seconds
+
+
+# =========================
+# CUSTOMER SEARCH
+# =========================
+
+# Seconds between checks of each worker's in-process prefix index against
+# the customer change log (gold_loan/customer_search.py, CustomerPrefixIndex)
+CUSTOMER_PREFIX_INDEX_REFRESH = 2
+
 
 # =========================
 # OTP CONFIGURATION
 # =========================
 
-# OTP Provider: 'TWILIO' or 'CONSOLE' (for development)
-OTP_SMS_PROVIDER = 'TWILIO'
+# OTP provider (gold_loan/otp_backends.py):
+#   'gold_loan.otp_backends.TwilioVerifyBackend'  Twilio Verify (production)
+#   'gold_loan.otp_backends.LocalOTPBackend'      in-process, code is always OTP_LOCAL_CODE
+#   'gold_loan.otp_backends.HTTPGatewayBackend'   HTTP gateway at OTP_GATEWAY_URL
+#                                                 (local fake: manage.py run_otp_gateway)
+OTP_BACKEND = os.getenv('OTP_BACKEND', 'gold_loan.otp_backends.TwilioVerifyBackend')
+OTP_LOCAL_CODE = '123456'
+OTP_GATEWAY_URL = os.getenv('OTP_GATEWAY_URL', 'http://127.0.0.1:8025')
+OTP_GATEWAY_TIMEOUT = 5  # seconds
+
+# Resilience around the provider (OTPService._call_gateway)
+OTP_GATEWAY_DEADLINE = 8  # seconds per send/verify, retries included
+OTP_GATEWAY_RETRIES = 2  # extra send attempts after a provider failure
+OTP_GATEWAY_BACKOFF = 0.2  # seconds; base of the jittered exponential backoff
+OTP_CIRCUIT_BREAKER = {
+    "failure_threshold": 5,  # provider failures within `window` seconds open the circuit
+    "window": 60,
+    "recovery_timeout": 30,  # seconds the circuit stays open before a probe call
+}
 
 # OTP Validity
 OTP_VALIDITY_MINUTES = 10  # OTP expires after 10 minutes
 OTP_MAX_ATTEMPTS = 3  # Maximum verification attempts
 OTP_ADMIN_MOBILE = os.getenv('OTP_ADMIN_MOBILE', '8848993973')  # Admin number for all OTPs
+OTP_DISPATCH_THREADS = 2  # Background threads sending OTP SMS (per process)
+OTP_RETENTION_DAYS = 90  # Spent OTP records older than this are purged (manage.py purge_otps)
+
+# Token buckets "<requests>/<seconds>" for OTP sends and verifications (gold_loan/ratelimit.py)
+OTP_RATE_LIMITS = {
+    "send": "1/60",             # per mobile + purpose (resend debounce)
+    "send_client": "30/3600",   # per operator (user or browser session)
+    "send_ip": "300/3600",      # per client IP (a branch shares one; abuse ceiling only)
+    "verify": "5/300",          # per mobile + purpose + client IP
+}
 
 
 # --- TWILIO Configuration ---
@@ -154,6 +240,10 @@ TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
 TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')  # Optional if using Verify Service
 TWILIO_VERIFY_SERVICE_SID = os.getenv('TWILIO_VERIFY_SERVICE_SID')
 
+# Seconds to wait for a connection to Twilio / for its response
+TWILIO_CONNECT_TIMEOUT = 3
+TWILIO_READ_TIMEOUT = 10
+
 # --- Email Configuration (Fallback) ---
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Development
 # For production, use SMTP: